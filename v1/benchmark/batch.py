@@ -0,0 +1,55 @@
+import argparse
+import timeit
+
+from scraperski.component import Article, ArticleBatch
+from scraperski.component.codec import getCodec
+from scraperski.component.connector import decodeFrame, frames
+
+#================================================================#
+# Columnar ArticleBatch against one frame per article
+# -- usage : python -m scraperski.benchmark.batch [-n ROWS]
+# -- encodes and decodes the same scraped product rows as single
+# -- article frames and as one ArticleBatch frame, per codec
+#===============================================================-#
+
+#-----------------------------------------------------------------#
+# products
+#-----------------------------------------------------------------#
+def products(count) -> list:
+  return [Article({"sku": f"SKU-{i:06}", "title": f"Product {i}", "price": i * 0.25,
+                   "qty": i % 50, "rank": i}) for i in range(count)]
+
+#-----------------------------------------------------------------#
+# roundTrip - encode then decode every frame of the payloads
+#-----------------------------------------------------------------#
+def roundTrip(payloads, codec) -> int:
+  fsize = 0
+  for payload in payloads:
+    bparts = frames(payload, codec)
+    frame = b"".join(bparts[1:])
+    fsize += len(frame)
+    decodeFrame(frame, bparts[0][0])
+  return fsize
+
+#-----------------------------------------------------------------#
+# run
+#-----------------------------------------------------------------#
+def run(count):
+  articles = products(count)
+  print(f"{'codec':>8} {'mode':>8} {'bytes':>10} {'msec':>8} {'rows/sec':>12}")
+  for name in ("pickle", "pickle5", "binary", "json"):
+    codec = getCodec(name)
+    cases = (
+      ("single", lambda: articles),
+      ("batch", lambda: [ArticleBatch.fromArticles(articles)]))
+    for mode, payloads in cases:
+      fsize = roundTrip(payloads(), codec)
+      number = 5
+      elapsed = timeit.timeit(lambda: roundTrip(payloads(), codec), number=number) / number
+      print(f"{name:>8} {mode:>8} {fsize:>10,} {elapsed * 1e3:>8.1f} {count / elapsed:>12,.0f}")
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="ArticleBatch benchmark")
+  parser.add_argument("-n", "--rows", type=int, default=10000)
+  args = parser.parse_args()
+  run(args.rows)
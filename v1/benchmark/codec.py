@@ -0,0 +1,55 @@
+import argparse
+import pickle
+import timeit
+
+from scraperski.component import Article
+from scraperski.component.codec import codecNames, getCodec, pickleMode
+
+#================================================================#
+# Article codec encode + decode benchmark
+# -- usage : python -m scraperski.benchmark.codec [-n COUNT]
+#===============================================================-#
+
+#-----------------------------------------------------------------#
+# legacyRoundTrip - the previous Article serialize / deserialize path,
+# -- including its unconditional debug message formatting
+#-----------------------------------------------------------------#
+def legacyRoundTrip(article):
+  packet = article.rawcopy(outNote=False, shallow=False)
+  "Serialized article packet : \n{}".format(packet)
+  bpacket = bytearray(pickle.dumps(packet, pickleMode))
+  packet = pickle.loads(bpacket)
+  "Deserialized article packet : \n{}".format(packet)
+  return Article(packet)
+
+#-----------------------------------------------------------------#
+# codecRoundTrip
+#-----------------------------------------------------------------#
+def codecRoundTrip(article, codec):
+  frame = b"".join(article.encode(codec))
+  return Article.deserialize(frame, codec.id)
+
+#-----------------------------------------------------------------#
+# run
+#-----------------------------------------------------------------#
+def run(count):
+  article = Article({
+    "action": "poll/load/status",
+    "stateKey": "STEP03C",
+    "status": "polling",
+    "statusCode": 200,
+    "turn": 3,
+    "pollDelay": 1.5})
+  elapsed = timeit.timeit(lambda: legacyRoundTrip(article), number=count)
+  print(f"{'legacy':>10} : {count / elapsed:,.0f} round trips/sec")
+  for name in codecNames():
+    codec = getCodec(name)
+    size = sum(len(bpart) for bpart in article.encode(codec))
+    elapsed = timeit.timeit(lambda: codecRoundTrip(article, codec), number=count)
+    print(f"{name:>10} : {count / elapsed:,.0f} round trips/sec, frame {size} bytes")
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Article codec benchmark")
+  parser.add_argument("-n", "--count", type=int, default=100000)
+  args = parser.parse_args()
+  run(args.count)
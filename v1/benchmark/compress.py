@@ -0,0 +1,57 @@
+import argparse
+import os
+import timeit
+
+from scraperski.component import Article
+from scraperski.component.codec import defaultCodec
+from scraperski.component.compress import compressorNames, getCompressor
+
+#================================================================#
+# Frame compression sweep over payload size and compressibility
+# -- usage : python -m scraperski.benchmark.compress [-b MBIT]
+# -- break-even is the link speed below which compressing the frame
+# -- is faster end to end than sending it raw, so the smallest size
+# -- that breaks even above the target link speed is a good threshold
+#===============================================================-#
+
+sizes = (64, 256, 1024, 2048, 4096, 16384, 65536, 262144)
+
+html = b"<div class='row'><span class='price'>19.99</span><a href='/item/1234'>item</a></div>\n"
+
+#-----------------------------------------------------------------#
+# payload - text with the given fraction of random bytes mixed in
+#-----------------------------------------------------------------#
+def payload(size, randomness) -> str:
+  nrandom = int(size * randomness)
+  text = (html * (size // len(html) + 1))[:size - nrandom]
+  return (text + os.urandom(nrandom).hex().encode()[:nrandom]).decode()
+
+#-----------------------------------------------------------------#
+# run
+#-----------------------------------------------------------------#
+def run(mbit):
+  bandwidth = mbit * 125000
+  print(f"{'compressor':>10} {'mix':>6} {'size':>7} {'ratio':>6} {'usec':>8} {'break-even':>12}")
+  for name in compressorNames():
+    compressor = getCompressor(name)
+    for randomness in (0.0, 0.5, 1.0):
+      for size in sizes:
+        article = Article({"action": "xhr/stream/data", "data": payload(size, randomness)})
+        bparts = article.encode(defaultCodec)
+        fsize = sum(len(bpart) for bpart in bparts)
+        count = max(10, 2000000 // (size * (20 if name != "zlib" else 1)))
+        def roundTrip():
+          compressor.decompress(compressor.compress(bparts), fsize)
+        elapsed = timeit.timeit(roundTrip, number=count) / count
+        saved = fsize - len(compressor.compress(bparts))
+        breakEven = saved / elapsed / 125000 if saved > 0 else 0
+        verdict = "yes" if breakEven > mbit else "no"
+        print(f"{name:>10} {randomness:>6.1f} {fsize:>7} {fsize / (fsize - saved):>6.2f} "
+              f"{elapsed * 1e6:>8.1f} {breakEven:>8,.0f} Mbit {verdict}")
+  print(f"'yes' marks frames that are faster compressed on a {mbit} Mbit/s ({bandwidth:,} B/s) link")
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Frame compression benchmark")
+  parser.add_argument("-b", "--mbit", type=int, default=1000, help="target link speed in Mbit/s")
+  args = parser.parse_args()
+  run(args.mbit)
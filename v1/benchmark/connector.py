@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import time
+
+from scraperski.component import Article, Connector, ProtoConnector
+
+#================================================================#
+# Connector vs ProtoConnector loopback benchmark
+# -- usage : python -m scraperski.benchmark.connector [-n COUNT] [-s SIZE]
+#===============================================================-#
+
+#-----------------------------------------------------------------#
+# echoServer - Connector framed echo peer
+#-----------------------------------------------------------------#
+async def echoServer(port=0):
+  async def onConnect(reader, writer):
+    conn = Connector("echo", reader, writer)
+    try:
+      while True:
+        await conn._write(await conn._read())
+    except (asyncio.CancelledError, asyncio.IncompleteReadError, ConnectionResetError):
+      pass
+    finally:
+      writer.close()
+  return await asyncio.start_server(onConnect, "127.0.0.1", port)
+
+#-----------------------------------------------------------------#
+# runPipelined - one writer and one reader task over the same connection
+#-----------------------------------------------------------------#
+async def runPipelined(conn, article, count) -> float:
+  async def writer():
+    for _ in range(count):
+      await conn._write(article)
+
+  started = time.perf_counter()
+  sender = asyncio.ensure_future(writer())
+  for _ in range(count):
+    await conn._read()
+  await sender
+  return time.perf_counter() - started
+
+#-----------------------------------------------------------------#
+# runBatched - as runPipelined, with writes coalesced into batches
+#-----------------------------------------------------------------#
+async def runBatched(conn, article, count, batchSize=64) -> float:
+  async def writer():
+    for start in range(0, count, batchSize):
+      await conn._writeBatch([article] * min(batchSize, count - start))
+
+  started = time.perf_counter()
+  sender = asyncio.ensure_future(writer())
+  for _ in range(count):
+    await conn._read()
+  await sender
+  return time.perf_counter() - started
+
+#-----------------------------------------------------------------#
+# run
+#-----------------------------------------------------------------#
+async def run(count, size):
+  server = await echoServer()
+  port = server.sockets[0].getsockname()[1]
+  article = Article({"action": "bench", "stateKey": "0", "data": "x" * size})
+  try:
+    for connKind in (Connector, ProtoConnector):
+      for mode, runner in (("", runPipelined), ("batched", runBatched)):
+        conn = await connKind.open("127.0.0.1", port)
+        elapsed = await runner(conn, article, count)
+        await conn.close()
+        print(f"{connKind.__name__:>16} {mode:>7} : {count} msgs, payload {size} bytes, "
+              f"{elapsed:.3f} sec, {count / elapsed:,.0f} msgs/sec")
+  finally:
+    server.close()
+    await server.wait_closed()
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Connector loopback benchmark")
+  parser.add_argument("-n", "--count", type=int, default=50000)
+  parser.add_argument("-s", "--size", type=int, default=64)
+  args = parser.parse_args()
+  for size in (args.size, 1024):
+    asyncio.run(run(args.count, size))
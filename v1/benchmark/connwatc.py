@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+import time
+
+from scraperski.component import Article, ConnWATC, Note, QuConnector, create_task
+
+#================================================================#
+# ConnWATC send + receive overhead benchmark over a QuConnector
+# -- usage : python -m scraperski.benchmark.connwatc [-n COUNT]
+#===============================================================-#
+
+#================================================================#
+# LegacyConnWATC - the previous task per operation implementation
+#===============================================================-#
+class LegacyConnWATC(ConnWATC):
+
+  async def recvWATC(self, timeout) -> object:
+    future = create_task(self.conn._read())
+    future.add_done_callback(lambda fut: fut.cancelled() or fut.exception())
+    if timeout == 0:
+      return await future
+    return await asyncio.wait_for(future, timeout)
+
+  async def sendWATC(self, payload, timeout, batch=False):
+    future = create_task(self.conn._write(payload))
+    future.add_done_callback(lambda fut: fut.cancelled() or fut.exception())
+    if timeout == 0:
+      return await future
+    await asyncio.wait_for(future, timeout)
+
+#-----------------------------------------------------------------#
+# runEcho - send then receive count articles over a SINGLE band queue
+#-----------------------------------------------------------------#
+async def runEcho(kind, timeout, count) -> float:
+  config = Note({"readProps": {"timeout": timeout}, "writeProps": {"timeout": timeout}})
+  conn = kind(QuConnector.open("SINGLE"), config)
+  article = Article({"action": "bench", "stateKey": "0"})
+  started = time.perf_counter()
+  for _ in range(count):
+    await conn.send(article)
+    await conn.receive()
+  elapsed = time.perf_counter() - started
+  assert conn.statusCode == 200
+  return elapsed
+
+#-----------------------------------------------------------------#
+# run
+#-----------------------------------------------------------------#
+async def run(count):
+  for timeout in (0, 5):
+    for kind in (LegacyConnWATC, ConnWATC):
+      elapsed = await runEcho(kind, timeout, count)
+      print(f"{kind.__name__:>14} timeout {timeout} : {count} round trips, "
+            f"{elapsed:.3f} sec, {count / elapsed:,.0f} round trips/sec")
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="ConnWATC overhead benchmark")
+  parser.add_argument("-n", "--count", type=int, default=50000)
+  args = parser.parse_args()
+  asyncio.run(run(args.count))
@@ -0,0 +1,76 @@
+import argparse
+import time
+
+from scraperski.component import Article
+from scraperski.component.codec import getCodec
+from scraperski.component.connector import decodeFrame, frames
+from scraperski.component.delta import DeltaStreams
+
+#================================================================#
+# ConnWATC delta mode against full articles for status polling
+# -- usage : python -m scraperski.benchmark.delta [-n COUNT]
+# -- sends a poll/load/status article per turn where only the turn
+# -- and the poll delay change, the same article unchanged, and a
+# -- small article below DELTA_MIN_SIZE, and measures the bytes on
+# -- the wire and the send + receive CPU time, including the delta
+# -- bookkeeping
+# -- delta cuts bytes, not CPU : the last column is the delta CPU
+# -- cost relative to a full send with the same codec
+#===============================================================-#
+
+#-----------------------------------------------------------------#
+# statusArticle
+#-----------------------------------------------------------------#
+def statusArticle(turn) -> Article:
+  return Article({
+    "action": "poll/load/status",
+    "stateKey": "STEP03C",
+    "jobId": "2f6a1c4e-91b2-4f7e-8d3c-5a0b7e6f1d22",
+    "url": "https://www.example.com/search/results?category=graphics-cards&sort=price",
+    "selector": "div.results > ul.items > li.item",
+    "payload": {"turn": turn, "pollDelay": 1.5 + turn % 3, "retries": 3, "status": "loading"},
+    "session": {"userAgent": "Mozilla/5.0 (X11; Linux x86_64)", "viewport": [1920, 1080]}})
+
+#-----------------------------------------------------------------#
+# smallArticle
+#-----------------------------------------------------------------#
+def smallArticle(turn) -> Article:
+  return Article({"action": "poll/load/status", "payload": {"turn": turn}})
+
+WORKLOADS = {
+  "status": statusArticle,
+  "same": lambda turn: statusArticle(0),
+  "small": smallArticle}
+
+#-----------------------------------------------------------------#
+# run
+#-----------------------------------------------------------------#
+def run(count):
+  print(f"{'workload':>8} {'codec':>8} {'mode':>6} {'bytes/msg':>10} {'usec/msg':>9} {'bytes':>6} {'cpu':>6}")
+  for workload, factory in WORKLOADS.items():
+    articles = [factory(turn) for turn in range(count)]
+    for name in ("pickle", "binary", "json"):
+      codec = getCodec(name)
+      full = None
+      for mode in ("full", "delta"):
+        sender, receiver = DeltaStreams(), DeltaStreams()
+        fsize = 0
+        started = time.perf_counter()
+        for article in articles:
+          if mode == "delta":
+            article = sender.deflate(article)[0]
+          bparts = frames(article, codec)
+          frame = b"".join(bparts[1:])
+          fsize += len(frame) + len(bparts[0])
+          receiver.inflate(decodeFrame(frame, bparts[0][0]))
+        elapsed = time.perf_counter() - started
+        if full is None:
+          full = fsize, elapsed
+        print(f"{workload:>8} {name:>8} {mode:>6} {fsize / count:>10.0f} {elapsed / count * 1e6:>9.1f}"
+          f" {fsize / full[0]:>6.2f} {elapsed / full[1]:>6.2f}")
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Delta mode benchmark")
+  parser.add_argument("-n", "--count", type=int, default=20000)
+  args = parser.parse_args()
+  run(args.count)
@@ -0,0 +1,72 @@
+import argparse
+import os
+import tempfile
+import time
+
+from scraperski.component import DiskTier, MemCache, Note, SharedTier
+
+#================================================================#
+# MemCache hit latency across the memory and disk tiers
+# -- usage : python -m scraperski.benchmark.memcache [-n COUNT] [-s SIZES]
+# -- memory hit : get of a resident key
+# -- disk hit : get of a spilled key, which moves it up to memory and
+# -- spills the least recently used memory entry down in its place, the
+# -- steady state of a working set that overflows the memory tier
+# -- shared hit : get from a SharedTier segment, lock free
+# -- reopen : DiskTier index load on process restart
+#===============================================================-#
+
+defaultSizes = "64,1024,16384"
+
+#-----------------------------------------------------------------#
+# item
+#-----------------------------------------------------------------#
+def item(index, size) -> Note:
+  return Note({"key": index, "score": index * 0.5, "html": "x" * size})
+
+#-----------------------------------------------------------------#
+# timed - mean usec per call of func over keys
+#-----------------------------------------------------------------#
+def timed(func, keys) -> float:
+  started = time.perf_counter()
+  for key in keys:
+    func(key)
+  return (time.perf_counter() - started) / len(keys) * 1e6
+
+#-----------------------------------------------------------------#
+# run
+#-----------------------------------------------------------------#
+def run(count, sizes):
+  print(f"{'size':>7} {'memory hit':>11} {'shared hit':>11} {'disk hit':>9} {'miss':>7} {'reopen':>9}  usec")
+  with tempfile.TemporaryDirectory() as tmpDir:
+    for size in sizes:
+      path = os.path.join(tmpDir, f"cache-{size}.db")
+      keys = [f"item-{index}" for index in range(count)]
+      cache = MemCache(maxEntries=count // 2, disk=DiskTier(path))
+      for index, key in enumerate(keys):
+        cache.add(key, item(index, size))
+      resident = keys[count // 2:]
+      memoryHit = timed(cache.get, resident)
+      # every get hits a key that was spilled by the previous pass
+      diskHit = timed(cache.get, keys)
+      miss = timed(cache.get, [f"absent-{index}" for index in range(count)])
+      cache.close()
+      shared = MemCache(shared=SharedTier(f"scraperski-bench-{os.getpid()}", arenaSize=count * (size + 256) * 2))
+      for index, key in enumerate(keys):
+        shared.add(key, item(index, size))
+      sharedHit = timed(shared.get, keys)
+      shared.close()
+      shared.shared.unlink()
+      started = time.perf_counter()
+      reopened = DiskTier(path)
+      reopen = (time.perf_counter() - started) * 1e6
+      assert len(reopened) == count
+      reopened.close()
+      print(f"{size:>7} {memoryHit:>11.2f} {sharedHit:>11.2f} {diskHit:>9.2f} {miss:>7.2f} {reopen:>9,.0f}")
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="MemCache tier latency benchmark")
+  parser.add_argument("-n", "--count", type=int, default=10000)
+  parser.add_argument("-s", "--sizes", default=defaultSizes, help="comma separated item payload sizes")
+  args = parser.parse_args()
+  run(args.count, list(map(int, args.sizes.split(","))))
@@ -0,0 +1,139 @@
+import argparse
+import logging
+import timeit
+import tracemalloc
+
+from scraperski.component import Note, NotePath, Schema
+
+#================================================================#
+# Note body access benchmark on the datafeed onPacket request path
+# -- usage : python -m scraperski.benchmark.note [-n COUNT]
+# -- compares copying body / rawBody accessors formatted into eager
+# -- f-string log messages with NoteView and lazy %s logging, at the
+# -- default INFO level where the debug messages are dropped
+# -- also compares eager and lazy nested conversion, split per call
+# -- against compiled dotted path hasAttr, and hand-rolled request
+# -- validation against a compiled Schema
+#===============================================================-#
+
+logger = logging.getLogger('scraperski.benchmark')
+
+packet = {
+  "action": "poll/load/status",
+  "stateKey": "STEP03C",
+  "payload": {"turn": 3, "pollDelay": 1.5, "selector": "div.results", "retries": [1, 2, 3]},
+  "candidates": {"sku": "ABC-123", "title": "Graphics card", "price": 999.0}}
+
+#-----------------------------------------------------------------#
+# legacyRequest - the previous onPacket logging and access pattern
+#-----------------------------------------------------------------#
+def legacyRequest():
+  article = Note(packet)
+  logger.debug(f"Calculating load check backoff delay :\n{article.rawBody}")
+  logger.debug(f"Running emulator task with article :\n{article.body}")
+  return article.payload.body["turn"]
+
+#-----------------------------------------------------------------#
+# viewRequest
+#-----------------------------------------------------------------#
+def viewRequest():
+  article = Note(packet)
+  logger.debug("Calculating load check backoff delay :\n%s", article.view)
+  logger.debug("Running emulator task with article :\n%s", article.view)
+  return article.payload.view["turn"]
+
+#-----------------------------------------------------------------#
+# eagerConstruct - the previous construction, every nested dict converted
+#-----------------------------------------------------------------#
+def eagerConstruct():
+  article = Note(packet)
+  article._resolve()
+  return article.action
+
+#-----------------------------------------------------------------#
+# lazyConstruct
+#-----------------------------------------------------------------#
+def lazyConstruct():
+  article = Note(packet)
+  return article.action
+
+#-----------------------------------------------------------------#
+# splitHasAttr - the previous hasAttr, splitting the path on every call
+#-----------------------------------------------------------------#
+def splitHasAttr(note, *attrNames):
+  for attrName in attrNames:
+    currNode = note
+    for nodeName in attrName.split("."):
+      if isinstance(currNode, dict):
+        if not nodeName in currNode:
+          return False
+      elif not hasattr(currNode, nodeName):
+        return False
+      currNode = currNode[nodeName]
+  return True
+
+packetSchema = Schema({"action": str, "stateKey": None, "payload.turn": int},
+                      {"payload.pollDelay": (int, float)})
+
+#-----------------------------------------------------------------#
+# handValidate - the previous onPacket required and type checks
+#-----------------------------------------------------------------#
+def handValidate():
+  article = Note(packet)
+  if not article.hasAttr("action", "stateKey"):
+    raise ValueError("required params are not provided")
+  if not isinstance(article.action, str) or not isinstance(article.payload.turn, int):
+    raise ValueError("invalid param types")
+  return article
+
+#-----------------------------------------------------------------#
+# schemaValidate
+#-----------------------------------------------------------------#
+def schemaValidate():
+  packetSchema.check(packet)
+  return Note(packet)
+
+#-----------------------------------------------------------------#
+# allocated - bytes allocated by one call, freed or not
+#-----------------------------------------------------------------#
+def allocated(func, count=1000) -> float:
+  tracemalloc.start()
+  total = 0
+  for _ in range(count):
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    func()
+    total += tracemalloc.get_traced_memory()[1] - before
+  tracemalloc.stop()
+  return total / count
+
+#-----------------------------------------------------------------#
+# run
+#-----------------------------------------------------------------#
+def run(count):
+  logging.basicConfig(level=logging.INFO)
+  note = Note(packet)
+  turnPath = NotePath("payload.turn")
+  cases = (
+    ("eager construct", eagerConstruct),
+    ("lazy construct", lazyConstruct),
+    ("split hasAttr", lambda: splitHasAttr(note, "payload.turn", "candidates.sku")),
+    ("compiled hasAttr", lambda: note.hasAttr("payload.turn", "candidates.sku")),
+    ("NotePath.get", lambda: turnPath.get(note)),
+    ("hand validate", handValidate),
+    ("schema validate", schemaValidate),
+    ("legacy request", legacyRequest),
+    ("view request", viewRequest),
+    ("note.rawBody", lambda: note.rawBody),
+    ("note.body", lambda: note.body),
+    ("note.view", lambda: note.view))
+  for name, func in cases:
+    elapsed = timeit.timeit(func, number=count)
+    print(f"{name:>16} : {elapsed / count * 1e9:>8,.0f} ns/call, "
+          f"peak {allocated(func):>6,.0f} bytes/call")
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Note body access benchmark")
+  parser.add_argument("-n", "--count", type=int, default=200000)
+  args = parser.parse_args()
+  run(args.count)
@@ -0,0 +1,72 @@
+import argparse
+import asyncio
+import time
+
+from scraperski.component import ConnProvider, Note, QuConnector
+from scraperski.component.provider import QuServer
+
+#================================================================#
+# QuServer accept throughput with a slow acceptor
+# -- usage : python -m scraperski.benchmark.quserver [-n COUNT] [-d DELAY]
+# -- COUNT clients open a connection at once, and the acceptor awaits
+# -- DELAY seconds, eg an auth or session lookup, before it returns
+#===============================================================-#
+
+#================================================================#
+# LegacyQuServer - the previous one request per iteration loop
+#===============================================================-#
+class LegacyQuServer(QuServer):
+
+  async def serve_forever(self):
+    self.status = "RUNNING"
+    while self.engaged:
+      cid = await self.qchannel.receive()
+      if self.disconnected:
+        return
+      qconnA = QuConnector.open(cid=cid, highWater=self.highWater, lowWater=self.lowWater)
+      qconnB = qconnA.cloneReversed()
+      result = self.acceptor(qconnB._reader, qconnB._writer)
+      if asyncio.iscoroutine(result):
+        await result
+      await self.qchannel.send(qconnA)
+
+#-----------------------------------------------------------------#
+# runCase
+#-----------------------------------------------------------------#
+async def runCase(kind, count, delay) -> tuple:
+  config = Note({"connWATC": {"readProps": {"timeout": 0}, "writeProps": {"timeout": 0}}})
+  provider = ConnProvider("QUEUE", "localhost", 0, config)
+  async def acceptor(reader, writer):
+    await asyncio.sleep(delay)
+  server = provider.newQuServer(acceptor)
+  server.__class__ = kind
+  serving = asyncio.ensure_future(server.serve_forever())
+  latencies = []
+  async def client(index):
+    started = time.perf_counter()
+    conn = await provider.qclient.open(f"client-{index}")
+    assert conn.id == f"client-{index}", (conn.id, index)
+    latencies.append(time.perf_counter() - started)
+  started = time.perf_counter()
+  await asyncio.gather(*[client(index) for index in range(count)])
+  elapsed = time.perf_counter() - started
+  serving.cancel()
+  latencies.sort()
+  return count / elapsed, latencies[len(latencies) // 2], latencies[-1], server
+
+#-----------------------------------------------------------------#
+# run
+#-----------------------------------------------------------------#
+async def run(count, delay):
+  print(f"{'server':>14} {'opens/sec':>10} {'p50 ms':>8} {'max ms':>8}")
+  for kind in (LegacyQuServer, QuServer):
+    rate, p50, worst, server = await runCase(kind, count, delay)
+    print(f"{kind.__name__:>14} {rate:>10,.0f} {p50 * 1e3:>8.1f} {worst * 1e3:>8.1f}")
+  print(server.stats().body)
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="QuServer accept benchmark")
+  parser.add_argument("-n", "--count", type=int, default=500)
+  parser.add_argument("-d", "--delay", type=float, default=0.005, help="acceptor delay in seconds")
+  args = parser.parse_args()
+  asyncio.run(run(args.count, args.delay))
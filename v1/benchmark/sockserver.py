@@ -0,0 +1,63 @@
+import argparse
+import asyncio
+import time
+
+from scraperski.component import Article, Connector, ProtoConnector
+from scraperski.component.provider import SockServer
+
+#================================================================#
+# SockServer multi-client load benchmark
+# -- usage : python -m scraperski.benchmark.sockserver [-c CLIENTS] [-n COUNT]
+# -- CLIENTS connectors each run COUNT request / reply round trips
+# -- against a SockServer echo acceptor at the same time
+#===============================================================-#
+
+#-----------------------------------------------------------------#
+# echoAcceptor - Connector framed echo peer, in the acceptor interface
+#-----------------------------------------------------------------#
+async def echoAcceptor(reader, writer):
+  conn = Connector("echo", reader, writer)
+  try:
+    while True:
+      await conn._write(await conn._read())
+  except (asyncio.IncompleteReadError, ConnectionResetError):
+    pass
+
+#-----------------------------------------------------------------#
+# runClient
+#-----------------------------------------------------------------#
+async def runClient(connKind, port, article, count) -> list:
+  conn = await connKind.open("127.0.0.1", port)
+  latencies = []
+  for _ in range(count):
+    started = time.perf_counter()
+    await conn._write(article)
+    await conn._read()
+    latencies.append(time.perf_counter() - started)
+  await conn.close()
+  return latencies
+
+#-----------------------------------------------------------------#
+# run
+#-----------------------------------------------------------------#
+async def run(clients, count, noDelay):
+  article = Article({"action": "bench", "stateKey": "0", "data": "x" * 64})
+  async with SockServer(echoAcceptor, backlog=1024, noDelay=noDelay) as server:
+    for connKind in (Connector, ProtoConnector):
+      started = time.perf_counter()
+      results = await asyncio.gather(*[runClient(connKind, server.port, article, count)
+                                       for _ in range(clients)])
+      elapsed = time.perf_counter() - started
+      latencies = sorted(latency for result in results for latency in result)
+      p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+      print(f"{connKind.__name__:>16} : {clients} clients, {len(latencies) / elapsed:>8,.0f} round trips/sec, "
+            f"p50 {latencies[len(latencies) // 2] * 1e6:,.0f} us, p99 {p99 * 1e6:,.0f} us")
+    print(server.stats().body)
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="SockServer multi-client benchmark")
+  parser.add_argument("-c", "--clients", type=int, default=100)
+  parser.add_argument("-n", "--count", type=int, default=200)
+  parser.add_argument("--no-nodelay", dest="noDelay", action="store_false")
+  args = parser.parse_args()
+  asyncio.run(run(args.clients, args.count, args.noDelay))
@@ -0,0 +1,265 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from datetime import datetime
+
+from scraperski.component import Article, Connector, ConnWATC, Note, ProtoConnector, QuConnector
+from scraperski.component.connector import frames
+from scraperski.component.codec import defaultCodec
+from scraperski.component.provider import SockServer
+
+#================================================================#
+# Transport throughput and latency benchmark suite
+# -- usage : python -m scraperski.benchmark.transport [-n COUNT]
+#      [-s SIZES] [-c CONCURRENCY] [-d DEPTHS] [-t TRANSPORTS] [-o OUT.json]
+# -- every client runs request / echo lockstep on its own connection,
+# -- so latency is the round trip time of one article
+# -- with a depth above 1 every client keeps depth articles in flight,
+# -- sent and received by two tasks, and latency is the time of one
+# -- burst of depth round trips, per article
+# -- the default sizes put the encoded frame either side of the
+# -- 255 byte LARGE header boundary
+# -- the unix transports run the same echo peer over a unix domain
+# -- socket, for a same host comparison against loopback tcp, and the
+# -- shm transports over shared memory rings, see ShmLink
+# -- lockstep shm is slower than unix, each hop still takes a control
+# -- socket wakeup plus the ring copies, compare at depth 16 with large
+# -- sizes for the case the rings are built for, eg
+#      -t unix,shm -s 128,262144 -c 1 -d 1,16
+#===============================================================-#
+
+defaultSizes = "16,128,190,200,1024,16384,262144"
+defaultConcurrency = "1,8,32"
+defaultDepths = "1"
+transports = ("queue", "tcp", "proto", "unix", "unix-proto", "watc-queue", "watc-queue-timeout",
+              "watc-tcp", "watc-tcp-timeout", "watc-unix", "shm", "watc-shm")
+unixPath = os.path.join(tempfile.gettempdir(), f"scraperski-bench-{os.getpid()}.sock")
+shmPath = os.path.join(tempfile.gettempdir(), f"scraperski-bench-{os.getpid()}.shm.sock")
+
+watcConfig = Note({"readProps": {"timeout": 0}, "writeProps": {"timeout": 0}})
+watcTimeoutConfig = Note({"readProps": {"timeout": 30, "retries": 1}, "writeProps": {"timeout": 30, "retries": 1}})
+
+#================================================================#
+# Channel - uniform send + receive over a connector or ConnWATC
+#===============================================================-#
+class Channel:
+
+  def __init__(self, conn, watcConfig=None):
+    self.conn = conn
+    self.watc = ConnWATC(conn, watcConfig) if watcConfig else None
+
+  async def close(self):
+    await self.conn.close()
+
+  async def roundTrip(self, article) -> object:
+    await self.send(article)
+    return await self.receive()
+
+  # depth round trips, with every article sent before its echo is read
+  async def burst(self, article, depth):
+    async def sendAll():
+      for _ in range(depth):
+        await self.send(article)
+    async def receiveAll():
+      for _ in range(depth):
+        await self.receive()
+    await asyncio.gather(sendAll(), receiveAll())
+
+  async def receive(self) -> object:
+    if self.watc:
+      return await self.watc.receive()
+    return await self.conn._read()
+
+  async def send(self, article):
+    if self.watc:
+      await self.watc.send(article)
+    else:
+      await self.conn._write(article)
+
+#-----------------------------------------------------------------#
+# echoQueue - QuConnector echo peer
+#-----------------------------------------------------------------#
+async def echoQueue(conn):
+  try:
+    while True:
+      await conn._write(await conn._read())
+  except asyncio.CancelledError:
+    pass
+
+#-----------------------------------------------------------------#
+# echoConnect - Connector framed echo peer
+#-----------------------------------------------------------------#
+async def echoConnect(reader, writer):
+  conn = Connector("echo", reader, writer)
+  try:
+    while True:
+      await conn._write(await conn._read())
+  except (asyncio.CancelledError, asyncio.IncompleteReadError, ConnectionResetError):
+    pass
+  finally:
+    writer.close()
+
+#-----------------------------------------------------------------#
+# echoServer
+#-----------------------------------------------------------------#
+async def echoServer():
+  return await asyncio.start_server(echoConnect, "127.0.0.1", 0)
+
+#-----------------------------------------------------------------#
+# echoUnixServer
+#-----------------------------------------------------------------#
+async def echoUnixServer():
+  return await asyncio.start_unix_server(echoConnect, unixPath)
+
+#-----------------------------------------------------------------#
+# echoShmServer
+#-----------------------------------------------------------------#
+async def echoShmServer():
+  server = SockServer(echoConnect, path=shmPath, shm=True)
+  await server.start()
+  return server
+
+#-----------------------------------------------------------------#
+# openChannel
+#-----------------------------------------------------------------#
+async def openChannel(transport, port, echoTasks) -> Channel:
+  config = None
+  if transport.startswith("watc"):
+    config = watcTimeoutConfig if transport.endswith("timeout") else watcConfig
+  if "queue" in transport:
+    conn = QuConnector.open()
+    echoTasks.append(asyncio.ensure_future(echoQueue(conn.cloneReversed())))
+  elif transport == "proto":
+    conn = await ProtoConnector.open("127.0.0.1", port)
+  elif transport == "unix-proto":
+    conn = await ProtoConnector.openUnix(unixPath)
+  elif "unix" in transport:
+    conn = await Connector.openUnix(unixPath)
+  elif "shm" in transport:
+    conn = await Connector.openShm(shmPath)
+  else:
+    conn = await Connector.open("127.0.0.1", port)
+  return Channel(conn, config)
+
+#-----------------------------------------------------------------#
+# percentile - of a sorted list
+#-----------------------------------------------------------------#
+def percentile(ordered: list, pct: float) -> float:
+  index = min(len(ordered) - 1, int(len(ordered) * pct / 100))
+  return ordered[index]
+
+#-----------------------------------------------------------------#
+# runCase - one transport, payload size and concurrency level
+#-----------------------------------------------------------------#
+async def runCase(transport, port, size, concurrency, count, depth=1) -> dict:
+  article = Article({"action": "bench", "stateKey": "0", "data": "x" * size})
+  fsize = sum(len(bpart) for bpart in frames(article, defaultCodec))
+  echoTasks = []
+  channels = [await openChannel(transport, port, echoTasks) for _ in range(concurrency)]
+  latencies = []
+
+  async def client(channel):
+    if depth > 1:
+      for _ in range(count // depth):
+        started = time.perf_counter()
+        await channel.burst(article, depth)
+        latencies.append((time.perf_counter() - started) / depth)
+      return
+    for _ in range(count):
+      started = time.perf_counter()
+      await channel.roundTrip(article)
+      latencies.append(time.perf_counter() - started)
+
+  try:
+    started = time.perf_counter()
+    await asyncio.gather(*[client(channel) for channel in channels])
+    elapsed = time.perf_counter() - started
+  finally:
+    for channel in channels:
+      await channel.close()
+    for task in echoTasks:
+      task.cancel()
+  latencies.sort()
+  messages = (count if depth == 1 else count // depth * depth) * concurrency
+  return {
+    "transport": transport,
+    "size": size,
+    "frameSize": fsize,
+    "large": fsize > 255,
+    "concurrency": concurrency,
+    "depth": depth,
+    "messages": messages,
+    "elapsed": elapsed,
+    "msgsPerSec": messages / elapsed,
+    "mbPerSec": messages * fsize / elapsed / 1e6,
+    "p50": percentile(latencies, 50) * 1e6,
+    "p99": percentile(latencies, 99) * 1e6,
+    "p999": percentile(latencies, 99.9) * 1e6}
+
+#-----------------------------------------------------------------#
+# gitCommit
+#-----------------------------------------------------------------#
+def gitCommit() -> str:
+  try:
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    return result.stdout.strip() or None
+  except OSError:
+    return None
+
+#-----------------------------------------------------------------#
+# run
+#-----------------------------------------------------------------#
+async def run(args) -> dict:
+  server = await echoServer()
+  unixServer = await echoUnixServer()
+  shmServer = await echoShmServer()
+  port = server.sockets[0].getsockname()[1]
+  results = []
+  print(f"{'transport':>18} {'size':>7} {'frame':>7} {'conc':>4} {'depth':>5} {'msgs/sec':>10} {'MB/sec':>8} "
+        f"{'p50 us':>8} {'p99 us':>8} {'p999 us':>8}")
+  try:
+    for transport in args.transports.split(","):
+      for size in map(int, args.sizes.split(",")):
+        for concurrency in map(int, args.concurrency.split(",")):
+          for depth in map(int, args.depths.split(",")):
+            result = await runCase(transport, port, size, concurrency, args.count, depth)
+            results.append(result)
+            print(f"{transport:>18} {size:>7} {result['frameSize']:>7} {concurrency:>4} {depth:>5} "
+                  f"{result['msgsPerSec']:>10,.0f} {result['mbPerSec']:>8.2f} "
+                  f"{result['p50']:>8.1f} {result['p99']:>8.1f} {result['p999']:>8.1f}")
+  finally:
+    for echo in (server, unixServer):
+      echo.close()
+      await echo.wait_closed()
+    os.unlink(unixPath)
+    await shmServer.shutdown()
+  return {
+    "commit": gitCommit(),
+    "timestamp": datetime.now().isoformat(timespec="seconds"),
+    "python": sys.version.split()[0],
+    "platform": platform.platform(),
+    "count": args.count,
+    "results": results}
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Transport throughput and latency benchmark")
+  parser.add_argument("-n", "--count", type=int, default=2000, help="round trips per client")
+  parser.add_argument("-s", "--sizes", default=defaultSizes, help="comma separated payload sizes")
+  parser.add_argument("-c", "--concurrency", default=defaultConcurrency, help="comma separated client counts")
+  parser.add_argument("-d", "--depths", default=defaultDepths, help="comma separated articles in flight per client")
+  parser.add_argument("-t", "--transports", default=",".join(transports), help=f"subset of {transports}")
+  parser.add_argument("-o", "--out", help="save the results to this json file")
+  args = parser.parse_args()
+  report = asyncio.run(run(args))
+  if args.out:
+    with open(args.out, "w") as fp:
+      json.dump(report, fp, indent=2)
+    print(f"results saved to {args.out}")
@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+import hashlib
+import os
+import time
+
+from scraperski.component import Article, Connector, ConnWATC, Note, TxnHost, TxnPool
+
+#================================================================#
+# TxnPool scaling benchmark with a CPU bound TxnHost
+# -- usage : python -m scraperski.benchmark.txnpool [-c CLIENTS] [-n COUNT] [-r ROUNDS]
+# -- CLIENTS connections each run COUNT lockstep requests, and every
+# -- request costs ROUNDS sha256 rounds in the host, for pools of one
+# -- worker up to one worker per core
+#===============================================================-#
+
+watcConfig = Note({"readProps": {"timeout": 0}, "writeProps": {"timeout": 0}})
+
+#================================================================#
+# HashHost - replies to each request with its digest after rounds
+#===============================================================-#
+class HashHost(TxnHost):
+
+  def engaged(self) -> bool:
+    return self.conn.statusCode == 200
+
+  async def perform(self):
+    article = await self.conn.receive()
+    if article is None:
+      return
+    digest = article.data.encode()
+    for _ in range(article.rounds):
+      digest = hashlib.sha256(digest).digest()
+    await self.conn.send(Article({"digest": digest.hex()}))
+
+#-----------------------------------------------------------------#
+# runClient
+#-----------------------------------------------------------------#
+async def runClient(port, count, rounds):
+  conn = ConnWATC(await Connector.open("127.0.0.1", port), watcConfig)
+  for index in range(count):
+    await conn.send(Article({"data": str(index), "rounds": rounds}))
+    await conn.receive()
+  await conn.close()
+
+#-----------------------------------------------------------------#
+# run
+#-----------------------------------------------------------------#
+async def run(clients, count, rounds):
+  cores = os.cpu_count() or 1
+  for workers in sorted({1, max(cores // 2, 1), cores}):
+    async with TxnPool(HashHost, workers=workers) as pool:
+      await asyncio.sleep(0.5)
+      started = time.perf_counter()
+      await asyncio.gather(*[runClient(pool.port, count, rounds) for _ in range(clients)])
+      elapsed = time.perf_counter() - started
+      print(f"{workers:>3} workers of {cores} cores : {clients * count / elapsed:>8,.0f} requests/sec")
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="TxnPool scaling benchmark")
+  parser.add_argument("-c", "--clients", type=int, default=32)
+  parser.add_argument("-n", "--count", type=int, default=100)
+  parser.add_argument("-r", "--rounds", type=int, default=2000)
+  args = parser.parse_args()
+  asyncio.run(run(args.clients, args.count, args.rounds))
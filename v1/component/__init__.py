@@ -1,5 +1,11 @@
-from .component import Article, Note
+from .component import Article, ArticleBatch, Note, NotePath, NoteView, SchemaArticle
 from .connector import AbcConnector, Connector, ConnWATC, create_task, QuConnector
-from .provider import ConnProvider, MemCache
+from .disktier import DiskTier
+from .multiplex import Multiplexer
+from .protocol import FrameProtocol, ProtoConnector
+from .provider import ConnPool, ConnProvider, MemCache
+from .schema import Schema, SchemaError
+from .sharedtier import SharedTier
 from .txnHost import TxnHost
+from .txnPool import TxnPool
 from .unblock import toThread
\ No newline at end of file
@@ -0,0 +1,214 @@
+import io
+import json
+import logging
+import marshal
+import mmap
+import pickle
+import sys
+
+logger = logging.getLogger('scraperski')
+
+try:
+  pickleMode = pickle.DEFAULT_PROTOCOL
+except AttributeError:
+  pickleMode = pickle.HIGHEST_PROTOCOL
+
+#================================================================#
+# Bitmasks - codec id bits of the frame header flag byte
+#===============================================================-#
+CODEC_SHIFT = 2
+CODEC_MASK = 0xC
+
+#================================================================#
+# Codec - reduces a raw article packet to a list of wire buffers
+# -- the codec id is carried in the frame header CODEC bits, so a
+# -- receiver always decodes with the codec the sender selected
+#===============================================================-#
+class Codec:
+  id = None
+  name = None
+
+  #----------------------------------------------------------------//
+  # decode
+  #----------------------------------------------------------------//
+  def decode(self, frame) -> object:
+    raise NotImplementedError(f"{self.__class__.__name__}.decode is still an abstract method")
+
+  #----------------------------------------------------------------//
+  # encode
+  #----------------------------------------------------------------//
+  def encode(self, packet) -> list:
+    raise NotImplementedError(f"{self.__class__.__name__}.encode is still an abstract method")
+
+  #----------------------------------------------------------------//
+  # load - decode a spilled frame from its non empty file
+  # -- the file is decoded through a read only mmap, not read into memory
+  #----------------------------------------------------------------//
+  def load(self, file) -> object:
+    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as frame:
+      return self.decode(frame)
+
+#================================================================#
+# PickleCodec - the original wire format, codec id 0
+#===============================================================-#
+class PickleCodec(Codec):
+  id = 0
+  name = "pickle"
+
+  def decode(self, frame) -> object:
+    return pickle.loads(frame)
+
+  def encode(self, packet) -> list:
+    return [pickle.dumps(packet, pickleMode)]
+
+#================================================================#
+# Pickle5Codec - pickle protocol 5 with out-of-band bytes fields
+# -- frame layout : [u8 nbuffers][u32 size]*nbuffers[pickle][buffers]
+# -- bytes values >= oobSize at the first two levels are sent as
+# -- separate buffers, so they are never copied into the pickle stream
+# -- they decode as read only memoryviews : over the frame itself when
+# -- it is bytes, owned by the reader, else over a copy, as a receive
+# -- buffer or spill mmap is reused or closed once it is decoded
+#===============================================================-#
+class Pickle5Codec(Codec):
+  id = 1
+  name = "pickle5"
+  oobSize = 4096
+
+  def decode(self, frame) -> object:
+    if isinstance(frame, bytes):
+      return self._decode(memoryview(frame), False)
+    with memoryview(frame) as view:
+      return self._decode(view, True)
+
+  def _decode(self, view: memoryview, copy: bool) -> object:
+    count = view[0]
+    offset = 1 + 4 * count
+    sizes = [int.from_bytes(view[1+4*i:5+4*i], 'little') for i in range(count)]
+    end = len(view) - sum(sizes)
+    buffers = []
+    start = end
+    for size in sizes:
+      buffer = view[start:start+size]
+      buffers.append(memoryview(bytes(buffer)) if copy else buffer.toreadonly())
+      start += size
+    with view[offset:end] as bpacket:
+      return pickle.loads(bpacket, buffers=buffers)
+
+  def encode(self, packet) -> list:
+    buffers = []
+    if isinstance(packet, dict):
+      packet = self._outOfBand(packet)
+    bpacket = pickle.dumps(packet, 5, buffer_callback=buffers.append)
+    if len(buffers) > 255:
+      raise ValueError(f"{self.name} codec supports at most 255 out-of-band buffers")
+    buffers = [buffer.raw() for buffer in buffers]
+    meta = bytearray([len(buffers)])
+    for buffer in buffers:
+      meta += buffer.nbytes.to_bytes(4, 'little')
+    return [meta, bpacket, *buffers]
+
+  def _outOfBand(self, packet: dict, depth=0) -> dict:
+    oob = None
+    for key, value in packet.items():
+      if isinstance(value, bytes) and len(value) >= self.oobSize:
+        value = pickle.PickleBuffer(value)
+      elif isinstance(value, dict) and depth == 0:
+        value = self._outOfBand(value, 1)
+      else:
+        continue
+      if oob is None:
+        oob = packet.copy()
+      oob[key] = value
+    return packet if oob is None else oob
+
+#================================================================#
+# MarshalCodec - compact stdlib binary codec for flat articles
+# -- marshal supports the None, bool, int, float, str, bytes, list,
+# -- tuple and dict values that flat articles are built from
+# -- the marshal format is only guaranteed within one python version,
+# -- so every frame is tagged with the sender's major and minor version
+# -- and a peer on another version rejects it, use pickle or json then
+# -- like pickle, it is for trusted peers only, marshal does not
+# -- validate its input, code objects are refused where python allows
+#===============================================================-#
+class MarshalCodec(Codec):
+  id = 2
+  name = "binary"
+  tag = bytes(sys.version_info[:2])
+  loadOptions = {"allow_code": False} if sys.version_info >= (3, 13) else {}
+
+  def decode(self, frame) -> object:
+    with memoryview(frame) as view:
+      if len(view) < 2:
+        raise EOFError(f"{self.name} codec frame is truncated")
+      if view[:2] != self.tag:
+        raise ValueError(f"{self.name} codec frame is from python {tuple(view[:2])}, "
+                         f"this peer is {tuple(self.tag)}, use the pickle or json codec across versions")
+      with view[2:] as bpacket:
+        return marshal.loads(bpacket, **self.loadOptions)
+
+  def encode(self, packet) -> list:
+    try:
+      return [self.tag, marshal.dumps(packet, 4)]
+    except ValueError:
+      raise TypeError(f"{self.name} codec only supports flat builtin values")
+
+#================================================================#
+# JsonCodec - utf-8 json for interop with non python peers
+#===============================================================-#
+class JsonCodec(Codec):
+  id = 3
+  name = "json"
+
+  def decode(self, frame) -> object:
+    return json.loads(bytes(frame))
+
+  # json needs the text, so it is read once as str, with no bytes copy
+  def load(self, file) -> object:
+    file.seek(0)
+    text = io.TextIOWrapper(file, encoding="utf-8")
+    try:
+      return json.load(text)
+    finally:
+      text.detach()
+
+  def encode(self, packet) -> list:
+    return [json.dumps(packet, separators=(',', ':')).encode()]
+
+#================================================================#
+# codec registry
+#===============================================================-#
+codecs = {}
+
+#-----------------------------------------------------------------#
+# registerCodec
+#-----------------------------------------------------------------#
+def registerCodec(codec: Codec):
+  if not 0 <= codec.id <= CODEC_MASK >> CODEC_SHIFT:
+    raise ValueError(f"Codec id {codec.id} does not fit in the frame header codec bits")
+  codecs[codec.id] = codec
+  codecs[codec.name] = codec
+
+#-----------------------------------------------------------------#
+# getCodec - resolve a codec by name, id or instance
+#-----------------------------------------------------------------#
+def getCodec(key) -> Codec:
+  if isinstance(key, Codec):
+    return key
+  if key is None:
+    return defaultCodec
+  if key not in codecs:
+    raise ValueError(f"Codec {key} is not registered. Available : {codecNames()}")
+  return codecs[key]
+
+#-----------------------------------------------------------------#
+# codecNames
+#-----------------------------------------------------------------#
+def codecNames() -> list:
+  return [key for key in codecs if isinstance(key, str)]
+
+for _codec in (PickleCodec(), Pickle5Codec(), MarshalCodec(), JsonCodec()):
+  registerCodec(_codec)
+
+defaultCodec = codecs["pickle"]
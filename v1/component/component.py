@@ -1,18 +1,39 @@
 import logging
-import pickle
 
-logger = logging.getLogger('scraperski')
+from array import array
+from collections.abc import Mapping
+
+from .codec import getCodec, pickleMode
 
 try:
-  pickleMode = pickle.DEFAULT_PROTOCOL
-except AttributeError:
-  pickleMode = pickle.HIGHEST_PROTOCOL
+  import numpy
+except ImportError:
+  numpy = None
+
+logger = logging.getLogger('scraperski')
+
+# the raw packet key that marks an ArticleBatch
+# -- the reserved keys start with a NUL, so they are never attribute
+# -- names, and a packet that holds one is rejected where it is built
+BATCH_KEY = "\x00batch"
+# the delta key that lists the keys a Note.diff base has and the note lacks
+UNSET_KEY = "\x00unset"
 
 #================================================================#
 # Note
+# -- with recursive construction, nested dicts are held in _lazy,
+# -- outside the body, and are wrapped in a Note on first access
+# -- the _lazy slot costs one pointer, 8 bytes, on every instance
 #===============================================================-#
 class Note:
+  __slots__ = ("__dict__", "__weakref__", "_lazy")
+  # a subclass Schema that validates the constructor packet, see Schema
+  _schema = None
+
   def __init__(self, packet={}, recursive=True):
+    self._lazy = None
+    if self._schema is not None:
+      self._schema.check(packet)
     if isinstance(packet, Note):
       self.__dict__ = packet.body
     else:
@@ -21,7 +42,19 @@ class Note:
   def __call__(self, packet={}):
     self._update(packet, False)
     return self
-  
+
+  # only called when key is not in the body, so a pending nested dict
+  # is converted once and then found in the body by normal lookup
+  # -- dunder probes and the unset _lazy slot itself are never pending
+  def __getattr__(self, key):
+    if key != "_lazy" and not (key[:2] == "__" and key[-2:] == "__"):
+      lazy = self._pending()
+      if lazy and key in lazy:
+        value = Note(packet=lazy.pop(key), recursive=False)
+        self.__dict__[key] = value
+        return value
+    raise AttributeError(f"'{self.__class__.__name__}' object has no attribute '{key}'")
+
   def __getitem__(self, key):
     if key in self.__dict__:
       return self.__dict__[key]
@@ -30,12 +63,20 @@ class Note:
     raise AttributeError(f"{key} is not an attribute")
 
   def __setitem__(self, key, value):
+    self._discard(key)
     self.__dict__[key] = value
     
   @property
   def body(self):
+    self._resolve()
     return self.__dict__.copy()
 
+  # O(1) read only view of the body, see NoteView
+  @property
+  def view(self):
+    self._resolve()
+    return NoteView(self.__dict__)
+
   # copy the selected attribute and return it converted if it is a dict type
   def annote(self, key, recursive=True) -> object:
     value = self[key]
@@ -44,9 +85,30 @@ class Note:
       return Note(value, recursive)
     return value
   
+  # the raw dict of keys whose values differ from base, a Note or dict,
+  # so that base.patch(note.diff(base)) has the same body as note
+  # -- keys of base that this note lacks are listed under UNSET_KEY
+  def diff(self, base) -> dict:
+    if isinstance(base, Note):
+      base = base.rawcopy(outNote=False, shallow=False)
+    packet = self._packet()
+    if UNSET_KEY in packet:
+      raise ValueError(f"{UNSET_KEY!r} is a reserved key, it cannot be diffed")
+    delta = {}
+    for key, value in packet.items():
+      if isinstance(value, Note):
+        value = value.rawcopy(outNote=False)
+      if key not in base or base[key] != value:
+        delta[key] = value
+    unset = [key for key in base if key not in packet]
+    if unset:
+      delta[UNSET_KEY] = unset
+    return delta
+
   def delete(self, key):
     if self.hasAttr(key):
       delattr(self, key)
+    self._discard(key)
       
   # emulate dict.get
   def get(self, key, default=None):
@@ -54,22 +116,17 @@ class Note:
       return getattr(self, key)
     return default
   
+  # attrNames are dotted paths or NotePaths, see NotePath
   def hasAttr(self, *attrNames):
     for attrName in attrNames:
-      branches = attrName.split(".")
-      currNode = self
-      for nodeName in branches:
-        if isinstance(currNode, dict):
-          if not nodeName in currNode:
-            return False
-        elif not hasattr(currNode, nodeName):
-          return False
-        currNode = currNode[nodeName]
+      if not NotePath.of(attrName).has(self):
+        return False
     return True
 
   def hasAttrValue(self, attrName, value):
-    if self.hasAttr(attrName):
-      return self[attrName] == value
+    path = NotePath.of(attrName)
+    if path.has(self):
+      return path.get(self) == value
     return False
 
   def merge(self, packet, recursive=False):
@@ -77,8 +134,19 @@ class Note:
       raise TypeError('dict.update requires a dict argument')
     self._update(packet, recursive)
 
+  # apply a Note.diff delta in place
+  def patch(self, delta: dict) -> object:
+    unset = delta.get(UNSET_KEY)
+    if unset:
+      self.remove(*unset)
+      delta = {key: value for key, value in delta.items() if key != UNSET_KEY}
+    self._update(delta, True)
+    return self
+
   def pop(self, key, default=None):
     if isinstance(key, str):
+      if key not in self.__dict__:
+        self.get(key)
       return self.__dict__.pop(key, default)
     return default
   
@@ -108,11 +176,13 @@ class Note:
     for key in args:
       if isinstance(key, str):
         self.__dict__.pop(key, None)
+        self._discard(key)
 
   # rename an attribute
   def rename(self, fkey, tkey: str):
     if not (isinstance("fkey",str) and isinstance("tkey",str)):
       return
+    self._resolve()
     if fkey in self.__dict__ and tkey not in self.__dict__:
       if "-" in tkey:
         tkey = tkey.replace("-","_")
@@ -121,6 +191,7 @@ class Note:
   def select(self, *keys, recursive=True) -> object:
     if not keys:
       return self.copy()
+    self._resolve()
     packet = {key:self.__dict__[key] for key in keys if key in self.__dict__}
     return Note(packet,recursive)
 
@@ -128,22 +199,140 @@ class Note:
   def tell(self, *keys):
     return [self.get(key) for key in keys]
 
-  # the main construct and update method that, on detecting a dict, converts it to Note
+  # drop a pending nested dict that is being replaced or removed
+  def _discard(self, key):
+    lazy = self._pending()
+    if lazy:
+      lazy.pop(key, None)
+
+  # the body keys and values, pending nested dicts are already raw,
+  # so they are read unconverted
+  def _packet(self) -> dict:
+    lazy = self._pending()
+    return {**lazy, **self.__dict__} if lazy else self.__dict__
+
+  # the pending nested dicts, None if there are none
+  def _pending(self) -> dict:
+    try:
+      return self._lazy
+    except AttributeError:
+      return None
+
+  # convert every pending nested dict, for whole body access
+  def _resolve(self):
+    lazy = self._pending()
+    if lazy:
+      self._lazy = None
+      for key, value in lazy.items():
+        # a key already in the body was assigned after construction
+        if key not in self.__dict__:
+          self.__dict__[key] = Note(packet=value, recursive=False)
+
+  # the main construct and update method, a nested dict is converted to Note
+  # on first access if recursive, nested dicts beyond the first level are kept
   def _update(self, packet, recursive):
     if not isinstance(packet, dict):
       logger.warn("Note constructor expects packet to be a dict type")
       return packet
-    # self.__dict__.update(packet)
+    lazy = self._pending()
     for key, value in packet.items():
       if "-" in key:
         key = key.replace("-","_")
-      self.__dict__[key] = value
-    if not recursive:
-      return
-    for key, value in packet.items():
-      if isinstance(value, dict):
-        # don't convert beyond first level
-        self.__dict__[key] = Note(packet=value, recursive=False)
+      if recursive and isinstance(value, dict):
+        if lazy is None:
+          lazy = self._lazy = {}
+        lazy[key] = value
+        self.__dict__.pop(key, None)
+      else:
+        if lazy:
+          lazy.pop(key, None)
+        self.__dict__[key] = value
+
+#================================================================#
+# NotePath - a dotted attribute path parsed once, for repeated get,
+# has and set on nested Notes and dicts
+#===============================================================-#
+class NotePath:
+  __slots__ = ("path", "keys")
+  _cache = {}
+
+  def __init__(self, path: str):
+    self.path = path
+    self.keys = tuple(path.split("."))
+
+  def __repr__(self):
+    return f"NotePath({self.path!r})"
+
+  # the compiled path of a dotted path string, parsed once and cached
+  @classmethod
+  def of(cls, path) -> object:
+    if isinstance(path, NotePath):
+      return path
+    compiled = cls._cache.get(path)
+    if compiled is None:
+      if len(cls._cache) >= 4096:
+        cls._cache.clear()
+      compiled = cls._cache[path] = cls(path)
+    return compiled
+
+  def get(self, node, default=None) -> object:
+    try:
+      for key in self.keys:
+        if isinstance(node, dict):
+          node = node[key]
+        else:
+          node = getattr(node, key)
+      return node
+    except (AttributeError, KeyError, TypeError):
+      return default
+
+  def has(self, node) -> bool:
+    missing = NotePath
+    return self.get(node, missing) is not missing
+
+  # set the value, creating missing intermediate Notes
+  def set(self, node, value):
+    for key in self.keys[:-1]:
+      if isinstance(node, dict):
+        node = node.setdefault(key, {})
+      else:
+        child = getattr(node, key, None)
+        if child is None:
+          child = Note({}, False)
+          node[key] = child
+        node = child
+    node[self.keys[-1]] = value
+
+#================================================================#
+# NoteView - live read only mapping over a Note body
+# -- construction is O(1), nested Notes are presented as NoteViews,
+# -- so reading or logging a body costs no dict copies
+# -- copy on write : a caller that needs to mutate takes copy(), the
+# -- raw dict form that Note.rawcopy(outNote=False) returns
+#===============================================================-#
+class NoteView(Mapping):
+  __slots__ = ("_body",)
+
+  def __init__(self, body: dict):
+    self._body = body
+
+  def __getitem__(self, key):
+    value = self._body[key]
+    if isinstance(value, Note):
+      return value.view
+    return value
+
+  def __iter__(self):
+    return iter(self._body)
+
+  def __len__(self):
+    return len(self._body)
+
+  def __repr__(self):
+    return "{" + ", ".join(f"{key!r}: {value!r}" for key, value in self.items()) + "}"
+
+  def copy(self) -> dict:
+    return {key: value.copy() if isinstance(value, NoteView) else value for key, value in self.items()}
 
 #================================================================#
 # Article
@@ -154,24 +343,276 @@ class Article(Note):
   @classmethod
   def deducce(cls, packet: dict)-> object:
     if isinstance(packet, dict):
+      if BATCH_KEY in packet:
+        return ArticleBatch.fromPacket(packet)
       return cls(packet)
     return packet
 
   # for default socket Connector
   @classmethod
-  def deserialize(cls, bpacket: bytearray):
-    packet = pickle.loads(bpacket)
-    logger.debug("Deserialized article packet : \n{}".format(packet))
+  def deserialize(cls, bpacket: bytearray, codec=None):
+    packet = getCodec(codec).decode(bpacket)
+    if logger.isEnabledFor(logging.DEBUG):
+      logger.debug("Deserialized article packet : \n{}".format(packet))
     if isinstance(packet, dict):
+      if BATCH_KEY in packet:
+        return ArticleBatch.fromPacket(packet)
       return cls(packet)
     return packet
 
+  # encode the article to a list of wire buffers, for Connector._write
+  def encode(self, codec=None) -> list:
+    packet = self.rawPacket()
+    if BATCH_KEY in packet:
+      raise ValueError(f"{BATCH_KEY!r} is a reserved key, it cannot be encoded")
+    if logger.isEnabledFor(logging.DEBUG):
+      logger.debug("Serialized article packet : \n{}".format(packet))
+    return getCodec(codec).encode(packet)
+
+  # the raw dict form of the article - a flat article is passed through without copying
+  # -- pending nested dicts are raw already and are not converted
+  def rawPacket(self) -> dict:
+    for value in self.__dict__.values():
+      if isinstance(value, Note):
+        return self.rawcopy(outNote=False, shallow=False)
+    return self._packet()
 
   # QuConn equivalent of Conn using article.serialize - reduces Article to a raw dict collection
   def reducce(self)-> dict:
     return self.rawcopy(outNote=False,)
 
-  def serialize(self)-> bytearray:
-    packet = self.rawcopy(outNote=False, shallow=False)
-    logger.debug("Serialized article packet : \n{}".format(packet))
-    return bytearray(pickle.dumps(packet, pickleMode))
+  def serialize(self, codec=None)-> bytearray:
+    return bytearray(b"".join(self.encode(codec)))
+
+#================================================================#
+# SchemaArticle - Article with a declared set of fields held in
+# __slots__, for message types with known fields
+# -- subclasses declare __slots__ = ("field", ...), and field values
+# -- live in those slots. Note.__slots__ still declares __dict__, so
+# -- an instance has one, but it is left empty and a small article
+# -- costs a fraction of a Note. Unset fields are absent, as with Note
+# -- attributes
+# -- field values are kept as is, nested dicts are not converted
+#===============================================================-#
+class SchemaArticle(Article):
+  __slots__ = ()
+  _fields = ()
+
+  def __init_subclass__(cls, **kwargs):
+    super().__init_subclass__(**kwargs)
+    fields = []
+    for klass in reversed(cls.__mro__):
+      if issubclass(klass, SchemaArticle):
+        fields.extend(klass.__dict__.get("__slots__", ()))
+    cls._fields = tuple(fields)
+
+  def __init__(self, packet={}, recursive=False):
+    if self._schema is not None:
+      self._schema.check(packet)
+    if isinstance(packet, Note):
+      packet = packet.body
+    self._update(packet, recursive)
+
+  def __getitem__(self, key):
+    try:
+      return getattr(self, key)
+    except (AttributeError, TypeError):
+      raise AttributeError(f"{key} is not an attribute")
+
+  def __setitem__(self, key, value):
+    setattr(self, key, value)
+
+  # field values in schema order, so a row article unpacks like a tuple
+  def __iter__(self):
+    return (getattr(self, key, None) for key in self._fields)
+
+  @property
+  def body(self):
+    return {key: getattr(self, key) for key in self._fields if hasattr(self, key)}
+
+  @classmethod
+  def fields(cls) -> tuple:
+    return cls._fields
+
+  def delete(self, key):
+    if hasattr(self, key):
+      delattr(self, key)
+
+  def pop(self, key, default=None):
+    if key in self._fields and hasattr(self, key):
+      value = getattr(self, key)
+      delattr(self, key)
+      return value
+    return default
+
+  def rawcopy(self, outNote=True, pop=[], shallow=True):
+    body = self.body
+    for key in pop:
+      body.pop(key, None)
+    if outNote:
+      return Note(body, False)
+    return body
+
+  @property
+  def rawBody(self):
+    return self.body
+
+  def rawPacket(self) -> dict:
+    return self.body
+
+  @property
+  def view(self):
+    return NoteView(self.body)
+
+  def _packet(self) -> dict:
+    return self.body
+
+  def remove(self, *args):
+    for key in args:
+      self.delete(key)
+
+  def rename(self, fkey, tkey: str):
+    raise TypeError(f"{self.__class__.__name__} fields are fixed by its schema")
+
+  def select(self, *keys, recursive=True) -> object:
+    if not keys:
+      return self.__class__(self.body)
+    packet = {key: getattr(self, key) for key in keys if hasattr(self, key)}
+    return Note(packet, recursive)
+
+  def _update(self, packet, recursive):
+    if not isinstance(packet, dict):
+      logger.warning("Note constructor expects packet to be a dict type")
+      return packet
+    for key, value in packet.items():
+      if "-" in key:
+        key = key.replace("-","_")
+      if key not in self._fields:
+        raise AttributeError(f"{key} is not a {self.__class__.__name__} field")
+      setattr(self, key, value)
+
+#================================================================#
+# ArticleBatch - a homogeneous list of articles stored column wise
+# -- one sequence per field, where int and float fields are packed
+# -- in an array, so a whole batch is one frame on any connector
+# -- articles are rehydrated lazily, one per row on iteration
+#===============================================================-#
+class ArticleBatch:
+  __slots__ = ("fields", "columns", "count")
+
+  def __init__(self, fields: tuple, columns: dict, count: int):
+    self.fields = tuple(fields)
+    self.columns = columns
+    self.count = count
+
+  # an index is one article, a slice is a batch of the selected rows
+  def __getitem__(self, index) -> object:
+    if isinstance(index, slice):
+      rows = range(*index.indices(self.count))
+      return ArticleBatch(self.fields, {key: self.columns[key][index] for key in self.fields}, len(rows))
+    if index < 0:
+      index += self.count
+    if not 0 <= index < self.count:
+      raise IndexError("ArticleBatch index out of range")
+    return Article({key: self.columns[key][index] for key in self.fields})
+
+  def __iter__(self):
+    for row in self.rows():
+      yield Article(dict(zip(self.fields, row)))
+
+  def __len__(self):
+    return self.count
+
+  def __repr__(self):
+    return f"ArticleBatch(fields={self.fields}, count={self.count})"
+
+  # build a batch from articles that share the fields of the first one
+  # -- a missing field is None, a field not in the first article is an error
+  @classmethod
+  def fromArticles(cls, articles) -> object:
+    bodies = []
+    for article in articles:
+      if isinstance(article, Article):
+        article = article.rawPacket()
+      elif isinstance(article, Note):
+        article = article.rawcopy(outNote=False)
+      bodies.append(article)
+    fields = tuple(bodies[0]) if bodies else ()
+    columns = {key: [] for key in fields}
+    for body in bodies:
+      if len(body) > len(fields) or any(key not in columns for key in body):
+        raise ValueError(f"ArticleBatch articles must share the fields {fields}. Got : {tuple(body)}")
+      for key in fields:
+        columns[key].append(body.get(key))
+    return cls(fields, {key: packColumn(column) for key, column in columns.items()}, len(bodies))
+
+  # inverse of rawPacket
+  @classmethod
+  def fromPacket(cls, packet: dict) -> object:
+    columns = dict(packet["columns"])
+    for key, data in packet.get("arrays", {}).items():
+      column = array(packet["typecodes"][key])
+      column.frombytes(data)
+      columns[key] = column
+    return cls(packet[BATCH_KEY], columns, packet["count"])
+
+  # the field column as a NumPy array, numpy is an optional dependency
+  def asNumpy(self, key) -> object:
+    if numpy is None:
+      raise ImportError("ArticleBatch.asNumpy requires numpy, which is not installed")
+    column = self.columns[key]
+    if isinstance(column, array):
+      return numpy.frombuffer(column, dtype=column.typecode)
+    return numpy.asarray(column)
+
+  def column(self, key) -> object:
+    return self.columns[key]
+
+  # encode the batch to a list of wire buffers, as Article.encode
+  def encode(self, codec=None) -> list:
+    codec = getCodec(codec)
+    return codec.encode(self.rawPacket(binary=codec.name != "json"))
+
+  # the raw dict form of the batch, array columns are sent as bytes
+  # -- unless binary is False, for codecs without a bytes type
+  def rawPacket(self, binary=True) -> dict:
+    columns = {}
+    arrays = {}
+    typecodes = {}
+    for key in self.fields:
+      column = self.columns[key]
+      if not isinstance(column, array):
+        columns[key] = list(column)
+      elif binary:
+        arrays[key] = column.tobytes()
+        typecodes[key] = column.typecode
+      else:
+        columns[key] = column.tolist()
+    return {
+      BATCH_KEY: list(self.fields),
+      "count": self.count,
+      "columns": columns,
+      "arrays": arrays,
+      "typecodes": typecodes}
+
+  def reducce(self) -> dict:
+    return self.rawPacket()
+
+  def rows(self):
+    return zip(*(self.columns[key] for key in self.fields))
+
+  def serialize(self, codec=None) -> bytearray:
+    return bytearray(b"".join(self.encode(codec)))
+
+#-----------------------------------------------------------------#
+# packColumn - an int or float column as an array, else a list
+#-----------------------------------------------------------------#
+def packColumn(column: list) -> object:
+  if column and all(type(value) is float for value in column):
+    return array("d", column)
+  if column and all(type(value) is int for value in column):
+    try:
+      return array("q", column)
+    except OverflowError:
+      pass
+  return column
@@ -0,0 +1,171 @@
+import bz2
+import logging
+import lzma
+import zlib
+
+logger = logging.getLogger('scraperski')
+
+#================================================================#
+# Bitmasks - compressor id bits of the frame header flag byte
+# -- compressor id 0 means the frame payload is not compressed
+#===============================================================-#
+COMPRESS_SHIFT = 4
+COMPRESS_MASK = 0x30
+
+# frame payloads smaller than COMPRESS_SIZE bytes are sent uncompressed
+COMPRESS_SIZE = 0x800
+
+#================================================================#
+# Compressor - transparent per frame payload compression
+# -- the compressor id is carried in the frame header COMPRESS bits,
+# -- so a receiver always inflates with the sender's compressor
+#===============================================================-#
+class Compressor:
+  id = None
+  name = None
+
+  #----------------------------------------------------------------//
+  # compress - reduce the encoded buffers of one frame to one buffer
+  #----------------------------------------------------------------//
+  def compress(self, bparts: list) -> bytes:
+    compressor = self.compressobj()
+    bdata = [compressor.compress(bpart) for bpart in bparts]
+    bdata.append(compressor.flush())
+    return b"".join(bdata)
+
+  #----------------------------------------------------------------//
+  # compressobj
+  #----------------------------------------------------------------//
+  def compressobj(self) -> object:
+    raise NotImplementedError(f"{self.__class__.__name__}.compressobj is still an abstract method")
+
+  #----------------------------------------------------------------//
+  # decompress - inflate one frame to at most limit bytes
+  # -- a frame that inflates past limit is rejected, not buffered
+  #----------------------------------------------------------------//
+  def decompress(self, frame, limit: int) -> bytes:
+    decompressor = self.decompressobj()
+    bdata = decompressor.decompress(frame, limit + 1)
+    if len(bdata) > limit:
+      raise ValueError(f"{self.name} frame inflates past the {limit} byte limit")
+    if not decompressor.eof:
+      raise ValueError(f"{self.name} frame is truncated")
+    return bdata
+
+  #----------------------------------------------------------------//
+  # inflate - inflate a chunked frame in pieces of at most size bytes
+  # -- the output of one input chunk is drained piecewise, so memory
+  # -- stays bounded however far a chunk inflates
+  # -- raises once the output passes limit, or if the stream is truncated
+  #----------------------------------------------------------------//
+  def inflate(self, chunks, limit: int, size: int):
+    decompressor = self.decompressobj()
+    total = 0
+    for chunk in chunks:
+      bdata = decompressor.decompress(chunk, size)
+      while bdata:
+        total += len(bdata)
+        if total > limit:
+          raise ValueError(f"{self.name} frame inflates past the {limit} byte limit")
+        yield bdata
+        if decompressor.eof:
+          break
+        bdata = decompressor.decompress(self.unconsumed(decompressor), size)
+      if decompressor.eof:
+        break
+    if not decompressor.eof:
+      raise ValueError(f"{self.name} frame is truncated")
+
+  #----------------------------------------------------------------//
+  # decompressobj - incremental decompressor for spilled frames
+  #----------------------------------------------------------------//
+  def decompressobj(self) -> object:
+    raise NotImplementedError(f"{self.__class__.__name__}.decompressobj is still an abstract method")
+
+  #----------------------------------------------------------------//
+  # unconsumed - the input a max_length bounded decompress call left
+  # -- lzma and bz2 keep it internally, and take b"" to continue
+  #----------------------------------------------------------------//
+  def unconsumed(self, decompressor) -> bytes:
+    return b""
+
+#================================================================#
+# ZlibCompressor - fast, the sensible default for scraped text
+#===============================================================-#
+class ZlibCompressor(Compressor):
+  id = 1
+  name = "zlib"
+  level = 1
+
+  def compressobj(self) -> object:
+    return zlib.compressobj(self.level)
+
+  def decompressobj(self) -> object:
+    return zlib.decompressobj()
+
+  def unconsumed(self, decompressor) -> bytes:
+    return decompressor.unconsumed_tail
+
+#================================================================#
+# LzmaCompressor - best ratio, slowest
+#===============================================================-#
+class LzmaCompressor(Compressor):
+  id = 2
+  name = "lzma"
+  preset = 1
+
+  def compressobj(self) -> object:
+    return lzma.LZMACompressor(preset=self.preset)
+
+  def decompressobj(self) -> object:
+    return lzma.LZMADecompressor()
+
+#================================================================#
+# Bz2Compressor
+#===============================================================-#
+class Bz2Compressor(Compressor):
+  id = 3
+  name = "bz2"
+  level = 9
+
+  def compressobj(self) -> object:
+    return bz2.BZ2Compressor(self.level)
+
+  def decompressobj(self) -> object:
+    return bz2.BZ2Decompressor()
+
+#================================================================#
+# compressor registry
+#===============================================================-#
+compressors = {}
+
+#-----------------------------------------------------------------#
+# registerCompressor
+#-----------------------------------------------------------------#
+def registerCompressor(compressor: Compressor):
+  if not 0 < compressor.id <= COMPRESS_MASK >> COMPRESS_SHIFT:
+    raise ValueError(f"Compressor id {compressor.id} does not fit in the frame header compress bits")
+  compressors[compressor.id] = compressor
+  compressors[compressor.name] = compressor
+
+#-----------------------------------------------------------------#
+# getCompressor - resolve a compressor by name, id or instance
+# -- None or 0 means no compression
+#-----------------------------------------------------------------#
+def getCompressor(key) -> Compressor:
+  if isinstance(key, Compressor):
+    return key
+  if not key:
+    return None
+  if key not in compressors:
+    raise ValueError(f"Compressor {key} is not registered. Available : {compressorNames()}")
+  return compressors[key]
+
+#-----------------------------------------------------------------#
+# compressorNames
+#-----------------------------------------------------------------#
+def compressorNames() -> list:
+  return [key for key in compressors if isinstance(key, str)]
+
+for _compressor in (ZlibCompressor(), LzmaCompressor(), Bz2Compressor()):
+  registerCompressor(_compressor)
@@ -1,15 +1,28 @@
 import asyncio
+import itertools
 import logging
+import os
+import tempfile
 
-from asyncio import Future, Queue, StreamReader, StreamWriter
+from asyncio import Queue, StreamReader, StreamWriter
 from dataclasses import dataclass, field, InitVar
 from datetime import datetime
 from typing import Any
 
-from .component import Article, Note
+from .codec import Codec, CODEC_MASK, CODEC_SHIFT, defaultCodec, getCodec
+from .compress import Compressor, COMPRESS_MASK, COMPRESS_SHIFT, COMPRESS_SIZE, getCompressor
+from .component import Article, ArticleBatch, Note
+from .delta import checkPayload, DELTA_MIN_SIZE, DELTA_STREAMS, DeltaStreams
+from .shmring import RING_SIZE, ShmLink
 
 logger = logging.getLogger('scraperski')
 
+# LARGE frames above SPILL_SIZE bytes are received into a temp file
+SPILL_SIZE = 0x2000000
+SPILL_CHUNK = 0x40000
+# a compressed frame may inflate to at most INFLATE_LIMIT bytes
+INFLATE_LIMIT = 0x40000000
+
 #-----------------------------------------------------------------#
 # create_task
 #-----------------------------------------------------------------#
@@ -51,6 +64,91 @@ class AbcConnector:
   def _write(self):
     raise NotImplementedError(f"{self.name}._write is still an abstract method")
 
+#================================================================#
+# WaterQueue - bounded Queue with high and low watermarks
+# -- put blocks once the depth reaches highWater, and producers stay
+# -- blocked until the consumer drains the depth down to lowWater
+# -- highWater == 0 means unbounded, as a plain Queue
+#===============================================================-#
+class WaterQueue(Queue):
+
+  def __init__(self, highWater=0, lowWater=None):
+    super().__init__()
+    if lowWater is None:
+      lowWater = highWater // 2
+    if highWater and not 0 <= lowWater < highWater:
+      raise ValueError("WaterQueue requires 0 <= lowWater < highWater")
+    self.highWater = highWater
+    self.lowWater = lowWater
+    self.paused = False
+    self._drained = asyncio.Event()
+    self._drained.set()
+    self.puts = 0
+    self.gets = 0
+    self.pauses = 0
+    self.peak = 0
+
+  #----------------------------------------------------------------//
+  # full
+  #----------------------------------------------------------------//
+  def full(self) -> bool:
+    return self.paused
+
+  #----------------------------------------------------------------//
+  # put - waits while the queue is above its low watermark after
+  # -- reaching the high watermark
+  #----------------------------------------------------------------//
+  async def put(self, item):
+    while self.paused:
+      await self._drained.wait()
+    self.put_nowait(item)
+
+  #----------------------------------------------------------------//
+  # stats - queue depth statistics
+  #----------------------------------------------------------------//
+  def stats(self) -> Note:
+    return Note({
+      "depth": self.qsize(),
+      "peak": self.peak,
+      "highWater": self.highWater,
+      "lowWater": self.lowWater,
+      "paused": self.paused,
+      "pauses": self.pauses,
+      "puts": self.puts,
+      "gets": self.gets})
+
+  #----------------------------------------------------------------//
+  # _get
+  #----------------------------------------------------------------//
+  def _get(self):
+    item = super()._get()
+    self.gets += 1
+    if self.paused and self.qsize() <= self.lowWater:
+      self.paused = False
+      self._drained.set()
+    return item
+
+  #----------------------------------------------------------------//
+  # _put
+  #----------------------------------------------------------------//
+  def _put(self, item):
+    super()._put(item)
+    self.puts += 1
+    depth = self.qsize()
+    if depth > self.peak:
+      self.peak = depth
+    if self.highWater and depth >= self.highWater:
+      self.paused = True
+      self.pauses += 1
+      self._drained.clear()
+
+#================================================================#
+# Multipart - the queue item of a multipart message, so that a
+# plain list payload is still passed through by reference
+#===============================================================-#
+class Multipart(list):
+  pass
+
 #================================================================#
 # QuConnector - for unit testing without socket connection overhead
 #===============================================================-#
@@ -60,6 +158,12 @@ class QuConnector:
   _reader: Queue
   _writer: Queue
   
+  #----------------------------------------------------------------//
+  # alive - a queue connector cannot be reset by its peer
+  #----------------------------------------------------------------//
+  def alive(self) -> bool:
+    return True
+
   #----------------------------------------------------------------//
   # close - simulate asyncio socket closure
   #----------------------------------------------------------------//
@@ -77,24 +181,36 @@ class QuConnector:
   # open
   # -- bandDesc set = (DUEL, SINGLE) where SINGLE band would apply 
   # -- for a PUSH / PULL arrangment
+  # -- highWater > 0 bounds each queue, see WaterQueue
   #----------------------------------------------------------------//
   @classmethod
-  def open(cls, bandDesc="DUEL", cid="0") -> object:
+  def open(cls, bandDesc="DUEL", cid="0", highWater=0, lowWater=None) -> object:
     if cid == "0":
       cid = datetime.now().strftime('%S%f')
     if bandDesc == "SINGLE":
-      conn = Queue()
+      conn = WaterQueue(highWater, lowWater)
       return cls(cid, conn, conn)
-    return cls(cid, Queue(), Queue())
+    return cls(cid, WaterQueue(highWater, lowWater), WaterQueue(highWater, lowWater))
   
   #----------------------------------------------------------------//
   # _write
+  # -- a list of articles is a multipart message, queued as one item
+  # -- any other list is a plain payload
   #----------------------------------------------------------------//
   async def _write(self, payload):
-    if isinstance(payload, Article):
+    if isinstance(payload, (Article, ArticleBatch)):
       payload = payload.reducce()
+    elif isinstance(payload, list) and any(isinstance(part, (Article, ArticleBatch)) for part in payload):
+      payload = Multipart(part.reducce() if isinstance(part, (Article, ArticleBatch)) else part for part in payload)
     await self._writer.put(payload)
 
+  #----------------------------------------------------------------//
+  # _writeBatch
+  #----------------------------------------------------------------//
+  async def _writeBatch(self, payloads: list):
+    for payload in payloads:
+      await self._write(payload)
+
   #----------------------------------------------------------------//
   # receive
   #----------------------------------------------------------------//
@@ -102,6 +218,8 @@ class QuConnector:
     payload = await self._reader.get()
     if isinstance(payload, dict):
       return Article.deducce(payload)
+    if isinstance(payload, Multipart):
+      return [Article.deducce(part) for part in payload]
     return payload
 
   #----------------------------------------------------------------//
@@ -109,6 +227,14 @@ class QuConnector:
   #----------------------------------------------------------------//
   def cloneReversed(self) -> object:
     return QuConnector(self.id, self._writer, self._reader)
+
+  #----------------------------------------------------------------//
+  # stats - queue depth statistics of both bands
+  #----------------------------------------------------------------//
+  def stats(self) -> Note:
+    return Note({
+      "reader": self._reader.stats().body if isinstance(self._reader, WaterQueue) else {},
+      "writer": self._writer.stats().body if isinstance(self._writer, WaterQueue) else {}}, False)
   
 #================================================================#
 # Connector
@@ -118,6 +244,19 @@ class Connector:
   id: str
   _reader: StreamReader
   _writer: StreamWriter
+  codec: Codec = defaultCodec
+  spillSize: int = SPILL_SIZE
+  compressor: Compressor = None
+  compressSize: int = COMPRESS_SIZE
+  _pending: list = field(init=False, default_factory=list)
+
+  #----------------------------------------------------------------//
+  # alive - cheap liveness check, without any io
+  #----------------------------------------------------------------//
+  def alive(self) -> bool:
+    if self._writer.is_closing() or self._reader.at_eof():
+      return False
+    return self._reader.exception() is None
 
   #----------------------------------------------------------------//
   # close
@@ -130,12 +269,14 @@ class Connector:
   # open
   #----------------------------------------------------------------//
   @classmethod
-  async def open(cls, hostName: str, port: int, cid="0") -> object:
+  async def open(cls, hostName: str, port: int, cid="0", codec=None, spillSize=SPILL_SIZE,
+                 compress=None, compressSize=COMPRESS_SIZE) -> object:
     try:
       if cid == "0":
         cid = datetime.now().strftime('%S%f')
       reader, writer = await asyncio.open_connection(hostName, port)
-      return cls(cid, reader, writer)
+      return cls(cid, reader, writer, getCodec(codec), spillSize,
+                 getCompressor(compress), compressSize)
     except (IOError, asyncio.TimeoutError):
       errmsg = "Asyncio failed to create a connection @{}:{}"
       logger.error(errmsg.format(hostName, port), exc_info=True)
@@ -146,86 +287,241 @@ class Connector:
       raise
 
   #----------------------------------------------------------------//
-  # receive
+  # openUnix - open over a unix domain socket, for same host peers
   #----------------------------------------------------------------//
-  async def _read(self) -> Article:
+  @classmethod
+  async def openUnix(cls, path: str, cid="0", codec=None, spillSize=SPILL_SIZE,
+                     compress=None, compressSize=COMPRESS_SIZE) -> object:
+    try:
+      if cid == "0":
+        cid = datetime.now().strftime('%S%f')
+      reader, writer = await asyncio.open_unix_connection(path)
+      return cls(cid, reader, writer, getCodec(codec), spillSize,
+                 getCompressor(compress), compressSize)
+    except (IOError, asyncio.TimeoutError):
+      errmsg = "Asyncio failed to create a connection @{}"
+      logger.error(errmsg.format(path), exc_info=True)
+      raise
+    except Exception:
+      errmsg = "Unknown error creating connection @{}"
+      logger.error(errmsg.format(path), exc_info=True)
+      raise
+
+  #----------------------------------------------------------------//
+  # openShm - open a shared memory ring connection, for same host
+  # -- peers, through the unix socket path of a shm SockServer
+  #----------------------------------------------------------------//
+  @classmethod
+  async def openShm(cls, path: str, cid="0", codec=None, spillSize=SPILL_SIZE,
+                    compress=None, compressSize=COMPRESS_SIZE, ringSize=RING_SIZE) -> object:
+    try:
+      if cid == "0":
+        cid = datetime.now().strftime('%S%f')
+      link = await ShmLink.open(path, ringSize)
+      return cls(cid, link, link, getCodec(codec), spillSize,
+                 getCompressor(compress), compressSize)
+    except (IOError, asyncio.TimeoutError):
+      errmsg = "Asyncio failed to create a shared memory connection @{}"
+      logger.error(errmsg.format(path), exc_info=True)
+      raise
+    except Exception:
+      errmsg = "Unknown error creating shared memory connection @{}"
+      logger.error(errmsg.format(path), exc_info=True)
+      raise
+
+  #----------------------------------------------------------------//
+  # buffer - queue the frames of a payload until the next flush
+  # -- a list payload is a multipart message
+  #----------------------------------------------------------------//
+  def buffer(self, payload):
+    self._pending.extend(frames(payload, self.codec, self.compressor, self.compressSize))
+
+  #----------------------------------------------------------------//
+  # flush - write every buffered frame with one writelines and one drain
+  #----------------------------------------------------------------//
+  async def flush(self):
+    if self._pending:
+      bparts, self._pending = self._pending, []
+      self._writer.writelines(bparts)
+    await self._writer.drain()
+
+  #----------------------------------------------------------------//
+  # receive - a multipart message is returned as a list of articles
+  #----------------------------------------------------------------//
+  async def _read(self) -> object:
+    flag, article = await self._readFrame()
+    if not hasMore(flag):
+      return article
+    articles = [article]
+    while hasMore(flag):
+      flag, article = await self._readFrame()
+      articles.append(article)
+    return articles
+
+  #----------------------------------------------------------------//
+  # _readFrame
+  #----------------------------------------------------------------//
+  async def _readFrame(self) -> tuple:
     header = await self._reader.readexactly(2)
 
-    hsize = 2
-    if isLarge(header[0]):
-      hsize = 5
-      header += await self._reader.readexactly(3)
+    # a frame read that is interrupted after its first bytes, by a
+    # timeout, cancellation or a reset, leaves the stream framing
+    # broken, so the connector is closed
+    spill = None
+    try:
+      hsize = 2
+      if isLarge(header[0]):
+        hsize = 5
+        header += await self._reader.readexactly(3)
+
+      fsize = int.from_bytes(header[1:hsize],'little')
+
+      if fsize > self.spillSize:
+        spill = SpillFrame(fsize)
+        async for chunk in self._iterPayload(fsize):
+          spill.write(chunk)
+      else:
+        bpacket = await self._reader.readexactly(fsize)
+    except BaseException:
+      if spill:
+        spill.close()
+      self._writer.close()
+      raise
 
-    fsize = int.from_bytes(header[1:hsize],'little')
+    if spill:
+      return header[0], spill.deserialize(header[0])
+    return header[0], decodeFrame(bpacket, header[0], self.spillSize)
 
-    bpacket = await self._reader.read(fsize)
-    return Article.deserialize(bpacket)
+  #----------------------------------------------------------------//
+  # _iterPayload - yield a frame payload in chunks of at most SPILL_CHUNK
+  #----------------------------------------------------------------//
+  async def _iterPayload(self, fsize: int):
+    remaining = fsize
+    while remaining:
+      chunk = await self._reader.read(min(remaining, SPILL_CHUNK))
+      if not chunk:
+        raise asyncio.IncompleteReadError(b"", remaining)
+      remaining -= len(chunk)
+      yield chunk
 
   #----------------------------------------------------------------//
   # _write
   #----------------------------------------------------------------//
-  async def _write(self, article):
-    bpacket = article.serialize()
-    header = parseHeader(bpacket, 0)
-    self._writer.write(header)
-    self._writer.write(bpacket)
-    await self._writer.drain()
+  async def _write(self, payload):
+    self.buffer(payload)
+    await self.flush()
+
+  #----------------------------------------------------------------//
+  # _writeBatch - coalesce several payloads into a single flush
+  # -- the whole batch is encoded before any frame is queued, so a
+  # -- payload that fails to encode leaves no part of the batch behind
+  #----------------------------------------------------------------//
+  async def _writeBatch(self, payloads: list):
+    bparts = []
+    for payload in payloads:
+      bparts.extend(frames(payload, self.codec, self.compressor, self.compressSize))
+    self._pending.extend(bparts)
+    await self.flush()
     
 #=================================================================#
-# ChannelProps
+# ChannelProps - deadline engine for one io direction of ConnWATC
+# -- the io coroutine runs in the caller's task, a timeout is a single
+# -- loop timer that cancels that task, and cancel() cancels it too,
+# -- so an operation costs no extra task, future or done callback
 #=================================================================#
 @dataclass
 class ChannelProps:
-  # future: SafeFuture = field(init=False)
-  future: Future = field(init=False)
+  task: asyncio.Task = field(init=False)
+  timer: asyncio.TimerHandle = field(init=False)
+  expired: bool = field(init=False)
+  aborted: bool = field(init=False)
   timeout: int = field(init=False) 
   retries: int = field(init=False)
   config: InitVar[dict]
 
   def __post_init__(self, config):
-    # self.future = SafeFuture(self.name)
-    self.future = None
+    self.task = None
+    self.timer = None
+    self.expired = False
+    self.aborted = False
     self.timeout = config.get("timeout", 0)
     self.retries = config.get("retries", 0)
-    
-  # -------------------------------------------------------------- #
-  # addFuture
-  # ---------------------------------------------------------------#
-  def addFuture(self, future: Future, caller, iomode: str):
-    def onComplete(fut):
-      try:
-        # self.future.discard(fut)
-        # logger.debug(f"discarding {self.name} {iomode} future")
-        self.future = None
-        fut.result()
-      except asyncio.CancelledError:
-        logger.info(f"{caller} {iomode} was cancelled")
-      except Exception as ex:
-        logger.warn(f"{caller} {iomode} errored : {ex}")
-    future.add_done_callback(onComplete)
-    self.future = future
-    # await self.future.put(future, onComplete)
 
   #-----------------------------------------------------------------#
   # cancel
   #-----------------------------------------------------------------#
   def cancel(self):
-    if self.future:
-      self.future.cancel()
+    if self.task:
+      self.aborted = True
+      self.task.cancel()
 
   # -------------------------------------------------------------- #
   # cancelled
   # ---------------------------------------------------------------#
   def cancelled(self):
-    if self.future:
-      return self.future.cancelled()
+    return self.aborted
+
+  # -------------------------------------------------------------- #
+  # disengage
+  # ---------------------------------------------------------------#
+  def disengage(self):
+    if self.timer:
+      self.timer.cancel()
+      self.timer = None
+    self.task = None
+
+  # -------------------------------------------------------------- #
+  # engage - bind the current task, arm the timer if timeout > 0
+  # ---------------------------------------------------------------#
+  def engage(self, timeout):
+    self.task = asyncio.current_task()
+    self.expired = False
+    self.aborted = False
+    if timeout > 0:
+      self.timer = asyncio.get_running_loop().call_later(timeout, self.expire)
 
   #-----------------------------------------------------------------#
   # engaged
   #-----------------------------------------------------------------#
   def engaged(self) -> bool:
-    return self.future != None
-  
+    return self.task != None
+
+  #-----------------------------------------------------------------#
+  # expire - timer callback
+  #-----------------------------------------------------------------#
+  def expire(self):
+    self.timer = None
+    if self.task:
+      self.expired = True
+      self.task.cancel()
+
+  #-----------------------------------------------------------------#
+  # pending - True if a cancel request from outside ChannelProps is
+  # still pending on the current task
+  # -- always False before python 3.11, which cannot tell them apart
+  #-----------------------------------------------------------------#
+  def pending(self) -> bool:
+    cancelling = getattr(asyncio.current_task(), "cancelling", None)
+    return bool(cancelling and cancelling())
+
+  #-----------------------------------------------------------------#
+  # resolve - map a CancelledError raised during io to its cause
+  # -- own cancellations, by the timer and by cancel, are withdrawn from
+  # -- the task, so the caller task is not left with a pending cancel
+  # -- request. if an outside cancel request remains, as when the task
+  # -- is cancelled as the deadline expires, the CancelledError stands
+  #-----------------------------------------------------------------#
+  def resolve(self, ex: asyncio.CancelledError):
+    if not (self.expired or self.aborted):
+      raise ex
+    uncancel = getattr(self.task, "uncancel", None)
+    if uncancel:
+      for _ in range(self.expired + self.aborted):
+        uncancel()
+    if self.expired and not self.pending():
+      raise asyncio.TimeoutError() from None
+    raise ex
+
   #-----------------------------------------------------------------#
   # setProps
   #-----------------------------------------------------------------#
@@ -245,13 +541,26 @@ class ConnWATC:
   wprops: ChannelProps = field(init=False)
   statusCode: int = field(init=False)
   timedoutMode: str = field(init=False)
+  deltaOut: DeltaStreams = field(init=False)
+  deltaIn: DeltaStreams = field(init=False)
   
   def __post_init__(self, config):
     self.blocked = False
+    self.deltaOut = None
+    self.deltaIn = DeltaStreams()
     self.rprops = ChannelProps(config.readProps)
     self.wprops = ChannelProps(config.writeProps)
     self.statusCode = 200
     self.timedoutMode = ""
+    if config.get("codec") is not None:
+      self.setCodec(config.codec)
+    if config.get("spillSize") is not None:
+      self.setSpillSize(config.spillSize)
+    if config.get("compress") is not None:
+      self.setCompressor(config.compress, config.get("compressSize", COMPRESS_SIZE))
+    if config.get("delta"):
+      self.setDelta(config.get("deltaKey"), config.get("deltaStreams", DELTA_STREAMS),
+                    config.get("deltaMinSize", DELTA_MIN_SIZE))
 
   @property
   def name(self):
@@ -329,7 +638,7 @@ class ConnWATC:
         try:
           payload = await self.recvWATC(timeout)
           self.statusCode = 200
-          return payload
+          return self.deltaIn.inflate(payload)
         except asyncio.TimeoutError:
           self.statusCode = 552
           if first:
@@ -341,6 +650,10 @@ class ConnWATC:
     except asyncio.CancelledError:
       logger.warn("{} read coroutine was cancelled".format(self.name))
       self.statusCode = 554
+      # -- only a cancelRecv is answered with a status, the caller task
+      # -- itself being cancelled must still unwind
+      if self.rprops.pending():
+        raise
     except asyncio.IncompleteReadError:
       logger.warn("{} connnection reset by peer while receiving".format(self.name))
       self.statusCode = 553
@@ -351,21 +664,22 @@ class ConnWATC:
 
   #----------------------------------------------------------------//
   # recvWATC -- receive with async timeout capability
-  # -- allows anytime cancelation by self.future.cancel()
+  # -- allows anytime cancelation by self.rprops.cancel()
   #----------------------------------------------------------------//
   async def recvWATC(self, timeout) -> object:
-    # timeout time unit is seconds
-    future = create_task(self.conn._read())
-    self.rprops.addFuture(future, self.name, "reading")
-    if timeout == 0:
-      # logger.debug("!!! {} is receiving without a timeout !!!".format(self.name))
-      return await future
-    return await asyncio.wait_for(future, timeout)
+    # timeout time unit is seconds, timeout == 0 means no timeout
+    self.rprops.engage(timeout)
+    try:
+      return await self.conn._read()
+    except asyncio.CancelledError as ex:
+      self.rprops.resolve(ex)
+    finally:
+      self.rprops.disengage()
 
   #-----------------------------------------------------------------#
   # send
   #-----------------------------------------------------------------#
-  async def send(self, payload: object, timeout=0):
+  async def send(self, payload: object, timeout=0, batch=False):
     if self.blocked:
       logmsg = "{} cannot send while io activity is blocked ..."
       logger.debug(logmsg.format(self.name))
@@ -379,11 +693,16 @@ class ConnWATC:
     # retries is only relevent when a timeout is applied
     retries = 0 if timeout == 0 else self.wprops.retries
     first = 1
+    deflated = self.deltaOut and not batch and isinstance(payload, Article)
+    stream = None
     try:
+      checkPayload(payload)
+      if deflated:
+        payload, stream = self.deltaOut.deflate(payload)
       self.timedoutMode = ""
       while retries > 0 or first:
         try:
-          await self.sendWATC(payload, timeout)
+          await self.sendWATC(payload, timeout, batch)
           self.statusCode = 200
           return
         except asyncio.TimeoutError:
@@ -397,26 +716,79 @@ class ConnWATC:
     except asyncio.CancelledError:
       logger.warn("{} send coroutine was cancelled".format(self.name))
       self.statusCode = 554
+      if self.wprops.pending():
+        if deflated:
+          self.deltaOut.reset(stream)
+        raise
     except ConnectionResetError:
       logger.warn("{} connnection reset by peer while sending".format(self.name))
       self.statusCode = 553
     except Exception as ex:
       logger.info("{} asyncio StreamWriter error".format(self.name), exc_info=True)
       self.statusCode = 555
+    if deflated:
+      # the peer may not have the article, so resend the stream in full
+      self.deltaOut.reset(stream)
+
+  #-----------------------------------------------------------------#
+  # sendBatch - send several payloads with one coalesced write
+  # -- each list payload in the batch is sent as a multipart message
+  #-----------------------------------------------------------------#
+  async def sendBatch(self, payloads: list, timeout=0):
+    await self.send(payloads, timeout, batch=True)
 
   #----------------------------------------------------------------//
   # sendWATC -- send with async timeout capability
-  # -- allows anytime cancelation by self.future.cancel()
+  # -- allows anytime cancelation by self.wprops.cancel()
   #----------------------------------------------------------------//
-  async def sendWATC(self, payload, timeout):
-    # timeout time unit is seconds
-    future = create_task(self.conn._write(payload))
-    self.wprops.addFuture(future, self.name, "writing")
-    if timeout == 0:
-      # logger.debug("!!! {} is sending without a timeout !!!".format(self.name))
-      return await future
-    await asyncio.wait_for(future, timeout)
+  async def sendWATC(self, payload, timeout, batch=False):
+    # timeout time unit is seconds, timeout == 0 means no timeout
+    self.wprops.engage(timeout)
+    try:
+      if batch:
+        await self.conn._writeBatch(payload)
+      else:
+        await self.conn._write(payload)
+    except asyncio.CancelledError as ex:
+      self.wprops.resolve(ex)
+    finally:
+      self.wprops.disengage()
   
+  #-----------------------------------------------------------------#
+  # setCodec - select the article codec of a framed connector
+  # -- QuConnector passes articles by reference and has no codec
+  #-----------------------------------------------------------------#
+  def setCodec(self, codec):
+    if hasattr(self.conn, "codec"):
+      self.conn.codec = getCodec(codec)
+
+  #-----------------------------------------------------------------#
+  # setDelta - send only the changed keys of each article, relative to
+  # the last article of its logical stream, see DeltaStreams
+  # -- the receiving ConnWATC always reconstructs delta articles
+  # -- QuConnector passes articles by reference and is never deflated
+  # -- fewer bytes, at a higher CPU cost per article than a full send,
+  # -- and articles below minSize encoded bytes are always sent in full
+  #-----------------------------------------------------------------#
+  def setDelta(self, deltaKey=None, maxStreams=DELTA_STREAMS, minSize=DELTA_MIN_SIZE):
+    if hasattr(self.conn, "codec"):
+      self.deltaOut = DeltaStreams(deltaKey, maxStreams, minSize)
+
+  #-----------------------------------------------------------------#
+  # setCompressor - select the frame compressor of a framed connector
+  #-----------------------------------------------------------------#
+  def setCompressor(self, compress, compressSize=COMPRESS_SIZE):
+    if hasattr(self.conn, "compressor"):
+      self.conn.compressor = getCompressor(compress)
+      self.conn.compressSize = compressSize
+
+  #-----------------------------------------------------------------#
+  # setSpillSize - LARGE frame size above which receive spills to disk
+  #-----------------------------------------------------------------#
+  def setSpillSize(self, spillSize: int):
+    if hasattr(self.conn, "spillSize"):
+      self.conn.spillSize = spillSize
+
   #-----------------------------------------------------------------#
   # setId
   #-----------------------------------------------------------------#
@@ -432,6 +804,69 @@ class ConnWATC:
     if config.hasAttr("writeProps"):
       self.wprops.setProps(config.writeProps)
   
+#================================================================#
+# SpillFrame - receives a LARGE frame payload into a temp file, then
+# the codec decodes it from the file, see Codec.load, so the encoded
+# payload is never held in process memory
+# -- a compressed payload is inflated chunkwise into a second temp file
+#===============================================================-#
+class SpillFrame:
+
+  def __init__(self, fsize: int, limit=INFLATE_LIMIT):
+    self.file = tempfile.TemporaryFile()
+    self.remaining = fsize
+    self.limit = limit
+
+  #----------------------------------------------------------------//
+  # close
+  #----------------------------------------------------------------//
+  def close(self):
+    self.file.close()
+
+  #----------------------------------------------------------------//
+  # deserialize - the codec decodes straight from the spill file, an
+  # empty inflated payload is decoded from an empty buffer
+  #----------------------------------------------------------------//
+  def deserialize(self, flag) -> Article:
+    try:
+      self.file.flush()
+      compressor = compressorOf(flag)
+      if compressor:
+        self.inflate(compressor)
+      codec = getCodec(codecOf(flag))
+      if not os.fstat(self.file.fileno()).st_size:
+        return Article.deserialize(b"", codec)
+      return Article.deducce(codec.load(self.file))
+    finally:
+      self.close()
+
+  #----------------------------------------------------------------//
+  # inflate - inflate into a second temp file, SPILL_CHUNK at a time
+  #----------------------------------------------------------------//
+  def inflate(self, compressor: Compressor):
+    inflated = tempfile.TemporaryFile()
+    try:
+      self.file.seek(0)
+      chunks = iter(lambda: self.file.read(SPILL_CHUNK), b"")
+      for bdata in compressor.inflate(chunks, self.limit, SPILL_CHUNK):
+        inflated.write(bdata)
+      inflated.flush()
+    except BaseException:
+      inflated.close()
+      raise
+    self.file.close()
+    self.file = inflated
+
+  #----------------------------------------------------------------//
+  # write - returns the number of payload bytes consumed from data
+  #----------------------------------------------------------------//
+  def write(self, data) -> int:
+    size = min(len(data), self.remaining)
+    with memoryview(data) as view:
+      self.file.write(view[:size])
+    self.remaining -= size
+    return size
+
 #================================================================#
 # Bitmasks
 #===============================================================-#
@@ -441,15 +876,111 @@ SNDMORE = 0x2
 def isLarge(flag: bytes):
   return flag & LARGE == LARGE
 
-def hasMore(cls, flag: bytes):
+def hasMore(flag: bytes):
   return flag & SNDMORE == SNDMORE
 
+def codecOf(flag: bytes) -> int:
+  return (flag & CODEC_MASK) >> CODEC_SHIFT
+
+def codecFlag(codec: Codec) -> int:
+  return codec.id << CODEC_SHIFT
+
+def compressorOf(flag: bytes) -> Compressor:
+  return getCompressor((flag & COMPRESS_MASK) >> COMPRESS_SHIFT)
+
+def compressFlag(compressor: Compressor) -> int:
+  return compressor.id << COMPRESS_SHIFT
+
+#----------------------------------------------------------------//
+#  decodeFrame - inflate and deserialize one frame payload
+#  -- a compressed payload is inflated in memory up to limit bytes,
+#  -- the spill size, beyond that it is inflated into a SpillFrame, as
+#  -- it would have been spilled had it been sent uncompressed
+#----------------------------------------------------------------//
+def decodeFrame(frame, flag, limit=SPILL_SIZE) -> Article:
+  compressor = compressorOf(flag)
+  if compressor:
+    frame = inflateFrame(frame, compressor, limit)
+    if isinstance(frame, SpillFrame):
+      return frame.deserialize(flag & ~COMPRESS_MASK)
+  return Article.deserialize(frame, codecOf(flag))
+
+#----------------------------------------------------------------//
+#  inflateFrame - the inflated payload, or a SpillFrame holding it
+#  -- at most twice limit inflated bytes are held in memory, and the
+#  -- whole payload is bounded by INFLATE_LIMIT
+#----------------------------------------------------------------//
+def inflateFrame(frame, compressor: Compressor, limit: int) -> object:
+  pieces = []
+  total = 0
+  inflated = compressor.inflate((frame,), INFLATE_LIMIT, limit + 1)
+  for bdata in inflated:
+    pieces.append(bdata)
+    total += len(bdata)
+    if total > limit:
+      spill = SpillFrame(0)
+      try:
+        for bdata in itertools.chain(pieces, inflated):
+          spill.file.write(bdata)
+      except BaseException:
+        spill.close()
+        raise
+      return spill
+  return pieces[0] if len(pieces) == 1 else b"".join(pieces)
+
+#----------------------------------------------------------------//
+#  encodeFrame - encode one article to its framed buffers
+#  -- the payload is compressed when it reaches compressSize bytes
+#  -- and compression actually makes it smaller
+#----------------------------------------------------------------//
+def encodeFrame(article, codec: Codec, flag, compressor=None, compressSize=COMPRESS_SIZE) -> list:
+  bparts = article.encode(codec)
+  if compressor:
+    fsize = 0
+    for bpart in bparts:
+      fsize += len(bpart)
+    if fsize >= compressSize:
+      bdata = compressor.compress(bparts)
+      if len(bdata) < fsize:
+        return framed([bdata], flag | compressFlag(compressor))
+  return framed(bparts, flag)
+
+#----------------------------------------------------------------//
+#  framed - prefix the encoded buffers of one frame with its header
+#----------------------------------------------------------------//
+def framed(bparts: list, flag) -> list:
+  fsize = 0
+  for bpart in bparts:
+    fsize += len(bpart)
+  return [frameHeader(fsize, flag), *bparts]
+
+#----------------------------------------------------------------//
+#  frames - the framed buffers of a payload, where a list payload is a
+#  multipart message and every frame except the last is flagged SNDMORE
+#----------------------------------------------------------------//
+def frames(payload, codec: Codec, compressor=None, compressSize=COMPRESS_SIZE) -> list:
+  flag = codecFlag(codec)
+  if not isinstance(payload, list):
+    return encodeFrame(payload, codec, flag, compressor, compressSize)
+  if not payload:
+    raise ValueError("A multipart message requires at least one article")
+  bparts = []
+  for article in payload[:-1]:
+    bparts.extend(encodeFrame(article, codec, flag | SNDMORE, compressor, compressSize))
+  bparts.extend(encodeFrame(payload[-1], codec, flag, compressor, compressSize))
+  return bparts
+
 #----------------------------------------------------------------//
 #  parseHeader
 #----------------------------------------------------------------//
 def parseHeader(frame, flag):
+  return frameHeader(len(frame), flag)
+
+#----------------------------------------------------------------//
+#  frameHeader
+#----------------------------------------------------------------//
+def frameHeader(fsize: int, flag):
   #  Long flag
-  fsize = len(frame)
   large = fsize > 255
   # logger.debug("header encoding - frame size : {}".format(fsize))
   if large:
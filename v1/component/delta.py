@@ -0,0 +1,175 @@
+import logging
+import marshal
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from .component import Article, Note, UNSET_KEY
+
+logger = logging.getLogger('scraperski')
+
+# the raw packet key that marks a delta stream article, NUL prefixed
+# as BATCH_KEY, see checkPayload
+DELTA_KEY = "\x00delta"
+DELTA_STREAMS = 256
+# the encoded size, in bytes, below which an article is sent in full,
+# as a delta of a small article saves less than it costs
+DELTA_MIN_SIZE = 256
+# the modes of a marked article : a full article that is the new base
+# of its stream, a delta of the base, or a full article of a stream
+# that has no base
+BASE, DELTA, PLAIN = 0, 1, 2
+
+#================================================================#
+# DeltaStreams - ConnWATC delta mode state of one connection end
+# -- the sender sends only the keys that changed relative to the
+# -- last article of the same logical stream, the receiver patches
+# -- its copy of that article back to the full article
+# -- a logical stream is the value of the deltaKey article attribute,
+# -- or the whole connection when deltaKey is None
+# -- every sent article is marked with [stream, mode, dropped], so
+# -- the receiver state is driven by the sender alone : the sender
+# -- evicts the least recently used stream beyond maxStreams, or a
+# -- stream whose send failed, and tells the receiver to drop it
+# -- a delta is sent only when its encoded size, see sizeOf, is below
+# -- that of the full article. an article below minSize is sent in
+# -- full, and its stream keeps no base, unmarked while the sender has
+# -- no stream drops to pass on
+# -- delta mode trades CPU for bytes : the diff and base snapshots are
+# -- pure Python and cost more than a full binary encode of a small
+# -- article, so it suits bandwidth bound links, see benchmark.delta
+#===============================================================-#
+@dataclass
+class DeltaStreams:
+  deltaKey: str = None
+  maxStreams: int = DELTA_STREAMS
+  minSize: int = DELTA_MIN_SIZE
+  bases: OrderedDict = field(init=False, default_factory=OrderedDict)
+  dropped: list = field(init=False, default_factory=list)
+
+  #----------------------------------------------------------------//
+  # deflate - the article to send in place of a full article
+  #----------------------------------------------------------------//
+  def deflate(self, article: Article) -> tuple:
+    stream = self.streamOf(article)
+    packet = article.rawPacket()
+    size = sizeOf(packet)
+    base = self.bases.pop(stream, None)
+    if base is None and size < self.minSize and not self.dropped:
+      return article, stream
+    if base is not None and size >= self.minSize:
+      # an unchanged article is found by a C level compare, not a diff
+      delta = {} if packet == base else article.diff(base)
+      if sizeOf(delta) < size:
+        patchPacket(base, snapshot(delta))
+        return self._marked(Article(delta, False), stream, DELTA, base), stream
+    if size < self.minSize:
+      # the receiver drops the base of a PLAIN stream
+      return self._marked(Article(packet, False), stream, PLAIN), stream
+    packet = snapshot(packet)
+    return self._marked(Article(packet, False), stream, BASE, packet), stream
+
+  #----------------------------------------------------------------//
+  # inflate - the full article of a received article
+  # -- an unmarked article is passed through
+  #----------------------------------------------------------------//
+  def inflate(self, article) -> object:
+    if not isinstance(article, Article) or DELTA_KEY not in article.__dict__:
+      return article
+    stream, mode, dropped = article.pop(DELTA_KEY)
+    for key in dropped:
+      self.bases.pop(key, None)
+    if mode == PLAIN:
+      self.bases.pop(stream, None)
+      return article
+    if mode == BASE:
+      self.bases[stream] = snapshot(article.rawPacket())
+      return article
+    base = self.bases.get(stream)
+    if base is None:
+      raise ValueError(f"Delta article of stream {stream} has no base article")
+    # the decoded delta values are new, so the base takes them as they are
+    patchPacket(base, article.rawPacket())
+    return Article(snapshot(base))
+
+  #----------------------------------------------------------------//
+  # reset - forget a stream whose last article may not have arrived
+  #----------------------------------------------------------------//
+  def reset(self, stream):
+    if self.bases.pop(stream, None) is not None:
+      self.dropped.append(stream)
+
+  #----------------------------------------------------------------//
+  # streamOf
+  #----------------------------------------------------------------//
+  def streamOf(self, article: Article) -> object:
+    if self.deltaKey:
+      return article.get(self.deltaKey)
+    return None
+
+  #----------------------------------------------------------------//
+  # _marked - mark an outbound article, and keep the base of its stream
+  #----------------------------------------------------------------//
+  def _marked(self, outbound: Article, stream, mode, base=None) -> Article:
+    if base is not None:
+      self.bases[stream] = base
+    while len(self.bases) > self.maxStreams:
+      self.dropped.append(self.bases.popitem(last=False)[0])
+    outbound[DELTA_KEY] = [stream, mode, self.dropped]
+    self.dropped = []
+    return outbound
+
+#-----------------------------------------------------------------#
+# patchPacket - apply a Note.diff delta to a raw packet in place
+#-----------------------------------------------------------------#
+def patchPacket(packet: dict, delta: dict):
+  for key in delta.get(UNSET_KEY, ()):
+    packet.pop(key, None)
+  for key, value in delta.items():
+    if key != UNSET_KEY:
+      packet[key] = value
+
+#-----------------------------------------------------------------#
+# snapshot - copy the containers of a raw packet, so a base is never
+# changed by a caller that mutates a sent or received article
+#-----------------------------------------------------------------#
+def snapshot(value) -> object:
+  if isinstance(value, dict):
+    return {key: snapshot(item) if isinstance(item, (dict, list)) else item for key, item in value.items()}
+  if isinstance(value, list):
+    return [snapshot(item) if isinstance(item, (dict, list)) else item for item in value]
+  return value
+
+#-----------------------------------------------------------------#
+# sizeOf - the encoded size of a packet value, in bytes, as marshal
+# encodes it, which is close enough to compare a delta with its full
+# article whatever the codec, and is C level fast
+# -- a value marshal cannot encode is estimated in Python
+#-----------------------------------------------------------------#
+def sizeOf(value) -> int:
+  try:
+    return len(marshal.dumps(value))
+  except ValueError:
+    return estimateOf(value)
+
+#-----------------------------------------------------------------#
+# estimateOf - the estimated encoded size of a packet value
+#-----------------------------------------------------------------#
+def estimateOf(value) -> int:
+  if isinstance(value, (str, bytes, bytearray)):
+    return len(value) + 5
+  if isinstance(value, dict):
+    return sum(estimateOf(key) + estimateOf(item) for key, item in value.items()) + 2
+  if isinstance(value, (list, tuple)):
+    return sum(estimateOf(item) for item in value) + 5
+  return 9
+
+#-----------------------------------------------------------------#
+# checkPayload - reject an article to send that holds DELTA_KEY, which
+# the receiver would take for the mark of a delta stream article
+# -- a list payload is checked item by item
+#-----------------------------------------------------------------#
+def checkPayload(payload):
+  for article in payload if isinstance(payload, list) else (payload,):
+    if isinstance(article, Note) and DELTA_KEY in article.__dict__:
+      raise ValueError(f"{DELTA_KEY!r} is a reserved key, it cannot be sent")
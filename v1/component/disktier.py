@@ -0,0 +1,291 @@
+import asyncio
+import json
+import logging
+import pickle
+import sqlite3
+import time
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+logger = logging.getLogger('scraperski')
+
+#================================================================#
+# DiskTier - persistent second tier of a MemCache, see MemCache.disk
+# -- entries are pickled into a sqlite table in WAL mode, so the tier
+# -- survives process restarts
+# -- rows are keyed by keyOf, a canonical text form of the key, so keys
+# -- that are equal in python, 1, 1.0 and True, share one row. The
+# -- pickled key is stored beside it, to rebuild the index on open
+# -- the key index, with the size and expiry of every entry, is held
+# -- in memory in least recently stored order, so membership tests,
+# -- expiry and eviction never read the table
+# -- every sqlite call runs on one worker thread, in the order it was
+# -- made : writes are queued and return at once, a failed write is
+# -- logged, take waits for its row and takeAsync awaits it, so the
+# -- event loop is never blocked on disk. close waits for the queue
+# -- expires is wall clock time, 0 means no expiry
+# -- maxBytes bounds the pickled bytes of the tier, 0 means no bound,
+# -- and the least recently stored entries are evicted beyond it
+#===============================================================-#
+@dataclass
+class DiskTier:
+  path: str
+  maxBytes: int = 0
+  _db: sqlite3.Connection = field(init=False, default=None)
+  _executor: ThreadPoolExecutor = field(init=False, default=None)
+  _index: OrderedDict = field(init=False, default_factory=OrderedDict)
+  _bytes: int = field(init=False, default=0)
+  evictions: int = field(init=False, default=0)
+
+  def __post_init__(self):
+    self._executor = ThreadPoolExecutor(1, thread_name_prefix="DiskTier")
+    for key, nbytes, expires in self._executor.submit(self._open).result():
+      self._index[key] = (nbytes, expires)
+      self._bytes += nbytes
+    self.purge()
+    logger.debug(f"DiskTier {self.path} opened with {len(self._index)} entries")
+
+  def __contains__(self, key) -> bool:
+    meta = self._index.get(key)
+    return meta is not None and not (meta[1] and meta[1] <= time.time())
+
+  def __len__(self) -> int:
+    return len(self._index)
+
+  #----------------------------------------------------------------//
+  # clear
+  #----------------------------------------------------------------//
+  def clear(self):
+    self._index.clear()
+    self._bytes = 0
+    self._write(self._execute, "DELETE FROM items", ())
+
+  #----------------------------------------------------------------//
+  # close - wait for every queued write, then close the database
+  #----------------------------------------------------------------//
+  def close(self):
+    if self._executor:
+      self._executor.submit(self._close)
+      self._executor.shutdown(wait=True)
+      self._executor = None
+
+  #----------------------------------------------------------------//
+  # delete
+  #----------------------------------------------------------------//
+  def delete(self, key):
+    meta = self._index.pop(key, None)
+    if meta is not None:
+      self._bytes -= meta[0]
+      self._write(self._execute, "DELETE FROM items WHERE key = ?", (keyOf(key),))
+
+  #----------------------------------------------------------------//
+  # purge - drop every expired entry
+  #----------------------------------------------------------------//
+  def purge(self) -> int:
+    now = time.time()
+    expired = [key for key, (_, expires) in self._index.items() if expires and expires <= now]
+    self._deleteMany(expired)
+    return len(expired)
+
+  #----------------------------------------------------------------//
+  # put - store an entry, replacing any entry of key
+  #----------------------------------------------------------------//
+  def put(self, key, item, expires=0):
+    self.putMany([(key, item, expires)])
+
+  #----------------------------------------------------------------//
+  # putMany - store (key, item, expires) entries in one transaction
+  # -- an entry whose key or item cannot be stored is skipped
+  #----------------------------------------------------------------//
+  def putMany(self, entries: list):
+    rows = []
+    for key, item, expires in entries:
+      try:
+        row = (keyOf(key), dumps(key), dumps(item), expires)
+      except Exception as ex:
+        logger.debug(f"DiskTier cannot store the item of {key} : {ex}")
+        continue
+      meta = self._index.pop(key, None)
+      if meta is not None:
+        self._bytes -= meta[0]
+      self._index[key] = (len(row[2]), expires)
+      self._bytes += len(row[2])
+      rows.append(row)
+    if rows:
+      self._write(self._executeMany, "INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?)", rows)
+    self._evict()
+
+  #----------------------------------------------------------------//
+  # stats
+  #----------------------------------------------------------------//
+  def stats(self) -> dict:
+    return {
+      "entries": len(self._index),
+      "bytes": self._bytes,
+      "maxBytes": self.maxBytes,
+      "evictions": self.evictions}
+
+  #----------------------------------------------------------------//
+  # take - remove and return the live (item, expires) of key, else None
+  # -- blocks until the worker has read the row, see takeAsync
+  #----------------------------------------------------------------//
+  def take(self, key) -> tuple:
+    claim = self._claim(key)
+    if claim is None:
+      return None
+    return self._taken(self._executor.submit(self._takeRow, claim[0]).result(), claim[1])
+
+  #----------------------------------------------------------------//
+  # takeAsync - take, awaiting the worker instead of blocking
+  #----------------------------------------------------------------//
+  async def takeAsync(self, key) -> tuple:
+    claim = self._claim(key)
+    if claim is None:
+      return None
+    item = await asyncio.wrap_future(self._executor.submit(self._takeRow, claim[0]))
+    return self._taken(item, claim[1])
+
+  #----------------------------------------------------------------//
+  # _claim - drop the live index entry of key, and return its row key
+  # and expiry, else None
+  #----------------------------------------------------------------//
+  def _claim(self, key) -> tuple:
+    meta = self._index.get(key)
+    if meta is None:
+      return None
+    if meta[1] and meta[1] <= time.time():
+      self.delete(key)
+      return None
+    self._bytes -= self._index.pop(key)[0]
+    return keyOf(key), meta[1]
+
+  #----------------------------------------------------------------//
+  # _close - on the worker
+  #----------------------------------------------------------------//
+  def _close(self):
+    self._db.close()
+    self._db = None
+
+  #----------------------------------------------------------------//
+  # _deleteMany
+  #----------------------------------------------------------------//
+  def _deleteMany(self, keys: list):
+    if not keys:
+      return
+    for key in keys:
+      self._bytes -= self._index.pop(key)[0]
+    self._write(self._executeMany, "DELETE FROM items WHERE key = ?", [(keyOf(key),) for key in keys])
+
+  #----------------------------------------------------------------//
+  # _evict - drop least recently stored entries beyond maxBytes
+  #----------------------------------------------------------------//
+  def _evict(self):
+    if not self.maxBytes or self._bytes <= self.maxBytes:
+      return
+    evicted = []
+    excess = self._bytes - self.maxBytes
+    for key, (nbytes, _) in self._index.items():
+      if excess <= 0:
+        break
+      evicted.append(key)
+      excess -= nbytes
+    self.evictions += len(evicted)
+    self._deleteMany(evicted)
+
+  #----------------------------------------------------------------//
+  # _execute - on the worker
+  #----------------------------------------------------------------//
+  def _execute(self, sql: str, params: tuple):
+    self._db.execute(sql, params)
+
+  #----------------------------------------------------------------//
+  # _executeMany - on the worker, in one transaction, as the
+  # connection autocommits
+  #----------------------------------------------------------------//
+  def _executeMany(self, sql: str, rows: list):
+    self._db.execute("BEGIN")
+    try:
+      self._db.executemany(sql, rows)
+    except Exception:
+      self._db.execute("ROLLBACK")
+      raise
+    self._db.execute("COMMIT")
+
+  #----------------------------------------------------------------//
+  # _open - on the worker, open the database and return its index rows
+  # -- a table from before keys were normalised is dropped, it is a cache
+  #----------------------------------------------------------------//
+  def _open(self) -> list:
+    self._db = sqlite3.connect(self.path, isolation_level=None)
+    self._db.execute("PRAGMA journal_mode=WAL")
+    self._db.execute("PRAGMA synchronous=NORMAL")
+    self._db.execute("DROP TABLE IF EXISTS entries")
+    self._db.execute("CREATE TABLE IF NOT EXISTS items "
+                     "(key TEXT PRIMARY KEY, pkey BLOB NOT NULL, value BLOB NOT NULL, expires REAL NOT NULL)")
+    rows = []
+    for bkey, nbytes, expires in self._db.execute(
+        "SELECT pkey, length(value), expires FROM items ORDER BY rowid"):
+      rows.append((pickle.loads(bkey), nbytes, expires))
+    return rows
+
+  #----------------------------------------------------------------//
+  # _takeRow - on the worker, delete the row of key and return its item
+  #----------------------------------------------------------------//
+  def _takeRow(self, skey: str) -> object:
+    if sqlite3.sqlite_version_info >= (3, 35):
+      row = self._db.execute("DELETE FROM items WHERE key = ? RETURNING value", (skey,)).fetchone()
+    else:
+      row = self._db.execute("SELECT value FROM items WHERE key = ?", (skey,)).fetchone()
+      self._db.execute("DELETE FROM items WHERE key = ?", (skey,))
+    if row is None:
+      return _missing
+    return pickle.loads(row[0])
+
+  #----------------------------------------------------------------//
+  # _taken
+  #----------------------------------------------------------------//
+  def _taken(self, item, expires) -> tuple:
+    if item is _missing:
+      return None
+    return item, expires
+
+  #----------------------------------------------------------------//
+  # _write - queue a write on the worker, a failure is only logged
+  #----------------------------------------------------------------//
+  def _write(self, fn, *args):
+    self._executor.submit(fn, *args).add_done_callback(self._written)
+
+  def _written(self, future):
+    if future.exception() is not None:
+      logger.warning(f"DiskTier {self.path} write failed : {future.exception()!r}")
+
+_missing = object()
+
+#-----------------------------------------------------------------#
+# dumps
+#-----------------------------------------------------------------#
+def dumps(value) -> bytes:
+  return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+#-----------------------------------------------------------------#
+# keyOf - the canonical row key of a cache key, equal keys share one
+# -- str, bytes, None, numbers and tuples of them are supported
+#-----------------------------------------------------------------#
+def keyOf(key) -> str:
+  if isinstance(key, str):
+    return "s" + key
+  if isinstance(key, (bool, int)):
+    return f"i{int(key)}"
+  if isinstance(key, float):
+    if key.is_integer():
+      return f"i{int(key)}"
+    return f"f{key!r}"
+  if isinstance(key, bytes):
+    return "b" + key.hex()
+  if key is None:
+    return "n"
+  if isinstance(key, tuple):
+    return "t" + json.dumps([keyOf(part) for part in key])
+  raise TypeError(f"DiskTier cannot key {type(key).__name__} values")
@@ -0,0 +1,201 @@
+import asyncio
+import logging
+
+from asyncio import Queue
+from dataclasses import dataclass, field
+
+from .component import Article
+from .connector import AbcConnector, ChannelProps, create_task
+
+logger = logging.getLogger('scraperski')
+
+#================================================================#
+# Multiplexer - pipelined request / response over one connector
+# -- every request article is tagged with a correlation id under
+# -- corrKey, a reply echoes it under replyKey, and a single reader
+# -- task routes each reply to the future of its request, so many
+# -- requests can be in flight at once
+# -- all other articles, ie peer requests or pushes, are queued for
+# -- receive
+# -- request and reply send a tagged copy, the caller's article is
+# -- left unchanged
+#===============================================================-#
+@dataclass
+class Multiplexer:
+  conn: AbcConnector
+  corrKey: str = "corrId"
+  replyKey: str = "replyTo"
+  _inbox: Queue = field(init=False, default_factory=Queue)
+  _pending: dict = field(init=False, default_factory=dict)
+  _reader: asyncio.Task = field(init=False, default=None)
+  _nextId: int = field(init=False, default=0)
+  _exc: BaseException = field(init=False, default=None)
+
+  @property
+  def name(self):
+    return "Multiplexer-" + self.conn.id
+
+  #----------------------------------------------------------------//
+  # close
+  #----------------------------------------------------------------//
+  # -- pending requests and receivers fail with ConnectionResetError
+  #----------------------------------------------------------------//
+  async def close(self):
+    if self._reader:
+      self._reader.cancel()
+      self._reader = None
+    if not self._exc:
+      self._fail(ConnectionResetError(f"{self.name} is closed"))
+    await self.conn.close()
+
+  #----------------------------------------------------------------//
+  # inFlight
+  #----------------------------------------------------------------//
+  @property
+  def inFlight(self) -> int:
+    return len(self._pending)
+
+  #----------------------------------------------------------------//
+  # open - start the reader task of a connected connector
+  #----------------------------------------------------------------//
+  @classmethod
+  def open(cls, conn: AbcConnector, corrKey="corrId", replyKey="replyTo") -> object:
+    mux = cls(conn, corrKey, replyKey)
+    mux._reader = create_task(mux._readLoop())
+    return mux
+
+  #----------------------------------------------------------------//
+  # receive - next article that is not a response to a request
+  #----------------------------------------------------------------//
+  async def receive(self) -> object:
+    payload = await self._inbox.get()
+    if isinstance(payload, BaseException):
+      # keep the reader error queued for any other receiver
+      self._inbox.put_nowait(payload)
+      raise payload
+    return payload
+
+  #----------------------------------------------------------------//
+  # reply - send a response correlated to a received request
+  #----------------------------------------------------------------//
+  async def reply(self, request: Article, response: Article):
+    await self.conn._write(self._tagged(response, self.replyKey, self.keyOf(request, self.corrKey)))
+
+  #----------------------------------------------------------------//
+  # request - send an article and wait for its response
+  # -- timeout time unit is seconds, timeout == 0 means no timeout
+  # -- the timeout covers the write too, so a request blocked in drain
+  # -- by a peer that does not read also times out
+  #----------------------------------------------------------------//
+  async def request(self, payload, timeout=0) -> object:
+    if self._exc:
+      raise self._exc
+    self._nextId += 1
+    corrId = self._nextId
+    payload = self._tagged(payload, self.corrKey, corrId)
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    self._pending[corrId] = future
+    timer = None
+    try:
+      if timeout > 0:
+        deadline = loop.time() + timeout
+        await self._writeWithin(payload, timeout)
+        timer = loop.call_at(deadline, self._expire, corrId)
+      else:
+        await self.conn._write(payload)
+      return await future
+    finally:
+      self._pending.pop(corrId, None)
+      if timer:
+        timer.cancel()
+
+  #----------------------------------------------------------------//
+  # keyOf - a correlation attribute of an article or multipart group
+  #----------------------------------------------------------------//
+  def keyOf(self, payload, key: str) -> object:
+    if isinstance(payload, list):
+      payload = payload[0] if payload else None
+    if isinstance(payload, Article):
+      return payload.get(key)
+    return None
+
+  #----------------------------------------------------------------//
+  # _expire - request timer callback
+  #----------------------------------------------------------------//
+  def _expire(self, corrId):
+    future = self._pending.pop(corrId, None)
+    if future and not future.done():
+      future.set_exception(asyncio.TimeoutError())
+
+  #----------------------------------------------------------------//
+  # _fail - fail every pending request and every receiver from now on
+  #----------------------------------------------------------------//
+  def _fail(self, exc):
+    self._exc = exc
+    self._failPending(exc)
+    self._inbox.put_nowait(exc)
+
+  #----------------------------------------------------------------//
+  # _failPending
+  #----------------------------------------------------------------//
+  def _failPending(self, exc):
+    pending, self._pending = self._pending, {}
+    for future in pending.values():
+      if not future.done():
+        future.set_exception(exc)
+
+  #----------------------------------------------------------------//
+  # _tagged - a shallow copy of an article, or of the first article of
+  # a multipart group, with the correlation attribute set
+  #----------------------------------------------------------------//
+  def _tagged(self, payload, key: str, value) -> object:
+    article = payload[0] if isinstance(payload, list) and payload else payload
+    if not isinstance(article, Article):
+      raise TypeError(f"{self.name} can only correlate Article requests")
+    tagged = Article(article.rawPacket(), False)
+    tagged[key] = value
+    if isinstance(payload, list):
+      return [tagged, *payload[1:]]
+    return tagged
+
+  #----------------------------------------------------------------//
+  # _writeWithin - write a request, and raise TimeoutError if the write
+  # is still blocked after timeout seconds
+  # -- a write only blocks once its frames are queued, in the transport
+  # -- or ring buffer, or before its item is put on a full queue, so a
+  # -- cancelled write leaves the stream intact, and a late reply is
+  # -- dropped by the reader
+  #----------------------------------------------------------------//
+  async def _writeWithin(self, payload, timeout):
+    props = ChannelProps({})
+    props.engage(timeout)
+    try:
+      await self.conn._write(payload)
+    except asyncio.CancelledError as ex:
+      props.resolve(ex)
+    finally:
+      props.disengage()
+
+  #----------------------------------------------------------------//
+  # _readLoop - route every incoming article to its waiting request
+  #----------------------------------------------------------------//
+  async def _readLoop(self):
+    try:
+      while True:
+        payload = await self.conn._read()
+        replyId = self.keyOf(payload, self.replyKey)
+        if replyId is None:
+          self._inbox.put_nowait(payload)
+          continue
+        future = self._pending.pop(replyId, None)
+        if future is None:
+          # the request has timed out or was cancelled
+          logger.debug(f"{self.name} dropped a late reply to request {replyId}")
+        elif not future.done():
+          future.set_result(payload)
+    except asyncio.CancelledError:
+      raise
+    except Exception as ex:
+      logger.warning(f"{self.name} reader errored : {ex}")
+      self._fail(ex)
@@ -0,0 +1,361 @@
+import asyncio
+import logging
+
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from .codec import Codec, defaultCodec, getCodec
+from .component import Article
+from .compress import Compressor, COMPRESS_SIZE, getCompressor
+from .connector import decodeFrame, frames, hasMore, isLarge, SPILL_SIZE, SpillFrame
+
+logger = logging.getLogger('scraperski')
+
+# the received bytes that FrameProtocol holds before it pauses reading
+READ_LIMIT = 0x100000
+
+#================================================================#
+# FrameError - a frame that failed to decode, queued in order with
+# the decoded frames so that readFrame raises it to the reader
+#===============================================================-#
+class FrameError:
+  __slots__ = ("exc",)
+
+  def __init__(self, exc: Exception):
+    self.exc = exc
+
+#================================================================#
+# FrameProtocol - asyncio.Protocol that parses parseHeader framing
+# -- every data_received call appends to one growing receive buffer,
+# -- then all complete frames are deserialized in place through a
+# -- memoryview, so there are no per-frame coroutine round trips
+# -- a LARGE frame above spillSize bypasses the receive buffer and is
+# -- written straight to a SpillFrame as its data arrives
+# -- reading is paused while more than readLimit bytes of complete
+# -- frames are unread, and resumed when readFrame takes them below
+# -- half of it, an incomplete frame never pauses reading
+# -- a frame that fails to decode is raised by readFrame, the stream
+# -- framing is intact so the following frames are still delivered
+#===============================================================-#
+class FrameProtocol(asyncio.Protocol):
+
+  def __init__(self, spillSize=SPILL_SIZE, readLimit=READ_LIMIT):
+    self.spillSize = spillSize
+    self.readLimit = readLimit
+    self._spill = None
+    self._spillFlag = 0
+    self._buffer = bytearray()
+    self._frames = deque()
+    self._parts = []
+    self._partSize = 0
+    self._queued = 0
+    self._readPaused = False
+    self._waiter = None
+    self._drainWaiters = deque()
+    self._paused = False
+    self._exc = None
+    self._eof = False
+    self.transport = None
+
+  #----------------------------------------------------------------//
+  # connection_made
+  #----------------------------------------------------------------//
+  def connection_made(self, transport):
+    self.transport = transport
+
+  #----------------------------------------------------------------//
+  # connection_lost
+  #----------------------------------------------------------------//
+  def connection_lost(self, exc):
+    self._eof = True
+    self._exc = exc
+    if self._spill:
+      self._spill.close()
+      self._spill = None
+    self._wakeup()
+    for waiter in self._drainWaiters:
+      if not waiter.done():
+        waiter.set_exception(exc or ConnectionResetError("Connection lost"))
+
+  #----------------------------------------------------------------//
+  # data_received
+  #----------------------------------------------------------------//
+  def data_received(self, data):
+    if self._spill:
+      data = self._spillData(data)
+    if data:
+      self._buffer += data
+      offset = self._parse()
+      if offset:
+        del self._buffer[:offset]
+    if self._frames:
+      self._wakeup()
+    if not self._readPaused and self._queued > self.readLimit:
+      self._readPaused = True
+      self.transport.pause_reading()
+
+  #----------------------------------------------------------------//
+  # eof_received
+  #----------------------------------------------------------------//
+  def eof_received(self):
+    self._eof = True
+    self._wakeup()
+
+  #----------------------------------------------------------------//
+  # pause_writing
+  #----------------------------------------------------------------//
+  def pause_writing(self):
+    self._paused = True
+
+  #----------------------------------------------------------------//
+  # resume_writing
+  #----------------------------------------------------------------//
+  def resume_writing(self):
+    self._paused = False
+    for waiter in self._drainWaiters:
+      if not waiter.done():
+        waiter.set_result(None)
+
+  #----------------------------------------------------------------//
+  # drain - StreamWriter.drain equivalent for transport flow control
+  # -- every concurrent writer waits on its own future, as in
+  # -- asyncio FlowControlMixin, so resume_writing releases them all
+  #----------------------------------------------------------------//
+  async def drain(self):
+    if self._eof and self._exc:
+      raise self._exc
+    if not self._paused:
+      return
+    if self.transport.is_closing():
+      raise ConnectionResetError("Connection lost")
+    waiter = asyncio.get_running_loop().create_future()
+    self._drainWaiters.append(waiter)
+    try:
+      await waiter
+    finally:
+      self._drainWaiters.remove(waiter)
+
+  #----------------------------------------------------------------//
+  # readFrame
+  #----------------------------------------------------------------//
+  async def readFrame(self) -> object:
+    while not self._frames:
+      if self._eof:
+        # same exception as StreamReader.readexactly so ConnWATC maps it to 553
+        raise asyncio.IncompleteReadError(bytes(self._buffer), None)
+      self._waiter = asyncio.get_running_loop().create_future()
+      try:
+        await self._waiter
+      finally:
+        self._waiter = None
+    frame, size = self._frames.popleft()
+    self._queued -= size
+    if self._readPaused and self._queued <= self.readLimit // 2:
+      self._readPaused = False
+      if not self.transport.is_closing():
+        self.transport.resume_reading()
+    if isinstance(frame, FrameError):
+      raise frame.exc
+    return frame
+
+  #----------------------------------------------------------------//
+  # _parse - deserialize every complete frame, return the consumed size
+  #----------------------------------------------------------------//
+  def _parse(self) -> int:
+    bsize = len(self._buffer)
+    offset = 0
+    with memoryview(self._buffer) as view:
+      while bsize - offset >= 2:
+        flag = view[offset]
+        if isLarge(flag):
+          hsize = 5
+          if bsize - offset < hsize:
+            break
+          fsize = int.from_bytes(view[offset+1:offset+hsize], 'little')
+        else:
+          hsize = 2
+          fsize = view[offset+1]
+        end = offset + hsize + fsize
+        if end > bsize:
+          if fsize > self.spillSize:
+            self._spill = SpillFrame(fsize)
+            self._spillFlag = flag
+            self._spill.write(view[offset+hsize:])
+            offset = bsize
+          break
+        with view[offset+hsize:end] as frame:
+          self._deliver(flag, self._decode(frame, flag), end - offset)
+        offset = end
+    return offset
+
+  #----------------------------------------------------------------//
+  # _decode - the frame article, or the FrameError of a bad frame
+  #----------------------------------------------------------------//
+  def _decode(self, frame, flag) -> object:
+    try:
+      return decodeFrame(frame, flag, self.spillSize)
+    except Exception as ex:
+      return FrameError(ex)
+
+  #----------------------------------------------------------------//
+  # _deliver - multipart frames are held back until the final frame
+  # -- a multipart message with a bad part is delivered as that error
+  # -- only frames readFrame can take are counted, so held back parts
+  # -- never pause reading
+  #----------------------------------------------------------------//
+  def _deliver(self, flag, article, size):
+    if hasMore(flag):
+      self._parts.append(article)
+      self._partSize += size
+    elif self._parts:
+      self._parts.append(article)
+      parts, self._parts = self._parts, []
+      size += self._partSize
+      self._partSize = 0
+      error = next((part for part in parts if isinstance(part, FrameError)), None)
+      self._frames.append((error or parts, size))
+      self._queued += size
+    else:
+      self._frames.append((article, size))
+      self._queued += size
+
+  #----------------------------------------------------------------//
+  # _spillData - feed a spilling frame, return the data that follows it
+  #----------------------------------------------------------------//
+  def _spillData(self, data):
+    size = self._spill.write(data)
+    if self._spill.remaining:
+      return None
+    spill, self._spill = self._spill, None
+    try:
+      article = spill.deserialize(self._spillFlag)
+    except Exception as ex:
+      article = FrameError(ex)
+    # a spilled frame is not held in memory, so it is not counted
+    self._deliver(self._spillFlag, article, 0)
+    return data[size:]
+
+  #----------------------------------------------------------------//
+  # _wakeup
+  #----------------------------------------------------------------//
+  def _wakeup(self):
+    if self._waiter and not self._waiter.done():
+      self._waiter.set_result(None)
+
+#================================================================#
+# ProtoConnector - wire compatible Connector built on FrameProtocol
+#===============================================================-#
+@dataclass
+class ProtoConnector:
+  id: str
+  _protocol: FrameProtocol
+  _transport: asyncio.Transport
+  codec: Codec = defaultCodec
+  compressor: Compressor = None
+  compressSize: int = COMPRESS_SIZE
+  _pending: list = field(init=False, default_factory=list)
+
+  @property
+  def spillSize(self) -> int:
+    return self._protocol.spillSize
+
+  @spillSize.setter
+  def spillSize(self, spillSize: int):
+    self._protocol.spillSize = spillSize
+
+  #----------------------------------------------------------------//
+  # alive - cheap liveness check, without any io
+  #----------------------------------------------------------------//
+  def alive(self) -> bool:
+    return not (self._transport.is_closing() or self._protocol._eof)
+
+  #----------------------------------------------------------------//
+  # buffer - queue the frames of a payload until the next flush
+  #----------------------------------------------------------------//
+  def buffer(self, payload):
+    self._pending.extend(frames(payload, self.codec, self.compressor, self.compressSize))
+
+  #----------------------------------------------------------------//
+  # close
+  #----------------------------------------------------------------//
+  async def close(self):
+    self._transport.close()
+
+  #----------------------------------------------------------------//
+  # flush - write every buffered frame with one writelines and one drain
+  #----------------------------------------------------------------//
+  async def flush(self):
+    if self._pending:
+      bparts, self._pending = self._pending, []
+      self._transport.writelines(bparts)
+    await self._protocol.drain()
+
+  #----------------------------------------------------------------//
+  # open
+  #----------------------------------------------------------------//
+  @classmethod
+  async def open(cls, hostName: str, port: int, cid="0", codec=None, spillSize=SPILL_SIZE,
+                 compress=None, compressSize=COMPRESS_SIZE) -> object:
+    try:
+      if cid == "0":
+        cid = datetime.now().strftime('%S%f')
+      loop = asyncio.get_running_loop()
+      transport, protocol = await loop.create_connection(
+        lambda: FrameProtocol(spillSize), hostName, port)
+      return cls(cid, protocol, transport, getCodec(codec), getCompressor(compress), compressSize)
+    except (IOError, asyncio.TimeoutError):
+      errmsg = "Asyncio failed to create a connection @{}:{}"
+      logger.error(errmsg.format(hostName, port), exc_info=True)
+      raise
+    except Exception:
+      errmsg = "Unknown error creating connection @{}:{}"
+      logger.error(errmsg.format(hostName, port), exc_info=True)
+      raise
+
+  #----------------------------------------------------------------//
+  # openUnix - open over a unix domain socket, for same host peers
+  #----------------------------------------------------------------//
+  @classmethod
+  async def openUnix(cls, path: str, cid="0", codec=None, spillSize=SPILL_SIZE,
+                     compress=None, compressSize=COMPRESS_SIZE) -> object:
+    try:
+      if cid == "0":
+        cid = datetime.now().strftime('%S%f')
+      loop = asyncio.get_running_loop()
+      transport, protocol = await loop.create_unix_connection(
+        lambda: FrameProtocol(spillSize), path)
+      return cls(cid, protocol, transport, getCodec(codec), getCompressor(compress), compressSize)
+    except (IOError, asyncio.TimeoutError):
+      errmsg = "Asyncio failed to create a connection @{}"
+      logger.error(errmsg.format(path), exc_info=True)
+      raise
+    except Exception:
+      errmsg = "Unknown error creating connection @{}"
+      logger.error(errmsg.format(path), exc_info=True)
+      raise
+
+  #----------------------------------------------------------------//
+  # _read
+  #----------------------------------------------------------------//
+  async def _read(self) -> Article:
+    return await self._protocol.readFrame()
+
+  #----------------------------------------------------------------//
+  # _write
+  #----------------------------------------------------------------//
+  async def _write(self, payload):
+    self.buffer(payload)
+    await self.flush()
+
+  #----------------------------------------------------------------//
+  # _writeBatch - coalesce several payloads into a single flush
+  # -- the whole batch is encoded before any frame is queued, so a
+  # -- payload that fails to encode leaves no part of the batch behind
+  #----------------------------------------------------------------//
+  async def _writeBatch(self, payloads: list):
+    bparts = []
+    for payload in payloads:
+      bparts.extend(frames(payload, self.codec, self.compressor, self.compressSize))
+    self._pending.extend(bparts)
+    await self.flush()
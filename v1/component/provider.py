@@ -1,59 +1,572 @@
 import asyncio
 import logging
+import os
+import socket
+import stat
+import sys
+import time
 
 from asyncio import Future, Queue
+from collections import deque, OrderedDict
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime
 from dataclasses import dataclass, field, InitVar
 
 from .component import Article, Note
 from .connector import create_task, AbcConnector, Connector, ConnWATC, QuConnector
+from .disktier import DiskTier
+from .sharedtier import SharedTier
+from .shmring import RING_SIZE, ShmLink
 
 logger = logging.getLogger('scraperski')
 
 #================================================================#
-# MemCache
+# MemCache - bounded in memory cache
+# -- maxEntries and maxBytes bound the cache, 0 means no bound, and
+# -- the least recently used entries are evicted to stay within them
+# -- maxBytes is an approximate budget, each entry is measured once by
+# -- sizeOf when it is added, see approxSize, and an item larger than
+# -- the whole budget is not cached
+# -- ttl is the default entry lifetime in seconds, 0 means entries do
+# -- not expire, add can override it per entry
+# -- expired entries are dropped when they are next looked up, or by
+# -- purge, and are counted as misses
+# -- getOrCompute is single flight, concurrent misses of one key share
+# -- one computation
+# -- with a disk tier, see DiskTier, evicted entries are spilled to
+# -- disk instead of dropped, and a memory miss that hits on disk moves
+# -- the entry back up to memory. close spills the whole memory tier,
+# -- so a restarted process opens a warm cache
+# -- with a shared tier, see SharedTier, the cache is one segment of
+# -- host shared memory, the memory and disk tiers are not used, and
+# -- maxEntries, maxBytes and sizeOf give way to the segment layout
 #===============================================================-#
 @dataclass
 class MemCache:
-  _cache: dict = field(init=False, default_factory=dict)
+  maxEntries: int = 0
+  maxBytes: int = 0
+  ttl: float = 0
+  sizeOf: object = None
+  disk: DiskTier = None
+  shared: SharedTier = None
+  _cache: OrderedDict = field(init=False, default_factory=OrderedDict)
+  _bytes: int = field(init=False, default=0)
+  hits: int = field(init=False, default=0)
+  misses: int = field(init=False, default=0)
+  evictions: int = field(init=False, default=0)
+  expirations: int = field(init=False, default=0)
+  coalesced: int = field(init=False, default=0)
+  spills: int = field(init=False, default=0)
+  diskHits: int = field(init=False, default=0)
+  _inflight: dict = field(init=False, default_factory=dict)
+
+  def __post_init__(self):
+    if self.sizeOf is None:
+      self.sizeOf = approxSize
 
   #----------------------------------------------------------------//
   # add - value replacement is default
+  # -- ttl overrides the cache ttl for this entry, 0 means no expiry
   #----------------------------------------------------------------//
-  def add(self, key: str, item: object):
-    self._cache[key] = item
+  def add(self, key: str, item: object, ttl: float = None):
+    if ttl is None:
+      ttl = self.ttl
+    if self.shared is not None:
+      if not self.shared.put(key, item, time.time() + ttl if ttl > 0 else 0):
+        self.evictions += 1
+      return
+    expires = time.monotonic() + ttl if ttl > 0 else 0
+    nbytes = self.sizeOf(item) if self.maxBytes else 0
+    if key in self._cache:
+      self._drop(key)
+    elif self.disk is not None:
+      self.disk.delete(key)
+    if self.maxBytes and nbytes > self.maxBytes:
+      # an item beyond the whole budget would only flush the cache
+      self._spill(key, (item, expires, nbytes))
+      return
+    self._cache[key] = (item, expires, nbytes)
+    self._bytes += nbytes
+    self._evict()
+
+  #----------------------------------------------------------------//
+  # clear
+  #----------------------------------------------------------------//
+  def clear(self):
+    if self.shared is not None:
+      self.shared.clear()
+    self._cache.clear()
+    self._inflight.clear()
+    self._bytes = 0
+    if self.disk is not None:
+      self.disk.clear()
+
+  #----------------------------------------------------------------//
+  # close - spill the live memory tier to the disk tier and close it
+  #----------------------------------------------------------------//
+  def close(self):
+    if self.shared is not None:
+      self.shared.close()
+    if self.disk is None:
+      return
+    now = time.monotonic()
+    self.disk.putMany([(key, item, wallTime(expires)) for key, (item, expires, _) in self._cache.items()
+                       if not expires or expires > now])
+    self.disk.close()
+    self._cache.clear()
+    self._bytes = 0
 
   #----------------------------------------------------------------//
   # empty
   #----------------------------------------------------------------//
   @property
   def empty(self) -> bool:
-    return len(self._cache) == 0
+    return self.size == 0
 
   #----------------------------------------------------------------//
   # size
   #----------------------------------------------------------------//
   @property
   def size(self) -> int:
+    if self.shared is not None:
+      return len(self.shared)
     return len(self._cache)
 
   #----------------------------------------------------------------//
   # get
   #----------------------------------------------------------------//
   def get(self, key) -> object:
-    return self._cache.get(key, None)
+    entry = self._fetch(key)
+    if entry is None:
+      self.misses += 1
+      return None
+    self.hits += 1
+    return entry[0]
+
+  #----------------------------------------------------------------//
+  # getOrCompute - the cached item, or the result of await factory()
+  # -- the first caller to miss starts the computation in its own task
+  # -- and every concurrent caller that misses awaits the same task, so
+  # -- a cancelled caller does not abort it for the others
+  # -- the task looks in the disk tier first, awaiting it off the loop
+  # -- the result is cached with the given ttl, an exception is raised
+  # -- to every caller and is not cached
+  #----------------------------------------------------------------//
+  async def getOrCompute(self, key, factory, ttl: float = None) -> object:
+    entry = self.shared.get(key) if self.shared is not None else self._lookup(key)
+    if entry is not None:
+      self.hits += 1
+      if key in self._cache:
+        self._cache.move_to_end(key)
+      return entry[0]
+    task = self._inflight.get(key)
+    if task is None:
+      task = create_task(self._compute(key, factory, ttl))
+      # retrieve the exception in case every caller was cancelled
+      task.add_done_callback(lambda task: task.cancelled() or task.exception())
+      self._inflight[key] = task
+    else:
+      self.coalesced += 1
+    return await asyncio.shield(task)
 
   #----------------------------------------------------------------//
-  # hasEntry
+  # hasEntry - a live entry test, that does not count as a use
   #----------------------------------------------------------------//
   def hasEntry(self, key) -> bool:
-    return key in self._cache
+    if self.shared is not None:
+      return key in self.shared
+    if self._lookup(key) is not None:
+      return True
+    return self.disk is not None and key in self.disk
+
+  #----------------------------------------------------------------//
+  # purge - drop every expired entry
+  #----------------------------------------------------------------//
+  def purge(self) -> int:
+    if self.shared is not None:
+      return self.shared.purge()
+    now = time.monotonic()
+    expired = [key for key, (_, expires, _) in self._cache.items() if expires and expires <= now]
+    for key in expired:
+      self._drop(key)
+    self.expirations += len(expired)
+    if self.disk is not None:
+      self.disk.purge()
+    return len(expired)
 
   #----------------------------------------------------------------//
   # remove
   #----------------------------------------------------------------//
   def remove(self, key) -> object:
-    return self._cache.pop(key, None)
+    # an in flight result computed before the removal is not cached
+    self._inflight.pop(key, None)
+    if self.shared is not None:
+      return self.shared.remove(key)
+    if key in self._cache:
+      return self._drop(key)[0]
+    if self.disk is not None:
+      entry = self.disk.take(key)
+      if entry is not None:
+        return entry[0]
+    return None
+
+  #----------------------------------------------------------------//
+  # stats
+  #----------------------------------------------------------------//
+  def stats(self) -> Note:
+    lookups = self.hits + self.misses
+    return Note({
+      "entries": self.size,
+      "bytes": self._bytes,
+      "maxEntries": self.maxEntries,
+      "maxBytes": self.maxBytes,
+      "hits": self.hits,
+      "misses": self.misses,
+      "hitRate": self.hits / lookups if lookups else 0.0,
+      "evictions": self.evictions,
+      "expirations": self.expirations,
+      "coalesced": self.coalesced,
+      "inflight": len(self._inflight),
+      "spills": self.spills,
+      "diskHits": self.diskHits,
+      "disk": self.disk.stats() if self.disk is not None else None,
+      "shared": self.shared.stats() if self.shared is not None else None})
+
+  #----------------------------------------------------------------//
+  # _compute - the single flight computation task of getOrCompute
+  # -- a disk tier hit counts as a hit, anything else as a miss
+  #----------------------------------------------------------------//
+  async def _compute(self, key, factory, ttl) -> object:
+    task = asyncio.current_task()
+    try:
+      if self.disk is not None and self.shared is None:
+        entry = self._promoted(key, await self.disk.takeAsync(key))
+        if entry is not None:
+          self.hits += 1
+          return entry[0]
+      self.misses += 1
+      item = await factory()
+      if self._inflight.get(key) is task:
+        self.add(key, item, ttl)
+      return item
+    finally:
+      if self._inflight.get(key) is task:
+        del self._inflight[key]
+
+  #----------------------------------------------------------------//
+  # _drop
+  #----------------------------------------------------------------//
+  def _drop(self, key) -> tuple:
+    entry = self._cache.pop(key)
+    self._bytes -= entry[2]
+    return entry
+
+  #----------------------------------------------------------------//
+  # _evict - drop least recently used entries beyond the bounds
+  #----------------------------------------------------------------//
+  def _evict(self):
+    while self._cache and (
+        (self.maxEntries and len(self._cache) > self.maxEntries) or
+        (self.maxBytes and self._bytes > self.maxBytes)):
+      key = next(iter(self._cache))
+      self._spill(key, self._drop(key))
+
+  #----------------------------------------------------------------//
+  # _fetch - the live entry of key for a use, from whichever tier
+  #----------------------------------------------------------------//
+  def _fetch(self, key) -> tuple:
+    if self.shared is not None:
+      return self.shared.get(key)
+    entry = self._lookup(key) or self._promote(key)
+    if entry is not None and key in self._cache:
+      self._cache.move_to_end(key)
+    return entry
+
+  #----------------------------------------------------------------//
+  # _promote - move the disk tier entry of key up to memory
+  #----------------------------------------------------------------//
+  def _promote(self, key) -> tuple:
+    if self.disk is None:
+      return None
+    return self._promoted(key, self.disk.take(key))
+
+  #----------------------------------------------------------------//
+  # _promoted - add an entry taken from the disk tier to memory
+  # -- an entry added while the disk was read is newer, and wins
+  #----------------------------------------------------------------//
+  def _promoted(self, key, entry: tuple) -> tuple:
+    if entry is None:
+      return None
+    current = self._lookup(key)
+    if current is not None:
+      return current
+    item, expires = entry
+    ttl = expires - time.time() if expires else 0
+    if expires and ttl <= 0:
+      return None
+    self.diskHits += 1
+    self.add(key, item, ttl)
+    return self._cache.get(key, (item, expires, 0))
+
+  #----------------------------------------------------------------//
+  # _spill - move an evicted entry down to the disk tier, if any
+  #----------------------------------------------------------------//
+  def _spill(self, key, entry: tuple):
+    item, expires, _ = entry
+    if self.disk is None or (expires and expires <= time.monotonic()):
+      self.evictions += 1
+      return
+    self.disk.put(key, item, wallTime(expires))
+    self.spills += 1
+
+  #----------------------------------------------------------------//
+  # _lookup - the live entry of key, None if absent or expired
+  #----------------------------------------------------------------//
+  def _lookup(self, key) -> tuple:
+    entry = self._cache.get(key)
+    if entry is not None and entry[1] and entry[1] <= time.monotonic():
+      self._drop(key)
+      self.expirations += 1
+      return None
+    return entry
+
+#-----------------------------------------------------------------#
+# wallTime - the wall clock time of a monotonic expiry, 0 for none
+#-----------------------------------------------------------------#
+def wallTime(expires: float) -> float:
+  if not expires:
+    return 0
+  return time.time() + expires - time.monotonic()
+
+#-----------------------------------------------------------------#
+# approxSize - approximate memory size of a cache item in bytes
+# -- containers are measured one level deep, a Note by its body
+#-----------------------------------------------------------------#
+def approxSize(item) -> int:
+  if isinstance(item, Note):
+    return sys.getsizeof(item) + approxSize(item.__dict__) + approxSize(item._pending() or {})
+  size = sys.getsizeof(item)
+  if isinstance(item, dict):
+    size += sum(sys.getsizeof(key) + sys.getsizeof(value) for key, value in item.items())
+  elif isinstance(item, (list, tuple, set, frozenset)):
+    size += sum(sys.getsizeof(value) for value in item)
+  return size
+
+#================================================================#
+# ConnPool - pool of reusable connectors opened by factory
+# -- idle connectors are reused most recently returned first, and are
+# -- closed after idleTimeout seconds unless needed to keep minSize
+# -- when maxSize connectors are leased, lease waits in FIFO order and
+# -- a returned connector is handed straight to the longest waiter
+# -- minSize is kept by a background fill, started by the first lease
+# -- and again whenever a connector is discarded
+#===============================================================-#
+@dataclass
+class ConnPool:
+  factory: object
+  minSize: int = 0
+  maxSize: int = 10
+  idleTimeout: float = 60
+  _idle: deque = field(init=False, default_factory=deque)
+  _waiters: deque = field(init=False, default_factory=deque)
+  _size: int = field(init=False, default=0)
+  _timer: asyncio.TimerHandle = field(init=False, default=None)
+  _filling: asyncio.Task = field(init=False, default=None)
+  closed: bool = field(init=False, default=False)
+
+  def __post_init__(self):
+    if not 0 <= self.minSize <= self.maxSize or self.maxSize < 1:
+      raise ValueError("ConnPool requires 0 <= minSize <= maxSize and maxSize >= 1")
+
+  @property
+  def name(self):
+    return self.__class__.__name__
+
+  #----------------------------------------------------------------//
+  # idle
+  #----------------------------------------------------------------//
+  @property
+  def idle(self) -> int:
+    return len(self._idle)
+
+  #----------------------------------------------------------------//
+  # size - leased plus idle plus opening connectors
+  #----------------------------------------------------------------//
+  @property
+  def size(self) -> int:
+    return self._size
+
+  #----------------------------------------------------------------//
+  # close
+  #----------------------------------------------------------------//
+  async def close(self):
+    self.closed = True
+    if self._timer:
+      self._timer.cancel()
+      self._timer = None
+    if self._filling:
+      self._filling.cancel()
+      self._filling = None
+    while self._waiters:
+      waiter = self._waiters.popleft()
+      if not waiter.done():
+        waiter.set_exception(ConnectionError(f"{self.name} is closed"))
+    while self._idle:
+      conn, _ = self._idle.popleft()
+      self._size -= 1
+      await self._close(conn)
+
+  #----------------------------------------------------------------//
+  # fill - open connectors up to minSize
+  #----------------------------------------------------------------//
+  async def fill(self):
+    while self._size < self.minSize:
+      self._size += 1
+      try:
+        conn = await self.factory()
+      except Exception:
+        self._size -= 1
+        raise
+      self.release(conn)
+
+  #----------------------------------------------------------------//
+  # lease
+  #----------------------------------------------------------------//
+  async def lease(self) -> AbcConnector:
+    if self.closed:
+      raise ConnectionError(f"{self.name} is closed")
+    self._refill()
+    while self._idle:
+      conn, _ = self._idle.pop()
+      if conn.alive():
+        return conn
+      self._discard(conn)
+    if self._size < self.maxSize:
+      self._size += 1
+      try:
+        return await self.factory()
+      except Exception:
+        self._size -= 1
+        raise
+    waiter = asyncio.get_running_loop().create_future()
+    self._waiters.append(waiter)
+    try:
+      return await waiter
+    except asyncio.CancelledError:
+      if waiter in self._waiters:
+        self._waiters.remove(waiter)
+      elif waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+        # a connector was handed over as the wait was cancelled
+        self.release(waiter.result())
+      raise
+
+  #----------------------------------------------------------------//
+  # leased - async with pool.leased() as conn
+  # -- the connector is discarded if the block raises
+  #----------------------------------------------------------------//
+  @asynccontextmanager
+  async def leased(self):
+    conn = await self.lease()
+    try:
+      yield conn
+    except BaseException:
+      self.release(conn, discard=True)
+      raise
+    self.release(conn)
+
+  #----------------------------------------------------------------//
+  # release - return a leased connector to the pool
+  #----------------------------------------------------------------//
+  def release(self, conn: AbcConnector, discard=False):
+    if discard or self.closed or not conn.alive():
+      self._discard(conn)
+      return
+    while self._waiters:
+      waiter = self._waiters.popleft()
+      if not waiter.done():
+        waiter.set_result(conn)
+        return
+    self._idle.append((conn, time.monotonic()))
+    self._schedulePrune()
+
+  #----------------------------------------------------------------//
+  # _close
+  #----------------------------------------------------------------//
+  async def _close(self, conn):
+    try:
+      await conn.close()
+    except Exception as ex:
+      logger.debug(f"{self.name} connector close errored : {ex}")
+
+  #----------------------------------------------------------------//
+  # _discard - close a connector, and reopen for a waiter if any
+  #----------------------------------------------------------------//
+  def _discard(self, conn):
+    self._size -= 1
+    create_task(self._close(conn))
+    if self._waiters and not self.closed:
+      self._size += 1
+      create_task(self._openForWaiter())
+    else:
+      self._refill()
+
+  #----------------------------------------------------------------//
+  # _fillQuietly - background fill, an error waits for the next refill
+  #----------------------------------------------------------------//
+  async def _fillQuietly(self):
+    try:
+      await self.fill()
+    except Exception as ex:
+      logger.warning(f"{self.name} failed to fill to minSize {self.minSize} : {ex}")
+    finally:
+      self._filling = None
+
+  #----------------------------------------------------------------//
+  # _openForWaiter
+  #----------------------------------------------------------------//
+  async def _openForWaiter(self):
+    try:
+      conn = await self.factory()
+    except Exception as ex:
+      self._size -= 1
+      while self._waiters:
+        waiter = self._waiters.popleft()
+        if not waiter.done():
+          waiter.set_exception(ex)
+          return
+      return
+    self.release(conn)
+
+  #----------------------------------------------------------------//
+  # _refill - start a background fill if below minSize
+  #----------------------------------------------------------------//
+  def _refill(self):
+    if self._size < self.minSize and not self._filling and not self.closed:
+      self._filling = create_task(self._fillQuietly())
+
+  #----------------------------------------------------------------//
+  # _prune - close idle connectors past idleTimeout, keep minSize
+  #----------------------------------------------------------------//
+  def _prune(self):
+    self._timer = None
+    expiry = time.monotonic() - self.idleTimeout
+    # the oldest idle connectors are at the left end
+    while self._idle and self._size > self.minSize and self._idle[0][1] <= expiry:
+      conn, _ = self._idle.popleft()
+      self._size -= 1
+      create_task(self._close(conn))
+    self._schedulePrune()
+
+  #----------------------------------------------------------------//
+  # _schedulePrune
+  #----------------------------------------------------------------//
+  def _schedulePrune(self):
+    if self._timer or self.closed or not self._idle or self.idleTimeout <= 0:
+      return
+    if self._size <= self.minSize:
+      return
+    delay = self._idle[0][1] + self.idleTimeout - time.monotonic()
+    self._timer = asyncio.get_running_loop().call_later(max(delay, 0), self._prune)
 
 #================================================================#
 # QuClient
@@ -110,12 +623,42 @@ class QuClient:
 
 #=================================================================#
 # QuServer - Data Mining Service Provider
+# -- connection requests are accepted in a pipeline : the receive loop
+# -- queues each requested cid in a backlog of up to backlog requests,
+# -- and the handshake task takes them in request order, builds each
+# -- QuConnector pair, sends up to handshakeBatch connectors back in
+# -- one batched write, and dispatches each acceptor call as a task
+# -- at most maxAccepting handshakes are in progress at once, each
+# -- holds a slot until its acceptor call returns, and when the cap is
+# -- reached requests wait in the backlog, then in the qchannel
+# -- a coroutine that an acceptor returns is awaited in its own task,
+# -- which holds no slot, so maxAccepting does not cap connections
+# -- a failed handshake task fails serve_forever with its error
+# -- QuClient matches connectors to requests in FIFO order, so the
+# -- handshakes are always sent in request order
 #=================================================================#
 @dataclass
 class QuServer:
   qchannel: ConnWATC
   acceptor: object
+  highWater: int = 0
+  lowWater: int = None
+  backlog: int = 128
+  maxAccepting: int = 64
+  handshakeBatch: int = 32
   status: str = field(init=False)
+  _backlog: Queue = field(init=False, default=None)
+  _slots: asyncio.Semaphore = field(init=False, default=None)
+  _accepting: set = field(init=False, default_factory=set)
+  _handshaker: asyncio.Task = field(init=False, default=None)
+  _started: float = field(init=False, default=0)
+  handshaking: int = field(init=False, default=0)
+  accepted: int = field(init=False, default=0)
+  acceptErrors: int = field(init=False, default=0)
+  handshakes: int = field(init=False, default=0)
+  batches: int = field(init=False, default=0)
+  waitTotal: float = field(init=False, default=0)
+  waitMax: float = field(init=False, default=0)
   
   def __post_init__(self):
     self.status = "INIT"
@@ -156,25 +699,360 @@ class QuServer:
   #-----------------------------------------------------------------#
   async def serve_forever(self):
     self.status = "RUNNING"
-    while self.engaged:
-      cid = await self.qchannel.receive()
+    loop = asyncio.get_running_loop()
+    self._started = loop.time()
+    self._backlog = Queue(self.backlog)
+    self._slots = asyncio.Semaphore(self.maxAccepting)
+    serving = asyncio.current_task()
+    handshaker = self._handshaker = create_task(self._handshakeLoop())
+    # wake the receive loop, which may wait on a full backlog
+    handshaker.add_done_callback(lambda _: self._handshakeError() and serving.cancel())
+    try:
+      while self.engaged:
+        cid = await self.qchannel.receive()
+        if self.disconnected:
+          break
+        await self._backlog.put((cid, loop.time()))
+    except asyncio.CancelledError:
+      if not self._handshakeError():
+        raise
+    finally:
+      handshaker.cancel()
+    if self._handshakeError():
+      logger.error(f"{self.name} handshake task failed")
+      raise self._handshakeError()
+
+  #-----------------------------------------------------------------#
+  # stats
+  # -- wait is the time a request spends in the backlog, in seconds
+  #-----------------------------------------------------------------#
+  def stats(self) -> Note:
+    elapsed = asyncio.get_event_loop().time() - self._started if self._started else 0
+    return Note({
+      "backlog": self._backlog.qsize() if self._backlog else 0,
+      "accepting": self.handshaking,
+      "connections": len(self._accepting),
+      "accepted": self.accepted,
+      "acceptErrors": self.acceptErrors,
+      "acceptsPerSec": self.accepted / elapsed if elapsed else 0.0,
+      "handshakes": self.handshakes,
+      "batches": self.batches,
+      "meanBatch": self.handshakes / self.batches if self.batches else 0.0,
+      "meanWait": self.waitTotal / self.handshakes if self.handshakes else 0.0,
+      "maxWait": self.waitMax})
+
+  #-----------------------------------------------------------------#
+  # _accept - one acceptor call, the acceptor slot is released once
+  # the call returns, and a returned coroutine is served without it
+  #-----------------------------------------------------------------#
+  async def _accept(self, qconn: QuConnector):
+    try:
+      try:
+        result = self.acceptor(qconn._reader, qconn._writer)
+        self.accepted += 1
+      finally:
+        self.handshaking -= 1
+        self._slots.release()
+      if asyncio.iscoroutine(result):
+        await result
+    except asyncio.CancelledError:
+      raise
+    except Exception:
+      self.acceptErrors += 1
+      logger.warning(f"{self.name} acceptor errored on connection {qconn.id}", exc_info=True)
+    finally:
+      self._accepting.discard(asyncio.current_task())
+
+  #-----------------------------------------------------------------#
+  # _handshake - connect one request and dispatch its acceptor call
+  # -- the caller holds an acceptor slot for it
+  #-----------------------------------------------------------------#
+  def _handshake(self, cid, queued: float) -> QuConnector:
+    wait = asyncio.get_running_loop().time() - queued
+    self.waitTotal += wait
+    self.waitMax = max(self.waitMax, wait)
+    self.handshakes += 1
+    self.handshaking += 1
+    # logger.debug(f"{self.name} is creating a new connection with id : {cid}")
+    qconnA = QuConnector.open(cid=cid, highWater=self.highWater, lowWater=self.lowWater)
+    # need to swap reader and writer at one end for correct dual-band connector arrangement
+    qconnB = qconnA.cloneReversed()
+    self._accepting.add(create_task(self._accept(qconnB)))
+    return qconnA
+
+  #-----------------------------------------------------------------#
+  # _handshakeError - the error that ended the handshake task, if any
+  #-----------------------------------------------------------------#
+  def _handshakeError(self) -> BaseException:
+    task = self._handshaker
+    if task and task.done() and not task.cancelled():
+      return task.exception()
+    return None
+
+  #-----------------------------------------------------------------#
+  # _handshakeLoop - batch the ready backlog requests while acceptor
+  # slots are free, and send their connectors in one write
+  #-----------------------------------------------------------------#
+  async def _handshakeLoop(self):
+    while True:
+      request = await self._backlog.get()
+      await self._slots.acquire()
+      batch = [self._handshake(*request)]
+      while len(batch) < self.handshakeBatch and not self._backlog.empty() and not self._slots.locked():
+        await self._slots.acquire()
+        batch.append(self._handshake(*self._backlog.get_nowait()))
+      self.batches += 1
+      await self.qchannel.sendBatch(batch)
       if self.disconnected:
+        # wake the receive loop, so serve_forever returns
+        self.qchannel.cancelRecv()
         return
-      # logger.debug(f"{self.name} is creating a new connection with id : {cid}")
-      qconnA = QuConnector.open(cid=cid)
-      # need to swap reader and writer at one end for correct dual-band connector arrangement
-      qconnB = qconnA.cloneReversed()
-      self.acceptor(qconnB._reader, qconnB._writer)
-      await self.qchannel.send(qconnA)
 
   #-----------------------------------------------------------------#
-  # shutdown
+  # shutdown - stop handshaking and cancel every acceptor task
   #-----------------------------------------------------------------#
   async def shutdown(self):
     logger.debug(f"{self.name} is shutting down ...")
+    if self._handshaker:
+      self._handshaker.cancel()
+    for task in list(self._accepting):
+      task.cancel()
     await self.qchannel.close()
     self.status = "CLOSED"
 
+#================================================================#
+# SockProtocol - the StreamReaderProtocol of SockServer connections
+# -- ended resolves when the peer ends its side of the connection, or
+# -- the connection is lost, so the server can stop tracking it
+#===============================================================-#
+class SockProtocol(asyncio.StreamReaderProtocol):
+
+  def __init__(self, reader: asyncio.StreamReader, connected=None):
+    super().__init__(reader, connected)
+    self.ended = asyncio.get_running_loop().create_future()
+
+  #----------------------------------------------------------------//
+  # connection_lost
+  #----------------------------------------------------------------//
+  def connection_lost(self, exc):
+    self._end()
+    super().connection_lost(exc)
+
+  #----------------------------------------------------------------//
+  # eof_received
+  #----------------------------------------------------------------//
+  def eof_received(self):
+    self._end()
+    return super().eof_received()
+
+  #----------------------------------------------------------------//
+  # _end
+  #----------------------------------------------------------------//
+  def _end(self):
+    if not self.ended.done():
+      self.ended.set_result(None)
+
+#=================================================================#
+# SockServer - TCP server counterpart of SOCKET mode ConnProvider
+# -- accepts parseHeader framed connections, as opened by Connector or
+# -- ProtoConnector, and hands each to acceptor(reader, writer), the
+# -- QuServer acceptor interface, with asyncio stream ends in place of
+# -- queues, so Connector(cid, reader, writer) frames the connection
+# -- backlog is the listen backlog, reusePort sets SO_REUSEPORT, so
+# -- several processes can serve one port, noDelay sets TCP_NODELAY
+# -- maxConnections caps the open connections, 0 means no cap, and a
+# -- connection beyond the cap is closed as soon as it is accepted
+# -- a coroutine acceptor owns its connection until it returns, and
+# -- the connection is closed then, the connection of a synchronous
+# -- acceptor is open until the task that serves it closes it, or the
+# -- peer ends its side, when the server closes it
+# -- with a path, the server listens on that unix domain socket in
+# -- place of hostName and port, for UNIX mode, and reusePort and
+# -- noDelay do not apply. a stale socket file left at the path is
+# -- replaced on start, and the socket file is removed on shutdown
+# -- with shm, for SHM mode, the path is only the rendezvous of
+# -- shared memory ring connections, see ShmLink, and the acceptor is
+# -- handed the ShmLink as both reader and writer
+# -- adopt serves a connection accepted elsewhere, eg one handed off
+# -- by a TxnPool supervisor, and works without start, as a server
+# -- that only adopts connections does not listen
+#=================================================================#
+@dataclass
+class SockServer:
+  acceptor: object
+  hostName: str = "127.0.0.1"
+  port: int = 0
+  backlog: int = 128
+  maxConnections: int = 0
+  reusePort: bool = False
+  noDelay: bool = True
+  path: str = None
+  shm: bool = False
+  status: str = field(init=False, default="INIT")
+  _server: asyncio.AbstractServer = field(init=False, default=None)
+  _conns: dict = field(init=False, default_factory=dict)
+  _started: float = field(init=False, default=0)
+  accepted: int = field(init=False, default=0)
+  rejected: int = field(init=False, default=0)
+  acceptErrors: int = field(init=False, default=0)
+  peak: int = field(init=False, default=0)
+
+  async def __aenter__(self):
+    await self.start()
+    return self
+
+  async def __aexit__(self, *exc):
+    await self.shutdown()
+
+  @property
+  def name(self):
+    if self.path:
+      return f"SockServer-{self.path}"
+    return f"SockServer-{self.hostName}:{self.port}"
+
+  #-----------------------------------------------------------------#
+  # adopt - serve a connected socket accepted elsewhere
+  #-----------------------------------------------------------------#
+  async def adopt(self, sock: socket.socket):
+    if self.status == "INIT":
+      self._started = asyncio.get_running_loop().time()
+      self.status = "RUNNING"
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    protocol = SockProtocol(reader)
+    if sock.family == socket.AF_UNIX:
+      transport, _ = await loop.create_unix_connection(lambda: protocol, sock=sock)
+    else:
+      transport, _ = await loop.create_connection(lambda: protocol, sock=sock)
+    await self._onConnect(reader, asyncio.StreamWriter(transport, protocol, reader, loop))
+
+  #-----------------------------------------------------------------#
+  # serve_forever
+  #-----------------------------------------------------------------#
+  async def serve_forever(self):
+    await self.start()
+    try:
+      await self._server.serve_forever()
+    finally:
+      await self.shutdown()
+
+  #-----------------------------------------------------------------#
+  # shutdown - stop listening and close every open connection
+  #-----------------------------------------------------------------#
+  async def shutdown(self):
+    if self.status != "RUNNING":
+      return
+    logger.debug(f"{self.name} is shutting down ...")
+    self.status = "CLOSED"
+    if self._server is not None:
+      self._server.close()
+    for task, writer in list(self._conns.items()):
+      writer.close()
+      task.cancel()
+    if self._server is None:
+      return
+    await self._server.wait_closed()
+    if self.path:
+      with suppress(FileNotFoundError):
+        os.unlink(self.path)
+
+  #-----------------------------------------------------------------#
+  # start - bind and listen, port 0 is resolved to the bound port
+  #-----------------------------------------------------------------#
+  async def start(self):
+    if self._server is not None:
+      return
+    if self.path:
+      await self._startUnix()
+      return
+    if self.reusePort and not hasattr(socket, "SO_REUSEPORT"):
+      raise ValueError(f"{self.name} reusePort is not supported on this platform")
+    self._server = await asyncio.get_running_loop().create_server(
+      self._protocol, self.hostName, self.port, backlog=self.backlog,
+      reuse_address=True, reuse_port=self.reusePort or None)
+    self.port = self._server.sockets[0].getsockname()[1]
+    self._started = asyncio.get_running_loop().time()
+    self.status = "RUNNING"
+    logger.info(f"{self.name} is listening with backlog {self.backlog}")
+
+  #-----------------------------------------------------------------#
+  # stats
+  #-----------------------------------------------------------------#
+  def stats(self) -> Note:
+    elapsed = asyncio.get_event_loop().time() - self._started if self._started else 0
+    return Note({
+      "connections": len(self._conns),
+      "peak": self.peak,
+      "maxConnections": self.maxConnections,
+      "accepted": self.accepted,
+      "rejected": self.rejected,
+      "acceptErrors": self.acceptErrors,
+      "acceptsPerSec": self.accepted / elapsed if elapsed else 0.0})
+
+  #-----------------------------------------------------------------#
+  # _protocol - the protocol factory of the listening server
+  #-----------------------------------------------------------------#
+  def _protocol(self) -> SockProtocol:
+    return SockProtocol(asyncio.StreamReader(), self._onConnect)
+
+  #-----------------------------------------------------------------#
+  # _startUnix
+  #-----------------------------------------------------------------#
+  async def _startUnix(self):
+    if os.path.exists(self.path) and stat.S_ISSOCK(os.stat(self.path).st_mode):
+      os.unlink(self.path)
+    self._server = await asyncio.get_running_loop().create_unix_server(
+      self._protocol, self.path, backlog=self.backlog)
+    self._started = asyncio.get_running_loop().time()
+    self.status = "RUNNING"
+    logger.info(f"{self.name} is listening with backlog {self.backlog}")
+
+  #-----------------------------------------------------------------#
+  # _onConnect - the asyncio client connected callback
+  #-----------------------------------------------------------------#
+  async def _onConnect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    if self.maxConnections and len(self._conns) >= self.maxConnections:
+      self.rejected += 1
+      logger.warning(f"{self.name} is at maxConnections {self.maxConnections}, "
+                  f"closing connection from {writer.get_extra_info('peername')}")
+      writer.close()
+      return
+    sock = writer.get_extra_info("socket")
+    # asyncio sets TCP_NODELAY on every TCP transport, so only noDelay
+    # False, which restores Nagle's algorithm, needs the option set
+    if not self.noDelay and sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+      sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 0)
+    task = asyncio.current_task()
+    self._conns[task] = writer
+    self.peak = max(self.peak, len(self._conns))
+    try:
+      if self.shm:
+        reader = writer = await ShmLink.accept(reader, writer)
+      self.accepted += 1
+      result = self.acceptor(reader, writer)
+      if asyncio.iscoroutine(result):
+        # a coroutine acceptor serves the connection until it returns
+        await result
+        writer.close()
+      # a synchronous acceptor serves the connection in a task of its own,
+      # so the connection is tracked until it is closed, not until return,
+      # and it is closed here once the peer ends its side
+      protocol = writer.transport.get_protocol()
+      if isinstance(protocol, SockProtocol):
+        await protocol.ended
+        writer.close()
+      with suppress(OSError):
+        await writer.wait_closed()
+    except asyncio.CancelledError:
+      writer.close()
+    except Exception:
+      self.acceptErrors += 1
+      logger.warning(f"{self.name} acceptor errored on connection from "
+                  f"{writer.get_extra_info('peername')}", exc_info=True)
+      writer.close()
+    finally:
+      del self._conns[task]
+
 #================================================================#
 # ConnProvider
 #===============================================================-#
@@ -185,6 +1063,11 @@ class ConnProvider:
   port: int
   qclient: object = field(init=False, default_factory=object)
   connWATC: Note = field(init=False)
+  quQueue: Note = field(init=False)
+  quServer: Note = field(init=False)
+  sockServer: Note = field(init=False)
+  shm: Note = field(init=False)
+  pool: ConnPool = field(init=False)
   config: InitVar[Note]
   
   def __post_init__(self, config: Note) -> object:
@@ -193,11 +1076,27 @@ class ConnProvider:
     qconn = QuConnector.open(cid="quChannel")
     qchannel = ConnWATC(qconn, config.connWATC)
     self.qclient = QuClient(qchannel)
+    # QUEUE mode watermarks, eg {"highWater":1000,"lowWater":500}
+    self.quQueue = Note(config.get("quQueue") or {})
+    # SHM mode ring capacity in bytes, eg {"ringSize":4194304}
+    self.shm = Note(config.get("shm") or {})
+    # QuServer accept pipeline, eg {"backlog":128,"maxAccepting":64,"handshakeBatch":32}
+    self.quServer = Note(config.get("quServer") or {})
+    # SOCKET, UNIX and SHM mode server, eg {"backlog":128,"maxConnections":1000,"reusePort":true,"noDelay":true}
+    self.sockServer = Note(config.get("sockServer") or {})
+    # pooled mode is enabled by a pool attribute, eg {"minSize":1,"maxSize":8,"idleTimeout":60}
+    self.pool = None
+    if config.get("pool") is not None:
+      pool = Note(config.pool)
+      self.pool = ConnPool(self.open, pool.get("minSize", 0), pool.get("maxSize", 10),
+                           pool.get("idleTimeout", 60))
 
   #-----------------------------------------------------------------#
   # close
   #-----------------------------------------------------------------#
   async def close(self):
+    if self.pool:
+      await self.pool.close()
     if self.qclient:
       await self.qclient.close()
 
@@ -205,7 +1104,7 @@ class ConnProvider:
   # newQuConn
   #----------------------------------------------------------------//
   def newQuConn(self, bandDesc, cid="0") -> QuConnector:
-    return QuConnector.open(bandDesc, cid)
+    return QuConnector.open(bandDesc, cid, self.quQueue.get("highWater", 0), self.quQueue.get("lowWater"))
 
   #----------------------------------------------------------------//
   # newSockConn
@@ -213,6 +1112,18 @@ class ConnProvider:
   async def newSockConn(self, cid: str) -> Connector:
     return await Connector.open(self.hostName, self.port, cid)
 
+  #----------------------------------------------------------------//
+  # newUnixConn - in UNIX mode hostName is the socket path
+  #----------------------------------------------------------------//
+  async def newUnixConn(self, cid: str) -> Connector:
+    return await Connector.openUnix(self.hostName, cid)
+
+  #----------------------------------------------------------------//
+  # newShmConn - in SHM mode hostName is the rendezvous socket path
+  #----------------------------------------------------------------//
+  async def newShmConn(self, cid: str) -> Connector:
+    return await Connector.openShm(self.hostName, cid, ringSize=self.shm.get("ringSize", RING_SIZE))
+
   #-----------------------------------------------------------------#
   # newQuServer
   #-----------------------------------------------------------------#
@@ -220,14 +1131,49 @@ class ConnProvider:
     # queue that emulates a TCP binded socket listener and peer endpoint comms channel
     qconn = self.qclient.qchannel.conn.cloneReversed()
     qchannel = ConnWATC(qconn, self.connWATC)
-    return QuServer(qchannel, acceptor_s)
+    return QuServer(qchannel, acceptor_s, self.quQueue.get("highWater", 0), self.quQueue.get("lowWater"),
+                    self.quServer.get("backlog", 128), self.quServer.get("maxAccepting", 64),
+                    self.quServer.get("handshakeBatch", 32))
+
+  #-----------------------------------------------------------------#
+  # newServer - the server of the transport mode
+  #-----------------------------------------------------------------#
+  def newServer(self, acceptor_s):
+    if self.tptMode in ("SOCKET", "UNIX", "SHM"):
+      return self.newSockServer(acceptor_s)
+    return self.newQuServer(acceptor_s)
+
+  #-----------------------------------------------------------------#
+  # newSockServer - listens on hostName and port, or in UNIX and SHM
+  # -- mode on the socket path in hostName, call start or serve_forever
+  # -- to bind
+  #-----------------------------------------------------------------#
+  def newSockServer(self, acceptor_s) -> SockServer:
+    return SockServer(acceptor_s, self.hostName, self.port, self.sockServer.get("backlog", 128),
+                      self.sockServer.get("maxConnections", 0), self.sockServer.get("reusePort", False),
+                      self.sockServer.get("noDelay", True),
+                      self.hostName if self.tptMode in ("UNIX", "SHM") else None,
+                      self.tptMode == "SHM")
 
   #----------------------------------------------------------------//
-  # new
+  # new - in pooled mode a leased connector is returned, which the
+  # -- caller hands back by release, and cid is not applied
   #----------------------------------------------------------------//
   async def new(self, cid="0") -> AbcConnector:
+    if self.pool:
+      return await self.pool.lease()
+    return await self.open(cid)
+
+  #----------------------------------------------------------------//
+  # open - open a new unpooled connector
+  #----------------------------------------------------------------//
+  async def open(self, cid="0") -> AbcConnector:
     if self.tptMode == "SOCKET":
       conn = await self.newSockConn(cid)
+    elif self.tptMode == "UNIX":
+      conn = await self.newUnixConn(cid)
+    elif self.tptMode == "SHM":
+      conn = await self.newShmConn(cid)
     else:
       conn = await self.qclient.open(cid)
     if not conn:
@@ -240,5 +1186,19 @@ class ConnProvider:
   async def newWATC(self, config: Note, cid="0") -> ConnWATC:
     if not isinstance(config, Note) or not config.hasAttr("connWATC"):
       raise Exception("ConnWATC config requires a Note including connWATC attribute")
-    baseConn = self.new(cid)
+    baseConn = await self.new(cid)
     return ConnWATC(baseConn, config.connWATC)
+
+  #----------------------------------------------------------------//
+  # release - return a connector from new or newWATC
+  # -- in pooled mode a ConnWATC that ended in error is discarded,
+  # -- since an interrupted frame leaves the stream unusable
+  #----------------------------------------------------------------//
+  async def release(self, conn, discard=False):
+    if isinstance(conn, ConnWATC):
+      discard = discard or conn.statusCode != 200
+      conn = conn.conn
+    if self.pool:
+      self.pool.release(conn, discard)
+    else:
+      await conn.close()
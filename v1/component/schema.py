@@ -0,0 +1,162 @@
+import logging
+
+from .component import Note, SchemaArticle
+
+logger = logging.getLogger('scraperski')
+
+_missing = object()
+_mapping = (dict, Note)
+
+#================================================================#
+# SchemaError - a packet failed Schema validation
+# -- errors is the structured list of failures, each a dict with the
+# -- dotted path, the error "missing" or "type", and for a type error
+# -- the expected and actual type names
+#===============================================================-#
+class SchemaError(AttributeError):
+
+  def __init__(self, name: str, errors: list):
+    self.errors = errors
+    details = "; ".join(describe(error) for error in errors)
+    super().__init__(f"{name} is invalid : {details}")
+
+#================================================================#
+# Schema - declarative packet validation, compiled once
+# -- required and optional map dotted paths to a type, a tuple of
+# -- types, or None for any type, eg
+# --   Schema({"action": str, "payload.turn": int}, {"payload.pollDelay": (int, float)})
+# -- the paths are compiled into one key tree, so a packet is checked
+# -- in a single pass that visits each key once, whether the packet is
+# -- a raw dict or a Note
+# -- every parent of a path must be a mapping, ie a dict or a Note,
+# -- and is required when any of its child paths is required
+# -- only packet keys satisfy a path, never Note methods or properties
+# -- bool is not accepted as int, unless bool is declared too
+# -- a Note subclass validates its constructor packet by declaring
+# -- _schema = Schema(...), see Note.__init__
+#===============================================================-#
+class Schema:
+  __slots__ = ("name", "nodes")
+
+  def __init__(self, required: dict = None, optional: dict = None, name="packet"):
+    self.name = name
+    tree = {}
+    for fields, isRequired in ((required or {}, True), (optional or {}, False)):
+      for path, types in fields.items():
+        compileNode(tree, path, types, isRequired)
+    self.nodes = freeze(tree)
+
+  def __repr__(self):
+    return f"Schema({self.name!r})"
+
+  #----------------------------------------------------------------//
+  # check - raise SchemaError if the packet is invalid
+  #----------------------------------------------------------------//
+  def check(self, packet):
+    errors = self.errors(packet)
+    if errors:
+      raise SchemaError(self.name, errors)
+    return packet
+
+  #----------------------------------------------------------------//
+  # errors - the validation errors of the packet, empty when valid
+  #----------------------------------------------------------------//
+  def errors(self, packet) -> list:
+    errors = []
+    if not isinstance(packet, (dict, Note)):
+      errors.append({"path": "", "error": "type", "expected": "dict", "actual": type(packet).__name__})
+      return errors
+    checkNodes(packet, self.nodes, errors)
+    return errors
+
+  #----------------------------------------------------------------//
+  # isValid
+  #----------------------------------------------------------------//
+  def isValid(self, packet) -> bool:
+    return not self.errors(packet)
+
+#-----------------------------------------------------------------#
+# checkNodes - validate one level of the compiled key tree
+# -- a node is (key, path, required, types, children)
+#-----------------------------------------------------------------#
+def checkNodes(mapping, nodes: tuple, errors: list):
+  for key, path, required, types, children in nodes:
+    value = valueOf(mapping, key)
+    if value is _missing:
+      if required:
+        errors.append({"path": path, "error": "missing"})
+      continue
+    if types and (not isinstance(value, types) or
+                  (value.__class__ is bool and int in types and bool not in types)):
+      errors.append({"path": path, "error": "type", "expected": typeNames(types), "actual": type(value).__name__})
+      continue
+    if children:
+      checkNodes(value, children, errors)
+
+#-----------------------------------------------------------------#
+# valueOf - a key value of a raw dict or Note, without converting a
+# pending nested dict of a Note
+# -- a SchemaArticle key is one of its declared fields
+#-----------------------------------------------------------------#
+def valueOf(mapping, key) -> object:
+  if isinstance(mapping, dict):
+    return mapping.get(key, _missing)
+  if isinstance(mapping, SchemaArticle):
+    return getattr(mapping, key, _missing) if key in mapping._fields else _missing
+  value = mapping.__dict__.get(key, _missing)
+  if value is _missing:
+    lazy = mapping._pending()
+    if lazy and key in lazy:
+      return lazy[key]
+  return value
+
+#-----------------------------------------------------------------#
+# compileNode - add a dotted path to the key tree
+#-----------------------------------------------------------------#
+def compileNode(tree: dict, path: str, types, required: bool):
+  keys = path.split(".")
+  for depth, key in enumerate(keys):
+    node = tree.get(key)
+    if node is None:
+      node = tree[key] = {"path": ".".join(keys[:depth + 1]), "required": False, "types": None, "children": {}}
+    node["required"] = node["required"] or required
+    if depth < len(keys) - 1:
+      node["types"] = _mapping
+      tree = node["children"]
+  # a path that is also a parent stays a mapping
+  if not node["children"]:
+    node["types"] = normalTypes(types)
+
+#-----------------------------------------------------------------#
+# freeze - the key tree as nested tuples, for checkNodes
+#-----------------------------------------------------------------#
+def freeze(tree: dict) -> tuple:
+  return tuple((key, node["path"], node["required"], node["types"], freeze(node["children"]))
+               for key, node in tree.items())
+
+#-----------------------------------------------------------------#
+# normalTypes - a types declaration as a tuple, dict and Note accepted
+# alike, None for any type
+#-----------------------------------------------------------------#
+def normalTypes(types) -> tuple:
+  if types is None:
+    return None
+  if not isinstance(types, tuple):
+    types = (types,)
+  if dict in types or Note in types:
+    types = tuple({*types, *_mapping})
+  return types
+
+#-----------------------------------------------------------------#
+# typeNames
+#-----------------------------------------------------------------#
+def typeNames(types: tuple) -> str:
+  return "|".join(sorted(klass.__name__ for klass in types))
+
+#-----------------------------------------------------------------#
+# describe - one structured error as text
+#-----------------------------------------------------------------#
+def describe(error: dict) -> str:
+  if error["error"] == "missing":
+    return f"{error['path']} is missing"
+  return f"{error['path']} is {error['actual']}, {error['expected']} is required"
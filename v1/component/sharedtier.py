@@ -0,0 +1,451 @@
+import fcntl
+import hashlib
+import logging
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from multiprocessing.shared_memory import SharedMemory
+
+from .shmring import fence, segmentOf
+
+logger = logging.getLogger('scraperski')
+
+#================================================================#
+# Segment layout
+# -- header : magic, slots, arenaSize, generation, tail, live, used,
+# -- evictions, rebuilds, each a little endian u64
+# -- index : slots fixed size open addressing slots, linear probing
+# -- slot : seq, state, hash, record offset, key length, value length,
+# -- wall clock expiry, 0 for none
+# -- arena : ARENA_SEGMENTS equal segments of key + value records
+#===============================================================-#
+MAGIC = 0x31304d48534b53   # "SKSHM01"
+HEADER = struct.Struct("<9Q")
+HEADER_FIELDS = {name: index for index, name in enumerate(
+  ("magic", "slots", "arenaSize", "generation", "tail", "live", "used", "evictions", "rebuilds"))}
+HEADER_SIZE = 128
+SLOT = struct.Struct("<IIQQIId")
+SEQ = struct.Struct("<I")
+GENERATION = struct.Struct("<Q")
+GENERATION_OFFSET = 24
+
+EMPTY = 0
+LIVE = 1
+TOMBSTONE = 2
+
+ARENA_SEGMENTS = 16
+# the index is rebuilt or evicted beyond this fill ratio
+MAX_FILL = 0.75
+# a reader retries a torn read this many times, then reports a miss
+READ_RETRIES = 8
+
+_retry = object()
+
+#================================================================#
+# SharedTier - one cache segment shared by every process of a host,
+# see MemCache.shared
+# -- the segment is a named SharedMemory that outlives the processes
+# -- that attach it, so a restarted worker attaches a warm cache. The
+# -- first process creates it, and unlink removes it for good
+# -- readers take no lock : every slot is a seqlock, its seq is odd
+# -- while a writer changes it, and a reader that sees seq change over
+# -- its read, or the index generation change, reads again
+# -- both sides fence between the seq or generation accesses and the
+# -- slot and record accesses they guard, see shmring.fence
+# -- writers serialize on an flock of a lock file, plus a thread lock
+# -- records are appended to the arena, one segment at a time, and
+# -- when the arena is full the oldest segment is evicted whole, so
+# -- the arena is a FIFO of the most recently written entries
+# -- the index is rebuilt in place when tombstones fill it, and while
+# -- the generation is odd readers report a miss
+#===============================================================-#
+@dataclass
+class SharedTier:
+  name: str = "scraperski-cache"
+  slots: int = 0x4000
+  arenaSize: int = 0x4000000
+  _shm: SharedMemory = field(init=False, default=None)
+  _buf: memoryview = field(init=False, default=None)
+  _lockFile: int = field(init=False, default=None)
+  _threadLock: object = field(init=False, default_factory=threading.Lock)
+  created: bool = field(init=False, default=False)
+
+  def __post_init__(self):
+    if self.slots & (self.slots - 1):
+      raise ValueError(f"SharedTier slots {self.slots} is not a power of 2")
+    lockPath = os.path.join(tempfile.gettempdir(), f"{self.name}.lock")
+    self._lockFile = os.open(lockPath, os.O_RDWR | os.O_CREAT, 0o600)
+    with self._locked():
+      self._attach()
+    self._buf = self._shm.buf
+    logger.debug(f"SharedTier {self.name} {'created' if self.created else 'attached'} "
+                 f"with {self.slots} slots, {self.arenaSize} arena bytes")
+
+  def __contains__(self, key) -> bool:
+    return self.get(key) is not None
+
+  def __len__(self) -> int:
+    return self._header()[5]
+
+  @property
+  def slotsOffset(self) -> int:
+    return HEADER_SIZE
+
+  @property
+  def arenaOffset(self) -> int:
+    return HEADER_SIZE + self.slots * SLOT.size
+
+  @property
+  def segmentSize(self) -> int:
+    return self.arenaSize // ARENA_SEGMENTS
+
+  #----------------------------------------------------------------//
+  # clear
+  #----------------------------------------------------------------//
+  def clear(self):
+    with self._locked():
+      with self._rebuilding():
+        self._buf[self.slotsOffset:self.arenaOffset] = bytes(self.arenaOffset - self.slotsOffset)
+        self._setHeader(tail=0, live=0, used=0)
+
+  #----------------------------------------------------------------//
+  # close - detach this process, the segment stays for the others
+  #----------------------------------------------------------------//
+  def close(self):
+    if self._shm is None:
+      return
+    self._buf = None
+    self._shm.close()
+    self._shm = None
+    os.close(self._lockFile)
+
+  #----------------------------------------------------------------//
+  # get - the live (item, expires) of key, None if absent or expired
+  #----------------------------------------------------------------//
+  def get(self, key) -> tuple:
+    bkey = dumps(key)
+    keyHash = hash64(bkey)
+    for _ in range(READ_RETRIES):
+      entry = self._read(bkey, keyHash)
+      if entry is not _retry:
+        return entry
+    return None
+
+  #----------------------------------------------------------------//
+  # purge - drop every expired entry
+  #----------------------------------------------------------------//
+  def purge(self) -> int:
+    now = time.time()
+    purged = 0
+    with self._locked():
+      for index, (_, state, _, _, _, _, expires) in enumerate(
+          SLOT.iter_unpack(self._buf[self.slotsOffset:self.arenaOffset])):
+        if state == LIVE and expires and expires <= now:
+          self._setState(index, TOMBSTONE)
+          purged += 1
+      self._addHeader(live=-purged)
+    return purged
+
+  #----------------------------------------------------------------//
+  # put - store an entry, replacing any entry of key
+  # -- an entry larger than one arena segment is not stored
+  #----------------------------------------------------------------//
+  def put(self, key, item, expires=0) -> bool:
+    bkey = dumps(key)
+    bvalue = dumps(item)
+    size = len(bkey) + len(bvalue)
+    with self._locked():
+      if size > self.segmentSize:
+        self._remove(bkey, hash64(bkey))
+        self._addHeader(evictions=1)
+        return False
+      recOff = self._allocate(size)
+      start = self.arenaOffset + recOff
+      self._buf[start:start + len(bkey)] = bkey
+      self._buf[start + len(bkey):start + size] = bvalue
+      self._store(bkey, hash64(bkey), recOff, len(bvalue), expires)
+    return True
+
+  #----------------------------------------------------------------//
+  # remove - remove key and return its item, None if absent
+  #----------------------------------------------------------------//
+  def remove(self, key) -> object:
+    entry = self.get(key)
+    bkey = dumps(key)
+    with self._locked():
+      self._remove(bkey, hash64(bkey))
+    return entry[0] if entry is not None else None
+
+  #----------------------------------------------------------------//
+  # stats
+  #----------------------------------------------------------------//
+  def stats(self) -> dict:
+    _, slots, arenaSize, generation, tail, live, used, evictions, rebuilds = self._header()
+    return {
+      "name": self.name,
+      "entries": live,
+      "slotsUsed": used,
+      "slots": slots,
+      "arenaSize": arenaSize,
+      "arenaTail": tail,
+      "evictions": evictions,
+      "rebuilds": rebuilds}
+
+  #----------------------------------------------------------------//
+  # unlink - destroy the segment for every process
+  #----------------------------------------------------------------//
+  def unlink(self):
+    shm = SharedMemory(self.name)
+    shm.close()
+    shm.unlink()
+
+  #----------------------------------------------------------------//
+  # _allocate - the arena offset of a new record of size bytes
+  # -- moving into the next segment evicts every entry in it
+  #----------------------------------------------------------------//
+  def _allocate(self, size: int) -> int:
+    tail = self._header()[4]
+    segment = tail // self.segmentSize
+    if tail + size > (segment + 1) * self.segmentSize:
+      segment = (segment + 1) % ARENA_SEGMENTS
+      self._evictSegment(segment)
+      tail = segment * self.segmentSize
+    self._setHeader(tail=tail + size)
+    return tail
+
+  #----------------------------------------------------------------//
+  # _attach - create the segment, or attach and adopt its layout
+  #----------------------------------------------------------------//
+  def _attach(self):
+    size = HEADER_SIZE + self.slots * SLOT.size + self.arenaSize
+    # the segment outlives this process, so it is not tracked, see unlink
+    try:
+      self._shm = segmentOf(name=self.name, create=True, size=size)
+      self.created = True
+    except FileExistsError:
+      self._shm = segmentOf(name=self.name)
+    if self.created:
+      HEADER.pack_into(self._shm.buf, 0, MAGIC, self.slots, self.arenaSize, 0, 0, 0, 0, 0, 0)
+      return
+    magic, self.slots, self.arenaSize = HEADER.unpack_from(self._shm.buf, 0)[:3]
+    if magic != MAGIC:
+      raise ValueError(f"Shared memory {self.name} is not a SharedTier segment")
+
+  #----------------------------------------------------------------//
+  # _evictSegment - tombstone every live entry in an arena segment
+  #----------------------------------------------------------------//
+  def _evictSegment(self, segment: int):
+    start = segment * self.segmentSize
+    end = start + self.segmentSize
+    evicted = 0
+    for index, (_, state, _, recOff, _, _, _) in enumerate(
+        SLOT.iter_unpack(self._buf[self.slotsOffset:self.arenaOffset])):
+      if state == LIVE and start <= recOff < end:
+        self._setState(index, TOMBSTONE)
+        evicted += 1
+    self._addHeader(live=-evicted, evictions=evicted)
+
+  #----------------------------------------------------------------//
+  # _header
+  #----------------------------------------------------------------//
+  def _header(self) -> tuple:
+    return HEADER.unpack_from(self._buf, 0)
+
+  def _setHeader(self, **fields):
+    header = list(self._header())
+    for name, value in fields.items():
+      header[HEADER_FIELDS[name]] = value
+    HEADER.pack_into(self._buf, 0, *header)
+
+  def _addHeader(self, **fields):
+    header = list(self._header())
+    for name, value in fields.items():
+      header[HEADER_FIELDS[name]] += value
+    HEADER.pack_into(self._buf, 0, *header)
+
+  #----------------------------------------------------------------//
+  # _locked - the cross process writer lock
+  #----------------------------------------------------------------//
+  @contextmanager
+  def _locked(self):
+    with self._threadLock:
+      fcntl.flock(self._lockFile, fcntl.LOCK_EX)
+      try:
+        yield
+      finally:
+        fcntl.flock(self._lockFile, fcntl.LOCK_UN)
+
+  #----------------------------------------------------------------//
+  # _read - one lock free lookup attempt, _retry if it was torn
+  #----------------------------------------------------------------//
+  def _read(self, bkey: bytes, keyHash: int) -> object:
+    buf = self._buf
+    generation = GENERATION.unpack_from(buf, GENERATION_OFFSET)[0]
+    if generation & 1:
+      # the index is being rebuilt
+      return None
+    fence()
+    mask = self.slots - 1
+    index = keyHash & mask
+    for _ in range(self.slots):
+      offset = self.slotsOffset + index * SLOT.size
+      seq, state, slotHash, recOff, keyLen, valueLen, expires = SLOT.unpack_from(buf, offset)
+      if seq & 1:
+        return _retry
+      if state == EMPTY:
+        break
+      if state == LIVE and slotHash == keyHash and keyLen == len(bkey):
+        start = self.arenaOffset + recOff
+        record = bytes(buf[start:start + keyLen + valueLen])
+        fence()
+        if SEQ.unpack_from(buf, offset)[0] != seq:
+          return _retry
+        if record[:keyLen] == bkey:
+          if GENERATION.unpack_from(buf, GENERATION_OFFSET)[0] != generation:
+            return _retry
+          if expires and expires <= time.time():
+            return None
+          return pickle.loads(record[keyLen:]), expires
+      index = (index + 1) & mask
+    fence()
+    if GENERATION.unpack_from(buf, GENERATION_OFFSET)[0] != generation:
+      return _retry
+    return None
+
+  #----------------------------------------------------------------//
+  # _rebuild - reinsert the live entries without tombstones, in place
+  #----------------------------------------------------------------//
+  def _rebuild(self):
+    live = [slot for slot in SLOT.iter_unpack(self._buf[self.slotsOffset:self.arenaOffset]) if slot[1] == LIVE]
+    with self._rebuilding():
+      self._buf[self.slotsOffset:self.arenaOffset] = bytes(self.arenaOffset - self.slotsOffset)
+      mask = self.slots - 1
+      for _, _, keyHash, recOff, keyLen, valueLen, expires in live:
+        index = keyHash & mask
+        while self._slot(index)[1] != EMPTY:
+          index = (index + 1) & mask
+        SLOT.pack_into(self._buf, self.slotsOffset + index * SLOT.size,
+                       0, LIVE, keyHash, recOff, keyLen, valueLen, expires)
+      self._setHeader(live=len(live), used=len(live))
+      self._addHeader(rebuilds=1)
+
+  #----------------------------------------------------------------//
+  # _rebuilding - hold the generation odd, so readers report a miss
+  #----------------------------------------------------------------//
+  @contextmanager
+  def _rebuilding(self):
+    generation = GENERATION.unpack_from(self._buf, GENERATION_OFFSET)[0]
+    GENERATION.pack_into(self._buf, GENERATION_OFFSET, generation + 1)
+    fence()
+    try:
+      yield
+    finally:
+      fence()
+      GENERATION.pack_into(self._buf, GENERATION_OFFSET, generation + 2)
+
+  #----------------------------------------------------------------//
+  # _remove - tombstone the live slot of key
+  #----------------------------------------------------------------//
+  def _remove(self, bkey: bytes, keyHash: int):
+    index = self._find(bkey, keyHash)[0]
+    if index is not None:
+      self._setState(index, TOMBSTONE)
+      self._addHeader(live=-1)
+
+  #----------------------------------------------------------------//
+  # _find - the live slot index of key, and the first free slot index
+  #----------------------------------------------------------------//
+  def _find(self, bkey: bytes, keyHash: int) -> tuple:
+    mask = self.slots - 1
+    index = keyHash & mask
+    free = None
+    for _ in range(self.slots):
+      _, state, slotHash, recOff, keyLen, _, _ = self._slot(index)
+      if state == EMPTY:
+        return None, free if free is not None else index
+      if state == TOMBSTONE:
+        if free is None:
+          free = index
+      elif slotHash == keyHash and keyLen == len(bkey):
+        start = self.arenaOffset + recOff
+        if self._buf[start:start + keyLen] == bkey:
+          return index, free
+      index = (index + 1) & mask
+    return None, free
+
+  #----------------------------------------------------------------//
+  # _setState
+  #----------------------------------------------------------------//
+  def _setState(self, index: int, state: int):
+    slot = list(self._slot(index))
+    slot[1] = state
+    self._writeSlot(index, slot)
+
+  #----------------------------------------------------------------//
+  # _slot
+  #----------------------------------------------------------------//
+  def _slot(self, index: int) -> tuple:
+    return SLOT.unpack_from(self._buf, self.slotsOffset + index * SLOT.size)
+
+  #----------------------------------------------------------------//
+  # _store - point the slot of key at a written record
+  #----------------------------------------------------------------//
+  def _store(self, bkey: bytes, keyHash: int, recOff: int, valueLen: int, expires: float):
+    index, free = self._find(bkey, keyHash)
+    if index is None:
+      header = self._header()
+      if header[6] + 1 > self.slots * MAX_FILL:
+        self._makeRoom()
+        index, free = self._find(bkey, keyHash)
+    if index is None:
+      index = free
+      if self._slot(index)[1] == EMPTY:
+        self._addHeader(used=1)
+      self._addHeader(live=1)
+    slot = list(self._slot(index))
+    slot[1:] = [LIVE, keyHash, recOff, len(bkey), valueLen, expires]
+    self._writeSlot(index, slot)
+
+  #----------------------------------------------------------------//
+  # _makeRoom - rebuild away the tombstones, and if live entries alone
+  # fill the index, evict the oldest arena segments first
+  #----------------------------------------------------------------//
+  def _makeRoom(self):
+    tail = self._header()[4]
+    segment = tail // self.segmentSize
+    for step in range(1, ARENA_SEGMENTS):
+      if self._header()[5] + 1 <= self.slots * MAX_FILL / 2:
+        break
+      self._evictSegment((segment + step) % ARENA_SEGMENTS)
+    self._rebuild()
+
+  #----------------------------------------------------------------//
+  # _writeSlot - seqlock write, seq is odd while the slot changes
+  #----------------------------------------------------------------//
+  def _writeSlot(self, index: int, slot: list):
+    offset = self.slotsOffset + index * SLOT.size
+    seq = slot[0]
+    SEQ.pack_into(self._buf, offset, (seq + 1) & 0xffffffff)
+    fence()
+    slot[0] = (seq + 1) & 0xffffffff
+    SLOT.pack_into(self._buf, offset, *slot)
+    fence()
+    SEQ.pack_into(self._buf, offset, (seq + 2) & 0xffffffff)
+
+#-----------------------------------------------------------------#
+# dumps
+#-----------------------------------------------------------------#
+def dumps(value) -> bytes:
+  return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+#-----------------------------------------------------------------#
+# hash64 - a key hash that is stable across processes, unlike hash()
+#-----------------------------------------------------------------#
+def hash64(bkey: bytes) -> int:
+  return int.from_bytes(hashlib.blake2b(bkey, digest_size=8).digest(), "little")
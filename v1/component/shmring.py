@@ -0,0 +1,504 @@
+import asyncio
+import json
+import logging
+import sys
+import threading
+
+from collections import deque
+from dataclasses import dataclass, field
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+logger = logging.getLogger('scraperski')
+
+#================================================================#
+# Ring layout
+# -- header : head, tail, readerWaiting, writerWaiting, each a u64 on
+# -- its own cache line, head and tail count every byte ever written
+# -- and read, so head - tail is the readable size
+# -- data : capacity bytes, a frame wraps around the end
+#===============================================================-#
+RING_HEADER = 256
+# u64 word indexes of the header fields
+HEAD = 0
+TAIL = 8
+READER_WAITING = 16
+WRITER_WAITING = 24
+
+# the default capacity of one ring direction
+RING_SIZE = 0x400000
+# while an end waits, its rings are checked this often, in seconds, a
+# backstop for hosts where fence is not a full barrier, see fence
+WAKE_POLL = 0.05
+HANDSHAKE_TIMEOUT = 10
+# SharedMemory takes a track option from python 3.13
+TRACK_OPTION = sys.version_info >= (3, 13)
+
+# control stream bytes, each wakes the peer waiting on its ring
+DATA = b"d"
+SPACE = b"s"
+
+#================================================================#
+# ShmRing - single producer, single consumer byte ring in a
+# SharedMemory segment, one direction of a ShmLink
+# -- the writer publishes data by advancing head after the copy, the
+# -- reader frees space by advancing tail after the copy, and each end
+# -- sets its waiting flag before it sleeps, so the other end knows
+# -- to wake it
+# -- put and take fence the copy from the head or tail load before it
+# -- and from the head or tail store after it, so the peer never sees
+# -- a position before the bytes it covers
+# -- a waiting end stores its flag then loads the ring position, and
+# -- the other end stores the position then loads the flag, so both
+# -- put a fence between the store and the load, or each could miss
+# -- the other's store and the wakeup would be lost
+#===============================================================-#
+@dataclass
+class ShmRing:
+  shm: SharedMemory
+  capacity: int
+  _words: memoryview = field(init=False)
+
+  def __post_init__(self):
+    self._words = self.shm.buf[:RING_HEADER].cast("Q")
+
+  def __del__(self):
+    self.close()
+
+  @property
+  def name(self) -> str:
+    return self.shm.name
+
+  #----------------------------------------------------------------//
+  # attach - a ring created by the peer process
+  #----------------------------------------------------------------//
+  @classmethod
+  def attach(cls, name: str, capacity: int) -> object:
+    return cls(segmentOf(name=name), capacity)
+
+  #----------------------------------------------------------------//
+  # create - the creator unlinks the segment once the peer attached
+  #----------------------------------------------------------------//
+  @classmethod
+  def create(cls, capacity: int) -> object:
+    return cls(segmentOf(create=True, size=RING_HEADER + capacity), capacity)
+
+  #----------------------------------------------------------------//
+  # close
+  #----------------------------------------------------------------//
+  def close(self):
+    if self._words is not None:
+      self._words.release()
+      self._words = None
+      self.shm.close()
+
+  #----------------------------------------------------------------//
+  # readable
+  #----------------------------------------------------------------//
+  def readable(self) -> int:
+    words = self._words
+    return words[HEAD] - words[TAIL]
+
+  #----------------------------------------------------------------//
+  # writable
+  #----------------------------------------------------------------//
+  def writable(self) -> int:
+    words = self._words
+    return self.capacity - words[HEAD] + words[TAIL]
+
+  #----------------------------------------------------------------//
+  # put - copy data, at most writable bytes, and publish it
+  #----------------------------------------------------------------//
+  def put(self, data):
+    fence()
+    head = self._words[HEAD]
+    start = RING_HEADER + head % self.capacity
+    first = min(len(data), RING_HEADER + self.capacity - start)
+    buf = self.shm.buf
+    buf[start:start + first] = data if first == len(data) else memoryview(data)[:first]
+    if first < len(data):
+      buf[RING_HEADER:RING_HEADER + len(data) - first] = memoryview(data)[first:]
+    fence()
+    self._words[HEAD] = head + len(data)
+
+  #----------------------------------------------------------------//
+  # take - copy out size bytes, at most readable, and free them
+  #----------------------------------------------------------------//
+  def take(self, size: int) -> bytes:
+    fence()
+    tail = self._words[TAIL]
+    start = RING_HEADER + tail % self.capacity
+    first = min(size, RING_HEADER + self.capacity - start)
+    buf = self.shm.buf
+    data = bytes(buf[start:start + first])
+    if first < size:
+      data += buf[RING_HEADER:RING_HEADER + size - first]
+    fence()
+    self._words[TAIL] = tail + size
+    return data
+
+  #----------------------------------------------------------------//
+  # unlink - remove the segment name, the mappings stay valid
+  #----------------------------------------------------------------//
+  def unlink(self):
+    if not TRACK_OPTION:
+      # SharedMemory.unlink unregisters the segment, see segmentOf
+      resource_tracker.register(trackerName(self.shm), "shared_memory")
+    try:
+      self.shm.unlink()
+    except FileNotFoundError:
+      if not TRACK_OPTION:
+        resource_tracker.unregister(trackerName(self.shm), "shared_memory")
+
+  #----------------------------------------------------------------//
+  # waiting
+  #----------------------------------------------------------------//
+  def waiting(self, flag: int) -> bool:
+    return self._words[flag] != 0
+
+  #----------------------------------------------------------------//
+  # setWaiting
+  #----------------------------------------------------------------//
+  def setWaiting(self, flag: int, waiting: bool):
+    self._words[flag] = int(waiting)
+
+#================================================================#
+# ShmLink - both ends of a shared memory connection, in the shape of
+# an asyncio StreamReader and StreamWriter, so Connector frames it as
+# it frames a socket, see Connector.openShm
+# -- frames go through two ShmRing, one per direction, with no system
+# -- call while both ends are busy
+# -- a unix socket control stream carries the handshake, then one
+# -- byte wakeups, sent only to a peer that set its waiting flag, so
+# -- an idle end sleeps in the event loop instead of spinning. after
+# -- the handshake its transport is handed to a ControlProtocol, which
+# -- wakes the waiting end straight from data_received
+# -- one backstop timer per link runs while an end waits, a wait that
+# -- it ends with the ring ready is counted in missedWakeups
+# -- lockstep small frames are slower than over a unix socket, as each
+# -- hop still takes a control stream wakeup, plus the ring copies, the
+# -- rings pay off when frames are large or pipelined, see the
+# -- transport benchmark
+# -- the control stream end is the connection end : a peer that closes
+# -- or dies is seen as eof, after the data it wrote is read
+# -- writelines buffers locally and drain copies into the ring, so a
+# -- drain cancelled by a ConnWATC timeout drops no data, and a read
+# -- of at most capacity bytes is cancelled with no data consumed
+# -- a larger read is taken chunk by chunk, so if it is interrupted the
+# -- link is closed and every later read raises, as the framing is lost
+#===============================================================-#
+class ShmLink:
+
+  def __init__(self, control: asyncio.StreamWriter, inbound: ShmRing, outbound: ShmRing):
+    # the stream writer closes the transport when it is collected
+    self._control = control
+    self._transport = control.transport
+    self._inbound = inbound
+    self._outbound = outbound
+    self._pending = deque()
+    self._waiters = {DATA: None, SPACE: None}
+    self._backstop = None
+    self.missedWakeups = 0
+    self._closing = False
+    self._broken = False
+    self._eof = self._transport.is_closing()
+    self._loop = asyncio.get_running_loop()
+    self._closed = self._loop.create_future()
+    if self._eof:
+      self._closed.set_result(None)
+    self._transport.set_protocol(ControlProtocol(self))
+
+  #----------------------------------------------------------------//
+  # accept - the server end of a connection opened by open
+  #----------------------------------------------------------------//
+  @classmethod
+  async def accept(cls, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> object:
+    request = json.loads(await asyncio.wait_for(reader.readline(), HANDSHAKE_TIMEOUT))
+    outboundName, inboundName = request["rings"]
+    capacity = request["capacity"]
+    inbound = ShmRing.attach(inboundName, capacity)
+    try:
+      outbound = ShmRing.attach(outboundName, capacity)
+    except BaseException:
+      inbound.close()
+      raise
+    # no await until the transport is handed over, so no wakeup is lost
+    writer.write(b"ok\n")
+    return cls(writer, inbound, outbound)
+
+  #----------------------------------------------------------------//
+  # open - the client end, creating both rings
+  #----------------------------------------------------------------//
+  @classmethod
+  async def open(cls, path: str, capacity=RING_SIZE) -> object:
+    reader, writer = await asyncio.open_unix_connection(path)
+    rings = []
+    try:
+      rings = [ShmRing.create(capacity), ShmRing.create(capacity)]
+      request = {"rings": [ring.name for ring in rings], "capacity": capacity}
+      writer.write(json.dumps(request).encode() + b"\n")
+      reply = await asyncio.wait_for(reader.readline(), HANDSHAKE_TIMEOUT)
+      if reply != b"ok\n":
+        raise ConnectionError(f"Shared memory handshake @{path} failed")
+    except BaseException:
+      for ring in rings:
+        ring.close()
+      writer.close()
+      raise
+    finally:
+      # both ends are attached, or the handshake failed
+      for ring in rings:
+        ring.unlink()
+    return cls(writer, rings[0], rings[1])
+
+  #----------------------------------------------------------------//
+  # at_eof
+  #----------------------------------------------------------------//
+  def at_eof(self) -> bool:
+    return (self._eof or self._closing) and not self._inbound.readable()
+
+  #----------------------------------------------------------------//
+  # close
+  #----------------------------------------------------------------//
+  def close(self):
+    if self._closing:
+      return
+    self._closing = True
+    self._transport.close()
+    self._wake(DATA)
+    self._wake(SPACE)
+
+  #----------------------------------------------------------------//
+  # drain - copy the buffered data into the outbound ring
+  #----------------------------------------------------------------//
+  async def drain(self):
+    ring = self._outbound
+    pending = self._pending
+    while pending:
+      if self._closing or self._eof:
+        raise ConnectionResetError("Shared memory connection is closed")
+      space = ring.writable()
+      if not space:
+        self._signal(DATA)
+        await self._wait(ring, WRITER_WAITING, SPACE, lambda: ring.writable())
+        continue
+      chunk = pending[0]
+      if len(chunk) <= space:
+        ring.put(chunk)
+        pending.popleft()
+      else:
+        chunk = memoryview(chunk)
+        ring.put(chunk[:space])
+        pending[0] = chunk[space:]
+    self._signal(DATA)
+
+  #----------------------------------------------------------------//
+  # exception
+  #----------------------------------------------------------------//
+  def exception(self) -> Exception:
+    return None
+
+  #----------------------------------------------------------------//
+  # get_extra_info - of the control stream
+  #----------------------------------------------------------------//
+  def get_extra_info(self, name, default=None) -> object:
+    return self._transport.get_extra_info(name, default)
+
+  #----------------------------------------------------------------//
+  # is_closing
+  #----------------------------------------------------------------//
+  def is_closing(self) -> bool:
+    return self._closing
+
+  #----------------------------------------------------------------//
+  # read - at most size bytes, b"" at eof
+  #----------------------------------------------------------------//
+  async def read(self, size: int) -> bytes:
+    self._checkBroken()
+    ring = self._inbound
+    while not ring.readable():
+      if self._eof or self._closing:
+        return b""
+      await self._wait(ring, READER_WAITING, DATA, lambda: ring.readable())
+    data = ring.take(min(size, ring.readable()))
+    self._signal(SPACE)
+    return data
+
+  #----------------------------------------------------------------//
+  # readexactly
+  #----------------------------------------------------------------//
+  async def readexactly(self, size: int) -> bytes:
+    self._checkBroken()
+    ring = self._inbound
+    if size > ring.capacity:
+      return await self._readChunked(size)
+    while ring.readable() < size:
+      if self._eof or self._closing:
+        raise asyncio.IncompleteReadError(ring.take(ring.readable()), size)
+      await self._wait(ring, READER_WAITING, DATA, lambda: ring.readable() >= size)
+    data = ring.take(size)
+    self._signal(SPACE)
+    return data
+
+  #----------------------------------------------------------------//
+  # wait_closed - wait for the control stream to close, the rings are
+  # released once this end is closed too, as the reader may still be
+  # taking the data that the peer wrote before it closed
+  #----------------------------------------------------------------//
+  async def wait_closed(self):
+    await self._closed
+    if self._closing:
+      self._inbound.close()
+      self._outbound.close()
+
+  #----------------------------------------------------------------//
+  # write
+  #----------------------------------------------------------------//
+  def write(self, data):
+    self._pending.append(data)
+
+  #----------------------------------------------------------------//
+  # writelines
+  #----------------------------------------------------------------//
+  def writelines(self, bparts):
+    self._pending.extend(bparts)
+
+  #----------------------------------------------------------------//
+  # _checkBroken
+  #----------------------------------------------------------------//
+  def _checkBroken(self):
+    if self._broken:
+      raise ConnectionResetError("Shared memory connection lost its framing to an interrupted read")
+
+  #----------------------------------------------------------------//
+  # _lost - the control stream ended
+  #----------------------------------------------------------------//
+  def _lost(self):
+    self._eof = True
+    if self._backstop:
+      self._backstop.cancel()
+      self._backstop = None
+    if not self._closed.done():
+      self._closed.set_result(None)
+    self._wake(DATA)
+    self._wake(SPACE)
+
+  #----------------------------------------------------------------//
+  # _readChunked - a frame larger than the ring, read as the peer
+  # -- writes it
+  #----------------------------------------------------------------//
+  async def _readChunked(self, size: int) -> bytes:
+    data = bytearray()
+    try:
+      while len(data) < size:
+        chunk = await self.read(size - len(data))
+        if not chunk:
+          raise asyncio.IncompleteReadError(bytes(data), size)
+        data += chunk
+    except BaseException:
+      if data:
+        self._broken = True
+        self.close()
+      raise
+    return bytes(data)
+
+  #----------------------------------------------------------------//
+  # _signal - wake the peer if it waits on the ring of this wakeup
+  #----------------------------------------------------------------//
+  def _signal(self, wakeup: bytes):
+    fence()
+    if wakeup == DATA:
+      waiting = self._outbound.waiting(READER_WAITING)
+    else:
+      waiting = self._inbound.waiting(WRITER_WAITING)
+    if waiting and not (self._closing or self._eof):
+      self._transport.write(wakeup)
+
+  #----------------------------------------------------------------//
+  # _poll - the backstop timer callback, wake every waiting end
+  #----------------------------------------------------------------//
+  def _poll(self):
+    self._backstop = None
+    for wakeup in (DATA, SPACE):
+      self._wake(wakeup, True)
+
+  #----------------------------------------------------------------//
+  # _wait - sleep until woken
+  # -- the waiting flag is set and fenced before ready is checked
+  # -- again, so a peer that changed the ring before it saw the flag is
+  # -- not missed
+  #----------------------------------------------------------------//
+  async def _wait(self, ring: ShmRing, flag: int, wakeup: bytes, ready):
+    ring.setWaiting(flag, True)
+    try:
+      fence()
+      if ready():
+        return
+      waiter = self._waiters[wakeup] = self._loop.create_future()
+      if self._backstop is None:
+        self._backstop = self._loop.call_later(WAKE_POLL, self._poll)
+      try:
+        if await waiter and ready():
+          self.missedWakeups += 1
+          logger.debug(f"ShmLink missed a wakeup, {self.missedWakeups} so far")
+      finally:
+        self._waiters[wakeup] = None
+    finally:
+      ring.setWaiting(flag, False)
+
+  #----------------------------------------------------------------//
+  # _wake - polled is True for a backstop wakeup
+  #----------------------------------------------------------------//
+  def _wake(self, wakeup: bytes, polled=False):
+    waiter = self._waiters[wakeup]
+    if waiter is not None and not waiter.done():
+      waiter.set_result(polled)
+
+#================================================================#
+# ControlProtocol - the control stream protocol of a ShmLink
+#===============================================================-#
+class ControlProtocol(asyncio.Protocol):
+
+  def __init__(self, link: ShmLink):
+    self.link = link
+
+  def connection_lost(self, exc):
+    self.link._lost()
+
+  def data_received(self, data: bytes):
+    if DATA in data:
+      self.link._wake(DATA)
+    if SPACE in data:
+      self.link._wake(SPACE)
+
+#-----------------------------------------------------------------#
+# fence - a memory barrier between shared memory accesses, a lock
+# acquire and release round trip, as python has no atomics
+# -- CPython lock operations are locked instructions, full barriers on
+# -- x86-64, elsewhere it is as strong as the platform lock's barriers
+#-----------------------------------------------------------------#
+_fenceLock = threading.Lock()
+
+def fence():
+  with _fenceLock:
+    pass
+
+#-----------------------------------------------------------------#
+# segmentOf - a SharedMemory segment the resource tracker leaves
+# alone, as a ring is unlinked as soon as both ends attached, see
+# ShmLink.open, and the ends may share one tracker
+# -- before python 3.13 a segment is always registered, so it is
+# -- unregistered here and registered again by ShmRing.unlink
+#-----------------------------------------------------------------#
+def segmentOf(**kwargs) -> SharedMemory:
+  if TRACK_OPTION:
+    return SharedMemory(track=False, **kwargs)
+  shm = SharedMemory(**kwargs)
+  resource_tracker.unregister(trackerName(shm), "shared_memory")
+  return shm
+
+#-----------------------------------------------------------------#
+# trackerName - the name a segment is registered under
+#-----------------------------------------------------------------#
+def trackerName(shm: SharedMemory) -> str:
+  return "/" + shm.name
@@ -0,0 +1,388 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import stat
+import time
+
+from contextlib import suppress
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection
+
+from .component import Note
+from .connector import Connector, ConnWATC
+from .provider import SockServer
+
+logger = logging.getLogger('scraperski')
+
+# a worker that ran this long, in seconds, before it exited is
+# restarted after restartDelay again, else after twice its last delay
+STABLE_UPTIME = 30
+STOP_TIMEOUT = 10
+# the most handed off sockets one worker read takes at once
+HANDOFF_BATCH = 64
+
+#================================================================#
+# TxnWorker - supervisor side state of one TxnPool worker process
+# -- channel is the supervisor end of the handoff socket pair, and
+# -- pipe the read end of the stats pipe
+#===============================================================-#
+@dataclass
+class TxnWorker:
+  index: int
+  process: multiprocessing.Process = None
+  channel: socket.socket = None
+  pipe: Connection = None
+  started: float = 0
+  delay: float = 0
+  restarts: int = 0
+  handoffs: int = 0
+  restart: asyncio.TimerHandle = None
+  stats: dict = field(default_factory=dict)
+
+  @property
+  def alive(self) -> bool:
+    return self.process is not None and self.process.is_alive()
+
+#================================================================#
+# TxnPool - supervisor of worker processes that each serve TxnHost
+# connections, so a CPU bound TxnHost service scales with cores
+# -- every worker runs a SockServer, and each connection it serves is
+# -- wrapped in a ConnWATC, with the connWATC config, and served by a
+# -- new hostClass(**hostArgs) instance, whose run returns when the
+# -- host is no longer engaged
+# -- with reusePort, the default for a TCP port where SO_REUSEPORT is
+# -- supported, every worker listens on its own socket and the kernel
+# -- spreads the connections. else, as for a unix socket path, the
+# -- supervisor accepts every connection and hands the socket off to
+# -- the workers in turn, over a unix socket pair, see SockServer.adopt
+# -- a worker that exits while the pool runs is restarted, after a
+# -- delay that doubles, up to maxRestartDelay, while it keeps failing
+# -- each worker reports its SockServer stats every statsInterval, and
+# -- stats aggregates the last report of each worker
+# -- hostClass and hostArgs are passed to the worker processes, so
+# -- they must be picklable with the spawn start method
+#===============================================================-#
+@dataclass
+class TxnPool:
+  hostClass: type
+  hostName: str = "127.0.0.1"
+  port: int = 0
+  workers: int = 0
+  path: str = None
+  reusePort: bool = None
+  backlog: int = 128
+  maxConnections: int = 0
+  hostArgs: dict = field(default_factory=dict)
+  connWATC: dict = field(default_factory=lambda: {"readProps": {"timeout": 0}, "writeProps": {"timeout": 0}})
+  restartDelay: float = 0.5
+  maxRestartDelay: float = 30
+  statsInterval: float = 1.0
+  status: str = field(init=False, default="INIT")
+  _workers: list = field(init=False, default_factory=list)
+  _sock: socket.socket = field(init=False, default=None)
+  _acceptor: asyncio.Task = field(init=False, default=None)
+  _turn: int = field(init=False, default=0)
+  _stopped: asyncio.Event = field(init=False, default=None)
+
+  def __post_init__(self):
+    self.workers = self.workers or os.cpu_count() or 1
+    if self.reusePort is None:
+      self.reusePort = self.path is None and hasattr(socket, "SO_REUSEPORT")
+    if self.reusePort and (self.path or not hasattr(socket, "SO_REUSEPORT")):
+      raise ValueError(f"{self.name} reusePort requires a TCP port and SO_REUSEPORT support")
+
+  async def __aenter__(self):
+    await self.start()
+    return self
+
+  async def __aexit__(self, *exc):
+    await self.shutdown()
+
+  @property
+  def name(self):
+    address = self.path or f"{self.hostName}:{self.port}"
+    return f"TxnPool-{self.hostClass.__name__}-{address}"
+
+  #-----------------------------------------------------------------#
+  # serve_forever
+  #-----------------------------------------------------------------#
+  async def serve_forever(self):
+    await self.start()
+    try:
+      await self._stopped.wait()
+    finally:
+      await self.shutdown()
+
+  #-----------------------------------------------------------------#
+  # shutdown - stop every worker, SIGTERM first, then SIGKILL after
+  # -- STOP_TIMEOUT seconds
+  #-----------------------------------------------------------------#
+  async def shutdown(self):
+    if self.status != "RUNNING":
+      return
+    logger.debug(f"{self.name} is shutting down ...")
+    self.status = "CLOSING"
+    if self._acceptor:
+      self._acceptor.cancel()
+    loop = asyncio.get_running_loop()
+    for worker in self._workers:
+      if worker.restart:
+        worker.restart.cancel()
+      if worker.alive:
+        worker.process.terminate()
+    deadline = loop.time() + STOP_TIMEOUT
+    while any(worker.alive for worker in self._workers) and loop.time() < deadline:
+      await asyncio.sleep(0.05)
+    for worker in self._workers:
+      if worker.alive:
+        logger.warning(f"{self.name} worker {worker.index} did not stop, killing it")
+        worker.process.kill()
+      self._release(worker)
+    self._sock.close()
+    if self.path:
+      with suppress(FileNotFoundError):
+        os.unlink(self.path)
+    self.status = "CLOSED"
+    self._stopped.set()
+
+  #-----------------------------------------------------------------#
+  # start - bind, or reserve the port, and start the workers
+  #-----------------------------------------------------------------#
+  async def start(self):
+    if self.status != "INIT":
+      return
+    self._stopped = asyncio.Event()
+    self._sock = self._listener()
+    if not self.path:
+      self.port = self._sock.getsockname()[1]
+    self.status = "RUNNING"
+    for index in range(self.workers):
+      worker = TxnWorker(index, delay=self.restartDelay)
+      self._workers.append(worker)
+      self._spawn(worker)
+    if not self.reusePort:
+      self._acceptor = asyncio.get_running_loop().create_task(self._acceptLoop())
+    logger.info(f"{self.name} started {self.workers} workers")
+
+  #-----------------------------------------------------------------#
+  # stats
+  #-----------------------------------------------------------------#
+  def stats(self) -> Note:
+    reports = [worker.stats for worker in self._workers]
+    totals = {key: sum(report.get(key, 0) for report in reports)
+              for key in ("connections", "accepted", "rejected", "acceptErrors", "acceptsPerSec")}
+    return Note({
+      "workers": len(self._workers),
+      "alive": sum(worker.alive for worker in self._workers),
+      "restarts": sum(worker.restarts for worker in self._workers),
+      "handoffs": sum(worker.handoffs for worker in self._workers),
+      **totals,
+      "perWorker": [{"index": worker.index, "pid": worker.process.pid if worker.process else None,
+                     "restarts": worker.restarts, "handoffs": worker.handoffs, **worker.stats}
+                    for worker in self._workers]})
+
+  #-----------------------------------------------------------------#
+  # _acceptLoop - accept connections and hand them off in turn
+  #-----------------------------------------------------------------#
+  async def _acceptLoop(self):
+    loop = asyncio.get_running_loop()
+    while True:
+      conn, _ = await loop.sock_accept(self._sock)
+      try:
+        self._handoff(conn)
+      finally:
+        # the worker holds its own copy of the socket
+        conn.close()
+
+  #-----------------------------------------------------------------#
+  # _handoff - pass a socket to the next worker that takes it
+  #-----------------------------------------------------------------#
+  def _handoff(self, conn: socket.socket):
+    for _ in range(len(self._workers)):
+      worker = self._workers[self._turn % len(self._workers)]
+      self._turn += 1
+      if worker.channel is None or not worker.alive:
+        continue
+      try:
+        socket.send_fds(worker.channel, [b"c"], [conn.fileno()])
+      except (BlockingIOError, OSError):
+        continue
+      worker.handoffs += 1
+      return
+    logger.warning(f"{self.name} has no worker to take a connection, closing it")
+
+  #-----------------------------------------------------------------#
+  # _listener - the socket the supervisor accepts on, or with reusePort
+  # -- the socket that holds the port, which is bound but never listens,
+  # -- so the kernel never hands it a connection
+  #-----------------------------------------------------------------#
+  def _listener(self) -> socket.socket:
+    if self.path:
+      if os.path.exists(self.path) and stat.S_ISSOCK(os.stat(self.path).st_mode):
+        os.unlink(self.path)
+      sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+      sock.bind(self.path)
+    else:
+      family = socket.AF_INET6 if ":" in self.hostName else socket.AF_INET
+      sock = socket.socket(family, socket.SOCK_STREAM)
+      sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+      if self.reusePort:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+      sock.bind((self.hostName, self.port))
+    if not self.reusePort:
+      sock.listen(self.backlog)
+      sock.setblocking(False)
+    return sock
+
+  #-----------------------------------------------------------------#
+  # _onExit - a worker process ended
+  #-----------------------------------------------------------------#
+  def _onExit(self, worker: TxnWorker):
+    loop = asyncio.get_running_loop()
+    loop.remove_reader(worker.process.sentinel)
+    if self.status != "RUNNING":
+      return
+    # -- the sentinel is ready once the process has ended, so this only
+    # -- reaps it, but never block the loop on a process that lingers
+    worker.process.join(1)
+    uptime = time.monotonic() - worker.started
+    if uptime >= STABLE_UPTIME:
+      worker.delay = self.restartDelay
+    logger.warning(f"{self.name} worker {worker.index} exited with code {worker.process.exitcode} "
+                f"after {uptime:.1f} sec, restarting in {worker.delay:.1f} sec")
+    self._release(worker)
+    worker.restart = loop.call_later(worker.delay, self._spawn, worker)
+    worker.delay = min(worker.delay * 2, self.maxRestartDelay)
+
+  #-----------------------------------------------------------------#
+  # _onStats - a worker stats report
+  #-----------------------------------------------------------------#
+  def _onStats(self, worker: TxnWorker):
+    try:
+      while worker.pipe.poll():
+        worker.stats = worker.pipe.recv()
+    except (EOFError, OSError):
+      asyncio.get_running_loop().remove_reader(worker.pipe.fileno())
+
+  #-----------------------------------------------------------------#
+  # _release - the handles of an ended worker
+  #-----------------------------------------------------------------#
+  def _release(self, worker: TxnWorker):
+    loop = asyncio.get_running_loop()
+    if worker.channel is not None:
+      worker.channel.close()
+      worker.channel = None
+    if worker.pipe is not None:
+      loop.remove_reader(worker.pipe.fileno())
+      worker.pipe.close()
+      worker.pipe = None
+    if worker.process is not None:
+      loop.remove_reader(worker.process.sentinel)
+      worker.process.join(1)
+    worker.stats = {}
+
+  #-----------------------------------------------------------------#
+  # _spawn - start, or restart, the process of a worker
+  #-----------------------------------------------------------------#
+  def _spawn(self, worker: TxnWorker):
+    if self.status != "RUNNING":
+      return
+    if worker.process is not None:
+      worker.restarts += 1
+    worker.restart = None
+    reader, writer = multiprocessing.Pipe(duplex=False)
+    channel = peer = None
+    if not self.reusePort:
+      channel, peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+      channel.setblocking(False)
+    spec = Note({
+      "index": worker.index, "hostName": self.hostName, "port": self.port, "reusePort": self.reusePort,
+      "backlog": self.backlog, "maxConnections": self.maxConnections, "connWATC": self.connWATC,
+      "statsInterval": self.statsInterval})
+    worker.process = multiprocessing.Process(
+      target=runWorker, args=(spec.body, self.hostClass, self.hostArgs, peer, writer),
+      name=f"{self.name}-{worker.index}", daemon=True)
+    worker.process.start()
+    writer.close()
+    if peer is not None:
+      peer.close()
+    worker.channel = channel
+    worker.pipe = reader
+    worker.started = time.monotonic()
+    loop = asyncio.get_running_loop()
+    loop.add_reader(worker.process.sentinel, self._onExit, worker)
+    loop.add_reader(reader.fileno(), self._onStats, worker)
+
+#-----------------------------------------------------------------#
+# runWorker - the entry point of a TxnPool worker process
+#-----------------------------------------------------------------#
+def runWorker(spec: dict, hostClass: type, hostArgs: dict, channel: socket.socket, pipe: Connection):
+  try:
+    asyncio.run(serveWorker(Note(spec), hostClass, hostArgs, channel, pipe))
+  except KeyboardInterrupt:
+    pass
+
+#-----------------------------------------------------------------#
+# serveWorker - serve TxnHost connections until SIGTERM, or until the
+# supervisor is gone
+# -- with a channel the connections are handed off by the supervisor,
+# -- else the worker listens on its own SO_REUSEPORT socket
+#-----------------------------------------------------------------#
+async def serveWorker(spec: Note, hostClass: type, hostArgs: dict, channel: socket.socket, pipe: Connection):
+  loop = asyncio.get_running_loop()
+  stopping = asyncio.Event()
+  loop.add_signal_handler(signal.SIGTERM, stopping.set)
+  serial = 0
+
+  async def acceptor(reader, writer):
+    nonlocal serial
+    serial += 1
+    conn = Connector(f"{spec.index}-{serial}", reader, writer)
+    host = hostClass(**hostArgs)
+    host.conn = ConnWATC(conn, spec.connWATC)
+    try:
+      await host.run()
+    finally:
+      await host.conn.close()
+
+  def onHandoff():
+    try:
+      for _ in range(HANDOFF_BATCH):
+        msg, fds, _, _ = socket.recv_fds(channel, 1, 1)
+        if not msg:
+          stopping.set()
+          return
+        for fd in fds:
+          loop.create_task(server.adopt(socket.socket(fileno=fd)))
+    except BlockingIOError:
+      pass
+    except OSError:
+      stopping.set()
+
+  async def report():
+    try:
+      while True:
+        pipe.send({"pid": os.getpid(), **server.stats().body})
+        await asyncio.sleep(spec.statsInterval)
+    except OSError:
+      stopping.set()
+
+  server = SockServer(acceptor, spec.hostName, spec.port, spec.backlog, spec.maxConnections, True)
+  if channel is None:
+    await server.start()
+  else:
+    channel.setblocking(False)
+    loop.add_reader(channel.fileno(), onHandoff)
+  reporter = loop.create_task(report())
+  try:
+    await stopping.wait()
+  finally:
+    reporter.cancel()
+    if channel is not None:
+      loop.remove_reader(channel.fileno())
+      channel.close()
+    await server.shutdown()
+    pipe.close()
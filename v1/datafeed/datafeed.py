@@ -1,11 +1,18 @@
 
-from scraperski.component import Note
+from scraperski.component import Note, Schema, SchemaError
 
 import logging
 import socketio
 
 logger = logging.getLogger("scraperski")
 
+asyncPacketSchema = Schema({"action": str}, name="asyncPacket")
+packetSchema = Schema({"action": str, "stateKey": None}, name="packet")
+# action specific packet schemas, checked after packetSchema
+actionSchemas = {
+  "poll/load/status": Schema({"payload.turn": int}, {"payload.pollDelay": (int, float)}, name="poll/load/status")
+}
+
 #=================================================================#
 # Datafeed
 #=================================================================#
@@ -23,17 +30,16 @@ class Datafeed:
     async def onArrange(cid, packet):
       packet = session.arrangement.rawBody
       packet["extOrigin"] = session.extOrigin
-      logger.info(f"Returning webonaut director arrangement params ...\n{packet}")
+      logger.info("Returning webonaut director arrangement params ...\n%s", packet)
       return packet
     websock.on("arrange", handler=onArrange)
 
     async def onAsyncPacket(cid, packet):
       try:
+        asyncPacketSchema.check(packet)
         article = Note(packet)
-        if not article.hasAttr('action'):
-          raise ValueError(f"Invalid request, required param action not provided. Got : {packet}")
         if article.action == "emulator/run/task":
-          logger.debug(f"Running emulator task with article :\n{article.body}")
+          logger.debug("Running emulator task with article :\n%s", article.view)
           statusCode = session.emulator.run(article.payload)
           if statusCode != 200:
             logger.error("Browser task emulator errored", exc_info=True)
@@ -88,21 +94,25 @@ class Datafeed:
           "stateKey": packet.get("stateKey","0"),
           "type": "output"
         }
-        article = Note(packet)
-        required = ("action", "stateKey")
-        if not article.hasAttr(*required):
-          errmsg = "Invalid request, one or more required params are not provided :"
-          errmsg = f"{errmsg}\nRequired : {required}\nPacket : {packet}"
+        try:
+          packetSchema.check(packet)
+          if packet["action"] in actionSchemas:
+            actionSchemas[packet["action"]].check(packet)
+        except SchemaError as ex:
+          errmsg = f"Invalid request, {ex}\nPacket : {packet}"
           logger.error(errmsg)
           defResponse.update({
             "errmsg": errmsg,
+            "errors": ex.errors,
             "status": "failed",
             "statusCode": 400,
           })
+          return defResponse
+        article = Note(packet)
         if article.action == "candidate/estimate/data":
-          logger.debug(f"Got candidate estimate data:\n{article.rawBody}")
+          logger.debug("Got candidate estimate data:\n%s", article.view)
         elif article.action == "emulator/run/task":
-          logger.debug(f"Running emulator task with article :\n{article.body}")
+          logger.debug("Running emulator task with article :\n%s", article.view)
           defResponse["statusCode"] = session.emulator.run(article)
         elif article.action == "evaluate/candidates":
           statusCode, selected = session.getCandidates(article.candidates)
@@ -112,7 +122,7 @@ class Datafeed:
         elif article.action == "get/query/product/next":
           return session.nextQueryProduct(article.stateKey)
         elif article.action == "poll/load/status":
-          logger.debug(f"Calculating load check backoff delay :\n{article.rawBody}")
+          logger.debug("Calculating load check backoff delay :\n%s", article.view)
           if article.payload.turn >= session.finderConfig.maxTurns:
             defResponse.update({
               "status": "failed",
@@ -127,13 +137,13 @@ class Datafeed:
               "status": "polling"
             })
         elif article.action == "scraping/debug":
-          logger.info(f"Got webonaut debug message\n{article.body}")
+          logger.info("Got webonaut debug message\n%s", article.view)
         elif article.action == "scraping/pricing":
           logger.info(f"Got webonaut product pricing scrape result\n{article.dataset}")
         elif article.action == "scraping/shipping":
-          logger.info(f"Got webonaut shipping cost scrape result\n{article.dataset.body}")
+          logger.info("Got webonaut shipping cost scrape result\n%s", article.dataset.view)
         elif article.action == "session/tracking":
-          logger.info(f"Got session tracking request with params :\n{article.body}")
+          logger.info("Got session tracking request with params :\n%s", article.view)
           session.setTrackingData(cid, article.trackRef)
         elif article.action == "set/client/controler":
           logger.debug(f"Initializing session room with client controler id : {cid}")
@@ -173,7 +183,7 @@ class Datafeed:
         "remoteUrl": session.remoteUrl,
         "runMode": session.runMode
         }
-      logger.info(f"Returning webonaut director starting params ...\n{packet}")
+      logger.info("Returning webonaut director starting params ...\n%s", packet)
       return packet
 
     websock.on("starting", handler=onStarting)
@@ -1,7 +1,7 @@
 from datetime import datetime
 from fuzzywuzzy import fuzz
 from pathlib import Path
-from scraperski.component import Note
+from scraperski.component import Note, Schema, SchemaArticle
 from scraperski.emulator import Emulator
 from selenium import webdriver as Webdriver
 from selenium.webdriver.firefox.options import Options as FirefoxOptions
@@ -28,10 +28,25 @@ def umartScoring(similarity) -> list:
 def pcbyteScoring(similarity) -> list:
   return list(set([item[0] for item in similarity if item[1]["availability"] == "IN STOCK"]))
 
+# ---------------------------------------------------------------------------#
+# QueryProduct - one queryProducts row, unpacks in column order
+# ---------------------------------------------------------------------------#
+class QueryProduct(SchemaArticle):
+  __slots__ = ("enabled", "prodTag", "category", "subCategory", "targetProduct", "queryProduct")
+
+  # a row with the wrong column count is an error, not truncated
+  @classmethod
+  def fromRow(cls, row: list) -> object:
+    fields = cls.fields()
+    if len(row) != len(fields):
+      raise AttributeError(f"{cls.__name__} row requires {len(fields)} columns {fields}. Got {len(row)} : {row}")
+    return cls(dict(zip(fields, row)))
+
 # ---------------------------------------------------------------------------#
 # Session
 # ---------------------------------------------------------------------------#    
 class Session(Note):
+  _schema = Schema({"api": list, "appDesc": str, "arrangement": dict, "queryProducts": list}, name="Session")
   store = None
   scoring = {
     "amazon": amazonScoring,
@@ -42,14 +57,10 @@ class Session(Note):
   }
 
   def __init__(self, packet: dict):
+    # validated by Session._schema, SchemaError is an AttributeError
     super().__init__(packet)
     if self.appDesc not in self.scoring:
       raise AttributeError(f"App descriptor {self.appDesc} does not exist in the scoring function map")
-    required = ("api", "arrangement", "queryProducts")
-    if not self.hasAttr(*required):
-      raise AttributeError(f"One or more required session attributes are not provided. Required :\n{required}")
-    if not isinstance(self.api, list):
-      raise AttributeError(f"Attribute type {type(self.api)} of session attribute 'api' is invalid, list is required")
     apiKeys = [item[0] for item in self.api]
     if "evaluate/candidates" not in apiKeys:
       raise AttributeError(f"Required session.api route 'evaluate/candidates' is not provided")
@@ -61,7 +72,7 @@ class Session(Note):
     filtered = []
     for item in packet["queryProducts"]:
       if item[0] == 1:
-        filtered.append(item)
+        filtered.append(QueryProduct.fromRow(item))
     self.queryProducts = filtered
     self.qindex = 0
     switchModes = {}
@@ -272,7 +283,7 @@ class Session(Note):
         self.tracked.cids = []
         self.tracked.trackRef = self.tracked._trackRef.copy()
         self.tracked._trackRef = []
-        logger.debug(f"Resetting tracked.trackRef data ... {self.tracked.rawBody}")
+        logger.debug("Resetting tracked.trackRef data ... %s", self.tracked.view)
         return True
     return False
     
@@ -284,7 +295,7 @@ class XhrStreamist:
     
   def create(self, article):
     if not article.hasAttr("clientId"):
-      logger.error(f"XhrStream constructing failed - required param clientId is not provided :\n{article.body}")
+      logger.error("XhrStream constructing failed - required param clientId is not provided :\n%s", article.view)
       return
     clientId = article.clientId
     if clientId in self._instance:
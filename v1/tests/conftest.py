@@ -0,0 +1,12 @@
+import pathlib
+import sys
+import types
+
+#================================================================#
+# the repo root is imported as the scraperski package, as it is
+# when deployed, so the tests run from a plain checkout
+#===============================================================-#
+if "scraperski" not in sys.modules:
+  package = types.ModuleType("scraperski")
+  package.__path__ = [str(pathlib.Path(__file__).resolve().parents[1])]
+  sys.modules["scraperski"] = package
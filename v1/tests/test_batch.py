@@ -0,0 +1,41 @@
+from array import array
+
+import pytest
+
+from scraperski.component import Article, ArticleBatch
+from scraperski.component.codec import getCodec
+from scraperski.component.component import BATCH_KEY
+from scraperski.component.connector import decodeFrame, frames
+
+#-----------------------------------------------------------------#
+# roundTrip - encode and decode one payload with the binary codec
+#-----------------------------------------------------------------#
+def roundTrip(payload):
+  bparts = frames(payload, getCodec("binary"))
+  return decodeFrame(b"".join(bparts[1:]), bparts[0][0])
+
+def batchOf(count) -> ArticleBatch:
+  return ArticleBatch.fromArticles([Article({"n": n, "price": n / 2, "name": f"item-{n}"}) for n in range(count)])
+
+def test_indexAndSlice():
+  batch = batchOf(6)
+  assert batch[-1].rawPacket() == {"n": 5, "price": 2.5, "name": "item-5"}
+  part = batch[1:5:2]
+  assert isinstance(part, ArticleBatch) and len(part) == 2
+  assert [article.n for article in part] == [1, 3]
+  assert isinstance(part.column("n"), array) and part.column("name") == ["item-1", "item-3"]
+  assert len(batch[10:]) == 0 and [article.n for article in batch[::-2]] == [5, 3, 1]
+  with pytest.raises(IndexError):
+    batch[6]
+
+def test_batchRoundTrip():
+  batch = roundTrip(batchOf(4)[1:])
+  assert isinstance(batch, ArticleBatch)
+  assert [article.rawPacket() for article in batch] == [article.rawPacket() for article in batchOf(4)[1:]]
+
+def test_batchKeyIsReserved():
+  # -- a user key that looks like a marker is plain data
+  article = roundTrip(Article({"__batch__": ["n"], "count": 1}))
+  assert isinstance(article, Article) and article["__batch__"] == ["n"]
+  with pytest.raises(ValueError):
+    Article({BATCH_KEY: ["n"]}).encode()
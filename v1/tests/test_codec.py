@@ -0,0 +1,112 @@
+import asyncio
+import hashlib
+import itertools
+import sys
+
+import pytest
+
+from scraperski.component import Article
+from scraperski.component.codec import codecNames, getCodec
+from scraperski.component.compress import compressorNames, getCompressor
+from scraperski.component.connector import (codecOf, compressorOf, Connector, frames, hasMore,
+  isLarge, SpillFrame)
+from scraperski.component.protocol import FrameProtocol
+
+# hex text that still takes well over 255 bytes once compressed
+LARGE_TEXT = "".join(hashlib.sha256(bytes([index])).hexdigest() for index in range(160))
+
+#-----------------------------------------------------------------#
+# packetOf - a packet every codec supports, small or large, with a
+# bytes field for the codecs that support bytes
+#-----------------------------------------------------------------#
+def packetOf(codec, large: bool) -> dict:
+  packet = {"action": "xhr/stream/data", "turn": 3, "ok": True, "score": 0.5, "none": None,
+            "tags": ["a", "b"], "nested": {"text": LARGE_TEXT if large else "y"}}
+  if codec != "json":
+    packet["blob"] = b"z" * (5000 if large else 5)
+  return packet
+
+#-----------------------------------------------------------------#
+# headersOf - the (flag, size) header of every frame in a wire
+#-----------------------------------------------------------------#
+def headersOf(wire: bytes) -> list:
+  headers = []
+  offset = 0
+  while offset < len(wire):
+    flag = wire[offset]
+    hsize = 5 if isLarge(flag) else 2
+    fsize = int.from_bytes(wire[offset+1:offset+hsize], "little")
+    headers.append((flag, fsize))
+    offset += hsize + fsize
+  return headers
+
+#-----------------------------------------------------------------#
+# connectorRead - read the wire back through Connector
+#-----------------------------------------------------------------#
+async def connectorRead(wire: bytes, spillSize: int) -> object:
+  reader = asyncio.StreamReader()
+  reader.feed_data(wire)
+  reader.feed_eof()
+  return await Connector("test", reader, None, spillSize=spillSize)._read()
+
+#-----------------------------------------------------------------#
+# protocolRead - read the wire back through FrameProtocol
+#-----------------------------------------------------------------#
+async def protocolRead(wire: bytes, spillSize: int) -> object:
+  protocol = FrameProtocol(spillSize)
+  protocol.data_received(wire)
+  return await protocol.readFrame()
+
+#-----------------------------------------------------------------#
+# normal - a decoded packet in plain form, memoryviews as bytes
+#-----------------------------------------------------------------#
+def normal(value):
+  if isinstance(value, dict):
+    return {key: normal(item) for key, item in value.items()}
+  if isinstance(value, memoryview):
+    return bytes(value)
+  return value
+
+matrix = list(itertools.product(codecNames(), [None, *compressorNames()], [False, True], [False, True]))
+
+@pytest.mark.parametrize("codec,compressor,large,multipart", matrix)
+def test_roundTrip(codec, compressor, large, multipart):
+  packet = packetOf(codec, large)
+  payload = [Article(packet), Article({"part": 2})] if multipart else Article(packet)
+  wire = b"".join(frames(payload, getCodec(codec), getCompressor(compressor), 1024))
+  headers = headersOf(wire)
+  assert len(headers) == (2 if multipart else 1)
+  for index, (flag, fsize) in enumerate(headers):
+    assert codecOf(flag) == getCodec(codec).id
+    assert hasMore(flag) == (multipart and index == 0)
+    assert isLarge(flag) == (fsize > 255)
+  flag = headers[0][0]
+  assert isLarge(flag) == large
+  assert (compressorOf(flag) is not None) == (large and compressor is not None)
+  for read in (connectorRead, protocolRead):
+    # a large spillSize keeps the frame in memory, 64 spills it to a file
+    for spillSize in (0x100000, 64):
+      article = asyncio.run(read(wire, spillSize))
+      if multipart:
+        assert [part.rawPacket() for part in article][1] == {"part": 2}
+        article = article[0]
+      assert normal(article.rawPacket()) == packet, (read.__name__, spillSize)
+
+def test_pickle5OutOfBandIsZeroCopy():
+  codec = getCodec("pickle5")
+  frame = b"".join(codec.encode({"blob": b"z" * 8192}))
+  packet = codec.decode(frame)
+  assert isinstance(packet["blob"], memoryview) and packet["blob"].readonly
+  assert packet["blob"].obj is frame
+  assert packet["blob"] == b"z" * 8192
+  # a reused receive buffer is copied
+  packet = codec.decode(bytearray(frame))
+  assert packet["blob"].obj is not frame and packet["blob"] == b"z" * 8192
+
+def test_binaryCodecVersionTag():
+  codec = getCodec("binary")
+  bparts = codec.encode({"a": 1})
+  assert bparts[0] == bytes(sys.version_info[:2])
+  assert codec.decode(b"".join(bparts)) == {"a": 1}
+  with pytest.raises(ValueError, match="python"):
+    codec.decode(bytes([2, 7]) + bparts[1])
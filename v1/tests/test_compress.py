@@ -0,0 +1,92 @@
+import pytest
+
+from scraperski.component import Article
+from scraperski.component.codec import getCodec
+from scraperski.component.compress import compressorNames, getCompressor
+from scraperski.component import connector
+from scraperski.component.connector import decodeFrame, frames, SPILL_CHUNK, SpillFrame
+from scraperski.component.protocol import FrameError, FrameProtocol
+
+def compressedFrame(name, size):
+  bparts = frames(Article({"action": "xhr", "data": "x" * size}), getCodec("binary"), getCompressor(name), 1)
+  return bparts[0][0], b"".join(bparts[1:])
+
+@pytest.mark.parametrize("name", compressorNames())
+def test_roundTrip(name):
+  flag, frame = compressedFrame(name, 0x10000)
+  assert decodeFrame(frame, flag, 0x20000).data == "x" * 0x10000
+
+@pytest.mark.parametrize("name", compressorNames())
+def test_inflateLimit(name):
+  compressor = getCompressor(name)
+  bomb = compressor.compress([b"\0" * 0x400000])
+  assert len(bomb) < 0x10000
+  with pytest.raises(ValueError):
+    compressor.decompress(bomb, 0x10000)
+  assert len(compressor.decompress(bomb, 0x400000)) == 0x400000
+
+@pytest.mark.parametrize("name", compressorNames())
+def test_truncatedFrame(name):
+  compressor = getCompressor(name)
+  bdata = compressor.compress([bytes(range(256)) * 64])
+  with pytest.raises(ValueError):
+    compressor.decompress(bdata[:len(bdata) // 2], 0x10000)
+
+def test_frameInflatingPastSpillSizeIsSpilled(monkeypatch):
+  flag, frame = compressedFrame("zlib", 0x40000)
+  assert len(frame) < 0x10000
+  assert FrameProtocol(spillSize=0x10000)._decode(frame, flag).data == "x" * 0x40000
+  assert FrameProtocol(spillSize=0x80000)._decode(frame, flag).data == "x" * 0x40000
+  monkeypatch.setattr(connector, "INFLATE_LIMIT", 0x20000)
+  assert isinstance(FrameProtocol(spillSize=0x10000)._decode(frame, flag), FrameError)
+
+#-----------------------------------------------------------------#
+# spillOf - a SpillFrame holding a compressed payload
+#-----------------------------------------------------------------#
+def spillOf(name, bdata, limit):
+  compressor = getCompressor(name)
+  frame = compressor.compress([bdata])
+  spill = SpillFrame(len(frame), limit)
+  spill.write(frame)
+  return spill, compressor
+
+@pytest.mark.parametrize("name", compressorNames())
+def test_spilledInflateIsChunked(name):
+  spill, compressor = spillOf(name, b"\0" * 0x1000000, 0x1000000)
+  spill.file.seek(0)
+  chunks = iter(lambda: spill.file.read(SPILL_CHUNK), b"")
+  sizes = [len(bdata) for bdata in compressor.inflate(chunks, spill.limit, SPILL_CHUNK)]
+  assert max(sizes) <= SPILL_CHUNK
+  assert sum(sizes) == 0x1000000
+  spill.close()
+
+@pytest.mark.parametrize("name", compressorNames())
+def test_spilledBomb(name):
+  spill, compressor = spillOf(name, b"\0" * 0x1000000, 0x100000)
+  with pytest.raises(ValueError):
+    spill.inflate(compressor)
+  spill.close()
+
+def test_spilledFrameRoundTrip():
+  flag, frame = compressedFrame("zlib", 0x400000)
+  spill = SpillFrame(len(frame))
+  spill.write(frame)
+  assert len(spill.deserialize(flag).data) == 0x400000
+
+def test_spilledTruncated():
+  flag, frame = compressedFrame("zlib", 0x400000)
+  spill = SpillFrame(len(frame) // 2)
+  spill.write(frame)
+  with pytest.raises(ValueError):
+    spill.deserialize(flag)
+
+def test_spilledEmpty():
+  flag, frame = compressedFrame("zlib", 0x400000)
+  spill = SpillFrame(0)
+  with pytest.raises(ValueError, match="truncated"):
+    spill.deserialize(flag)
+  empty = getCompressor("zlib").compress([b""])
+  spill = SpillFrame(len(empty))
+  spill.write(empty)
+  with pytest.raises(EOFError):
+    spill.deserialize(flag)
@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from scraperski.component import Article
+from scraperski.component.codec import getCodec, JsonCodec
+from scraperski.component.connector import Connector, frames, QuConnector, WaterQueue
+from scraperski.component.protocol import ProtoConnector
+
+#-----------------------------------------------------------------#
+# batchRecovery - a batch with an unencodable payload sends nothing,
+# and the next write carries only its own payload
+#-----------------------------------------------------------------#
+async def batchRecovery(openConn):
+  received = asyncio.get_running_loop().create_future()
+
+  async def handler(reader, writer):
+    received.set_result(await Connector("server", reader, writer)._read())
+
+  server = await asyncio.start_server(handler, "127.0.0.1", 0)
+  try:
+    conn = await openConn(server.sockets[0].getsockname()[1])
+    try:
+      await conn._writeBatch([Article({"n": 1}), Article({"n": 2}), Article({"n": object()})])
+      assert False, "unencodable payload was sent"
+    except TypeError:
+      pass
+    await conn._write(Article({"n": 3}))
+    article = await asyncio.wait_for(received, 5)
+    await conn.close()
+    return article
+  finally:
+    server.close()
+
+def test_connectorBatchIsAtomic():
+  article = asyncio.run(batchRecovery(lambda port: Connector.open("127.0.0.1", port, codec="binary")))
+  assert article.rawPacket() == {"n": 3}
+
+def test_protoConnectorBatchIsAtomic():
+  article = asyncio.run(batchRecovery(lambda port: ProtoConnector.open("127.0.0.1", port, codec="binary")))
+  assert article.rawPacket() == {"n": 3}
+
+def test_quConnectorLists():
+  async def test():
+    conn = QuConnector.open()
+    peer = conn.cloneReversed()
+    plain = [{"a": 1}, 2]
+    await conn._write(plain)
+    assert await peer._read() is plain
+    await conn._write([Article({"a": 1}), Article({"b": 2})])
+    parts = await peer._read()
+    assert [type(part) for part in parts] == [Article, Article]
+    assert [part.rawPacket() for part in parts] == [{"a": 1}, {"b": 2}]
+
+  asyncio.run(test())
+
+#-----------------------------------------------------------------#
+# spillServer - run test against a server that writes the given wire
+# bytes, pausing before the last byte
+#-----------------------------------------------------------------#
+async def spillServer(wire, test):
+  async def handler(reader, writer):
+    writer.write(wire[:-1])
+    await writer.drain()
+    await asyncio.sleep(0.5)
+    writer.write(wire[-1:])
+    await writer.drain()
+    await reader.read()
+
+  server = await asyncio.start_server(handler, "127.0.0.1", 0)
+  try:
+    return await asyncio.wait_for(test(server.sockets[0].getsockname()[1]), 10)
+  finally:
+    server.close()
+
+def test_interruptedSpillClosesConnector():
+  wire = b"".join(frames(Article({"data": "x" * 0x100000}), getCodec("json")))
+
+  async def test(port):
+    conn = await Connector.open("127.0.0.1", port, codec="json", spillSize=0x10000)
+    try:
+      await asyncio.wait_for(conn._read(), 0.2)
+      assert False, "read did not time out"
+    except asyncio.TimeoutError:
+      pass
+    assert not conn.alive()
+
+  asyncio.run(spillServer(wire, test))
+
+def test_jsonSpillIsLoadedFromFile(monkeypatch):
+  wire = b"".join(frames(Article({"data": "x" * 0x100000}), getCodec("json")))
+  monkeypatch.setattr(JsonCodec, "decode", lambda self, frame: pytest.fail("spill was decoded from memory"))
+
+  async def test(port):
+    conn = await Connector.open("127.0.0.1", port, codec="json", spillSize=0x10000)
+    article = await conn._read()
+    await conn.close()
+    return article
+
+  assert len(asyncio.run(spillServer(wire, test)).data) == 0x100000
+
+def test_waterQueueHysteresis():
+  async def test():
+    queue = WaterQueue(4, 1)
+    for n in range(4):
+      await asyncio.wait_for(queue.put(n), 1)
+    assert queue.full() and queue.stats().pauses == 1
+    # -- a put past highWater blocks
+    blocked = asyncio.get_running_loop().create_task(queue.put(4))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    # -- and stays blocked between the watermarks
+    assert queue.get_nowait() == 0 and queue.get_nowait() == 1
+    await asyncio.sleep(0.01)
+    assert not blocked.done() and queue.qsize() == 2
+    # -- until the depth drains down to lowWater
+    assert queue.get_nowait() == 2
+    await asyncio.wait_for(blocked, 1)
+    assert not queue.full() and queue.qsize() == 2
+    stats = queue.stats()
+    assert stats.puts == 5 and stats.gets == 3 and stats.peak == 4
+  asyncio.run(test())
+
+def test_waterQueueRequiresLowBelowHigh():
+  with pytest.raises(ValueError):
+    WaterQueue(4, 4)
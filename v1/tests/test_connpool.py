@@ -0,0 +1,99 @@
+import asyncio
+
+from scraperski.component import ConnPool
+
+#-----------------------------------------------------------------#
+# FakeConn - a connector stub with a liveness switch
+#-----------------------------------------------------------------#
+class FakeConn:
+  def __init__(self):
+    self.live = True
+    self.closed = False
+
+  def alive(self) -> bool:
+    return self.live and not self.closed
+
+  async def close(self):
+    self.closed = True
+
+#-----------------------------------------------------------------#
+# factoryOf - a connector factory that counts the opened connectors
+#-----------------------------------------------------------------#
+def factoryOf(opened: list):
+  async def factory():
+    opened.append(FakeConn())
+    return opened[-1]
+  return factory
+
+#-----------------------------------------------------------------#
+# cancelledLease - cancel a waiting lease, then apply settle before
+# the lease task resumes, return the lease outcome
+#-----------------------------------------------------------------#
+async def cancelledLease(pool, settle) -> object:
+  waiter = asyncio.create_task(pool.lease())
+  await asyncio.sleep(0)
+  waiter.cancel()
+  settle()
+  try:
+    return await waiter
+  except BaseException as ex:
+    return ex
+
+def test_cancelledWaiterPoppedByRelease():
+  async def test():
+    pool = ConnPool(factoryOf([]), maxSize=1)
+    conn = await pool.lease()
+    outcome = await cancelledLease(pool, lambda: pool.release(conn))
+    assert isinstance(outcome, asyncio.CancelledError)
+    assert pool.idle == 1 and await pool.lease() is conn
+    await pool.close()
+
+  asyncio.run(test())
+
+def test_waiterCancelledAfterHandover():
+  async def test():
+    pool = ConnPool(factoryOf([]), maxSize=1)
+    conn = await pool.lease()
+    waiter = asyncio.create_task(pool.lease())
+    await asyncio.sleep(0)
+    pool.release(conn)
+    waiter.cancel()
+    outcome = await asyncio.gather(waiter, return_exceptions=True)
+    assert isinstance(outcome[0], asyncio.CancelledError)
+    # the handed over connector went back to the pool
+    assert pool.idle == 1 and await pool.lease() is conn
+    await pool.close()
+
+  asyncio.run(test())
+
+def test_waiterCancelledAfterFailure():
+  async def test():
+    pool = ConnPool(factoryOf([]), maxSize=1)
+    conn = await pool.lease()
+    waiter = asyncio.create_task(pool.lease())
+    await asyncio.sleep(0)
+    pool._waiters.popleft().set_exception(ConnectionError("open failed"))
+    waiter.cancel()
+    outcome = await asyncio.gather(waiter, return_exceptions=True)
+    assert isinstance(outcome[0], asyncio.CancelledError)
+    pool.release(conn)
+    await pool.close()
+
+  asyncio.run(test())
+
+def test_minSizeIsKept():
+  async def test():
+    opened = []
+    pool = ConnPool(factoryOf(opened), minSize=2, maxSize=4)
+    conn = await pool.lease()
+    await asyncio.sleep(0.01)
+    assert pool.size == 2 and pool.idle == 1
+    pool.release(conn, discard=True)
+    idle = await pool.lease()
+    pool.release(idle, discard=True)
+    await asyncio.sleep(0.01)
+    assert pool.size == 2 and pool.idle == 2
+    await pool.close()
+    assert all(conn.closed for conn in opened)
+
+  asyncio.run(test())
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from scraperski.component import Article, ConnWATC, Note
+
+#================================================================#
+# SlowConnector - a connector whose reads complete when released
+#===============================================================-#
+class SlowConnector:
+  id = "slow"
+
+  def __init__(self):
+    self.released = None
+
+  async def _read(self):
+    self.released = asyncio.get_running_loop().create_future()
+    return await self.released
+
+  async def close(self):
+    pass
+
+def connOf(timeout=0) -> ConnWATC:
+  return ConnWATC(SlowConnector(), Note({"readProps": {"timeout": timeout}, "writeProps": {"timeout": 0}}))
+
+def test_deadlineExpires():
+  async def test():
+    conn = connOf(0.05)
+    assert await conn.receive() is None
+    assert conn.statusCode == 552 and conn.getTimedoutMode() == "read"
+    assert asyncio.current_task().cancelling() == 0
+    assert not conn.engaged()
+  asyncio.run(test())
+
+def test_earlyCompletionDisarmsDeadline():
+  async def test():
+    conn = connOf(0.05)
+    loop = asyncio.get_running_loop()
+    loop.call_later(0.01, lambda: conn.conn.released.set_result(Article({"n": 1})))
+    article = await conn.receive()
+    assert article.n == 1 and conn.statusCode == 200
+    assert conn.rprops.timer is None
+    # -- the disarmed timer must not cancel the task later on
+    await asyncio.sleep(0.1)
+    assert asyncio.current_task().cancelling() == 0
+  asyncio.run(test())
+
+def test_cancelRecvIsAnsweredWithStatus():
+  async def test():
+    conn = connOf(5)
+    asyncio.get_running_loop().call_later(0.01, conn.cancelRecv)
+    assert await conn.receive() is None
+    assert conn.statusCode == 554
+    assert asyncio.current_task().cancelling() == 0
+  asyncio.run(test())
+
+def test_externalCancelPropagates():
+  async def test():
+    conn = connOf(5)
+    task = asyncio.get_running_loop().create_task(conn.receive())
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+      await task
+  asyncio.run(test())
+
+def test_externalCancelAtDeadlineIsNotATimeout():
+  async def test():
+    conn = connOf(5)
+    task = asyncio.get_running_loop().create_task(conn.recvWATC(5))
+    await asyncio.sleep(0.01)
+    # -- the deadline and an outside cancel land in the same loop turn
+    conn.rprops.expire()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+      await task
+    assert task.cancelling() == 1
+  asyncio.run(test())
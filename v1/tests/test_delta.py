@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+
+from scraperski.component import Article, Note, SchemaArticle
+from scraperski.component.component import UNSET_KEY
+from scraperski.component.codec import getCodec
+from scraperski.component.connector import ConnWATC, decodeFrame, frames
+from scraperski.component.delta import BASE, DELTA, DELTA_KEY, DeltaStreams, PLAIN, sizeOf
+
+class Status(SchemaArticle):
+  __slots__ = ("action", "turn", "state")
+
+#-----------------------------------------------------------------#
+# roundTrip - deflate, encode, decode and inflate one article
+#-----------------------------------------------------------------#
+def roundTrip(sender, receiver, article):
+  outbound = sender.deflate(article)[0]
+  bparts = frames(outbound, getCodec("binary"))
+  return receiver.inflate(decodeFrame(b"".join(bparts[1:]), bparts[0][0])), outbound
+
+def test_diffPatch():
+  base = Note({"a": 1, "b": {"c": 2}, "d": 3})
+  note = Note({"a": 1, "b": {"c": 4}, "e": 5})
+  delta = note.diff(base)
+  assert delta == {"b": {"c": 4}, "e": 5, UNSET_KEY: ["d"]}
+  assert base.patch(delta).rawcopy(outNote=False, shallow=False) == note.rawcopy(outNote=False, shallow=False)
+
+def test_schemaArticleDiff():
+  base = Status({"action": "poll", "turn": 1, "state": []})
+  article = Status({"action": "poll", "turn": 2, "state": []})
+  assert article.diff(base) == {"turn": 2}
+  assert article.diff({"action": "poll", "extra": 1}) == {"turn": 2, "state": [], UNSET_KEY: ["extra"]}
+
+def test_schemaArticleStream():
+  sender, receiver = DeltaStreams(minSize=0), DeltaStreams()
+  for turn in range(3):
+    article = Status({"action": "poll/load/status", "turn": turn, "state": ["loading"]})
+    received, outbound = roundTrip(sender, receiver, article)
+    assert received.rawPacket() == article.rawPacket()
+  assert outbound[DELTA_KEY][1] == 1
+  assert outbound.rawPacket() == {"turn": 2, DELTA_KEY: [None, 1, []]}
+
+def test_streamsAndEviction():
+  sender, receiver = DeltaStreams("jobId", maxStreams=2, minSize=0), DeltaStreams()
+  for turn in range(4):
+    for jobId in ("a", "b", "c"):
+      article = Article({"jobId": jobId, "turn": turn, "url": "https://example.com/" + jobId})
+      received, outbound = roundTrip(sender, receiver, article)
+      assert received.rawPacket() == article.rawPacket()
+  assert len(receiver.bases) <= 2
+
+def test_baseIsolation():
+  sender, receiver = DeltaStreams(minSize=0), DeltaStreams()
+  article = Article({"turn": 0, "state": {"tags": ["a"]}})
+  received = roundTrip(sender, receiver, article)[0]
+  received.state.tags.append("x")
+  article = Article({"turn": 1, "state": {"tags": ["a"]}})
+  assert roundTrip(sender, receiver, article)[0].rawPacket() == article.rawPacket()
+
+#-----------------------------------------------------------------#
+# statusOf - a status article above DELTA_MIN_SIZE
+#-----------------------------------------------------------------#
+def statusOf(turn, **extra) -> Article:
+  return Article({"action": "poll/load/status", "url": "https://www.example.com/search/" + "x" * 200,
+                  "payload": {"turn": turn, "status": "loading"}, **extra})
+
+def test_modes():
+  sender, receiver = DeltaStreams(), DeltaStreams()
+  modes = []
+  replaced = Article({"other": "y" * 400})
+  for article in (statusOf(0), statusOf(1), statusOf(1), replaced):
+    received, outbound = roundTrip(sender, receiver, article)
+    assert received.rawPacket() == article.rawPacket()
+    modes.append(outbound[DELTA_KEY][1])
+  # -- a first article is a base, an unchanged one an empty delta, and
+  # -- a delta estimated larger than the full article is a new base
+  assert modes == [BASE, DELTA, DELTA, BASE]
+
+def test_unchangedArticleIsAnEmptyDelta():
+  sender = DeltaStreams()
+  sender.deflate(statusOf(0))
+  outbound = sender.deflate(statusOf(0))[0]
+  assert outbound.rawPacket() == {DELTA_KEY: [None, DELTA, []]}
+
+def test_smallStreamIsSentInFull():
+  sender, receiver = DeltaStreams("job"), DeltaStreams()
+  small = Article({"job": "a", "turn": 1})
+  received, outbound = roundTrip(sender, receiver, small)
+  # -- a small article of a stream without a base is passed through
+  assert outbound is small and received.rawPacket() == small.rawPacket()
+  assert "a" not in sender.bases
+  roundTrip(sender, receiver, statusOf(0, job="a"))
+  assert "a" in sender.bases and "a" in receiver.bases
+  # -- a stream that shrinks below minSize drops its base on both ends
+  received, outbound = roundTrip(sender, receiver, Article({"job": "a", "turn": 2}))
+  assert outbound[DELTA_KEY] == ["a", PLAIN, []]
+  assert received.rawPacket() == {"job": "a", "turn": 2}
+  assert not sender.bases and not receiver.bases
+
+def test_sizeOf():
+  packet = statusOf(0).rawPacket()
+  assert sizeOf(packet) == len(getCodec("binary").encode(packet)[1])
+  # -- a value marshal cannot encode is estimated
+  assert sizeOf({"at": object(), "url": "x" * 300}) > 300
+
+#-----------------------------------------------------------------#
+# BrokenConn - a framed connector stub whose write always fails
+#-----------------------------------------------------------------#
+class BrokenConn:
+  id = "broken"
+  codec = None
+
+  async def _write(self, payload):
+    raise OSError("write failed")
+
+def test_deflateErrorIsStatus():
+  connWATC = ConnWATC(BrokenConn(), Note({"readProps": {}, "writeProps": {}}))
+  connWATC.setDelta()
+  connWATC.deltaOut.deflate = None
+  asyncio.run(connWATC.send(Article({"turn": 1})))
+  assert connWATC.statusCode == 555
+
+#-----------------------------------------------------------------#
+# RecordingConn - a framed connector stub that keeps what it writes
+#-----------------------------------------------------------------#
+class RecordingConn:
+  id = "recording"
+  codec = None
+
+  def __init__(self):
+    self.written = []
+
+  async def _write(self, payload):
+    self.written.append(payload)
+
+def test_deltaKeyIsReserved():
+  sender, receiver = DeltaStreams(minSize=0), DeltaStreams()
+  # -- a user key that looks like a marker is plain data
+  for turn in range(2):
+    article = Article({"__delta__": turn, "__unset__": ["x"]})
+    assert roundTrip(sender, receiver, article)[0].rawPacket() == article.rawPacket()
+  connWATC = ConnWATC(RecordingConn(), Note({"readProps": {}, "writeProps": {}}))
+  asyncio.run(connWATC.send(Article({DELTA_KEY: [None, 1, []]})))
+  assert connWATC.statusCode == 555 and not connWATC.conn.written
+  asyncio.run(connWATC.send([Article({"n": 1}), Article({DELTA_KEY: 1})], batch=True))
+  assert connWATC.statusCode == 555 and not connWATC.conn.written
+  with pytest.raises(ValueError):
+    Note({UNSET_KEY: ["x"]}).diff({})
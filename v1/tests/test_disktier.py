@@ -0,0 +1,122 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from scraperski.component import DiskTier, MemCache
+
+def tierPath() -> str:
+  return os.path.join(tempfile.mkdtemp(), "cache.db")
+
+def test_persistence():
+  path = tierPath()
+  disk = DiskTier(path)
+  disk.putMany([("a", {"n": 1}, 0), (("b", 2), [1, 2], 0)])
+  disk.close()
+  disk = DiskTier(path)
+  try:
+    assert len(disk) == 2
+    assert "a" in disk
+    assert disk.take("a") == ({"n": 1}, 0)
+    assert disk.take("a") is None
+    assert disk.take(("b", 2)) == ([1, 2], 0)
+  finally:
+    disk.close()
+
+def test_equalKeysShareARow():
+  path = tierPath()
+  disk = DiskTier(path)
+  disk.put(1, "int")
+  disk.put(1.0, "float")
+  disk.put(True, "bool")
+  disk.delete(1.0)
+  disk.put((1, "x"), "tuple")
+  disk.close()
+  disk = DiskTier(path)
+  try:
+    assert len(disk) == 1
+    assert disk.take((1.0, "x")) == ("tuple", 0)
+  finally:
+    disk.close()
+
+def test_expiry():
+  path = tierPath()
+  disk = DiskTier(path)
+  disk.put("old", 1, time.time() - 1)
+  disk.put("new", 2, time.time() + 60)
+  assert "old" not in disk
+  assert disk.take("old") is None
+  disk.put("stale", 3, time.time() - 1)
+  assert disk.purge() == 1
+  disk.close()
+  disk = DiskTier(path)
+  try:
+    assert len(disk) == 1
+    assert disk.take("new")[0] == 2
+  finally:
+    disk.close()
+
+def test_eviction():
+  path = tierPath()
+  disk = DiskTier(path, maxBytes=4000)
+  for index in range(10):
+    disk.put(index, b"x" * 1000)
+  assert disk.stats()["bytes"] <= 4000
+  assert disk.evictions == 7
+  assert 0 not in disk and 9 in disk
+  disk.close()
+  disk = DiskTier(path)
+  try:
+    assert sorted(disk._index) == [7, 8, 9]
+  finally:
+    disk.close()
+
+def test_unsupportedKeyIsSkipped():
+  disk = DiskTier(tierPath())
+  try:
+    disk.put(frozenset([1]), 1)
+    disk.put("a", lambda: 1)
+    assert len(disk) == 0
+  finally:
+    disk.close()
+
+def test_sqliteRunsOffTheLoop():
+  disk = DiskTier(tierPath())
+  disk.put("a", 1)
+  threads = []
+  takeRow = disk._takeRow
+  disk._takeRow = lambda skey: threads.append(threading.current_thread()) or takeRow(skey)
+
+  async def take():
+    return await disk.takeAsync("a"), threading.current_thread()
+
+  try:
+    entry, loopThread = asyncio.run(take())
+    assert entry == (1, 0)
+    assert threads and threads[0] is not loopThread
+  finally:
+    disk.close()
+
+def test_memCacheSpillsAndPromotes():
+  path = tierPath()
+  cache = MemCache(maxEntries=2, disk=DiskTier(path))
+  for key in "abc":
+    cache.add(key, key.upper())
+  assert cache.spills == 1 and "a" in cache.disk
+  assert cache.get("a") == "A"
+  assert cache.diskHits == 1
+  cache.close()
+  cache = MemCache(maxEntries=2, disk=DiskTier(path))
+  computed = []
+
+  async def factory():
+    computed.append(1)
+    return "computed"
+
+  try:
+    assert asyncio.run(cache.getOrCompute("b", factory)) == "B"
+    assert not computed
+    assert (cache.hits, cache.misses, cache.diskHits) == (1, 0, 1)
+  finally:
+    cache.close()
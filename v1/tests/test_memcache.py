@@ -0,0 +1,166 @@
+import asyncio
+
+import pytest
+
+from scraperski.component import MemCache
+from scraperski.component import provider
+
+#================================================================#
+# Clock - a manual clock for MemCache ttl tests
+#===============================================================-#
+class Clock:
+  def __init__(self):
+    self.now = 1000.0
+
+  def monotonic(self) -> float:
+    return self.now
+
+  def time(self) -> float:
+    return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+  clock = Clock()
+  monkeypatch.setattr(provider, "time", clock)
+  return clock
+
+def test_lruOrder():
+  cache = MemCache(maxEntries=3)
+  for key in "abc":
+    cache.add(key, key)
+  assert cache.get("a") == "a"
+  cache.add("d", "d")
+  assert list(cache._cache) == ["c", "a", "d"]
+  assert cache.get("b") is None
+  # hasEntry does not count as a use
+  assert cache.hasEntry("c")
+  cache.add("e", "e")
+  assert list(cache._cache) == ["a", "d", "e"]
+  assert cache.evictions == 2
+
+def test_replaceKeepsOneEntry():
+  cache = MemCache(maxEntries=2)
+  cache.add("a", 1)
+  cache.add("b", 2)
+  cache.add("a", 3)
+  assert list(cache._cache) == ["b", "a"]
+  assert cache.get("a") == 3
+  assert cache.evictions == 0
+
+def test_ttl(clock):
+  cache = MemCache(ttl=10)
+  cache.add("a", 1)
+  cache.add("b", 2, ttl=30)
+  cache.add("c", 3, ttl=0)
+  clock.now += 9.9
+  assert cache.get("a") == 1
+  clock.now += 0.1
+  assert cache.get("a") is None
+  assert cache.expirations == 1
+  clock.now += 20
+  assert cache.purge() == 1
+  assert cache.get("c") == 3
+  assert cache.size == 1
+  assert cache.stats().expirations == 2
+
+def test_byteBound():
+  sizes = {"small": 100, "medium": 400, "huge": 2000}
+  cache = MemCache(maxBytes=1000, sizeOf=lambda item: sizes[item])
+  cache.add("a", "medium")
+  cache.add("b", "medium")
+  cache.add("c", "small")
+  assert cache.stats().bytes == 900
+  cache.add("d", "medium")
+  assert list(cache._cache) == ["b", "c", "d"]
+  assert cache.stats().bytes == 900
+  cache.add("e", "huge")
+  assert not cache.hasEntry("e")
+  assert list(cache._cache) == ["b", "c", "d"]
+  cache.remove("b")
+  assert cache.stats().bytes == 500
+
+def test_stats():
+  cache = MemCache(maxEntries=10)
+  cache.add("a", 1)
+  cache.get("a")
+  cache.get("a")
+  cache.get("b")
+  stats = cache.stats()
+  assert (stats.entries, stats.hits, stats.misses) == (1, 2, 1)
+  assert stats.hitRate == pytest.approx(2 / 3)
+  cache.clear()
+  assert cache.empty
+  assert cache.stats().bytes == 0
+
+#-----------------------------------------------------------------#
+# slowFactory - a factory that counts its calls and waits on release
+#-----------------------------------------------------------------#
+def slowFactory(calls, release, result="item"):
+  async def factory():
+    calls.append(1)
+    await release.wait()
+    if isinstance(result, Exception):
+      raise result
+    return result
+  return factory
+
+def test_singleFlight():
+  async def run():
+    cache = MemCache()
+    calls, release = [], asyncio.Event()
+    factory = slowFactory(calls, release)
+    callers = [asyncio.ensure_future(cache.getOrCompute("k", factory)) for _ in range(10)]
+    await asyncio.sleep(0.01)
+    release.set()
+    results = await asyncio.gather(*callers)
+    assert results == ["item"] * 10
+    assert len(calls) == 1
+    assert (cache.misses, cache.coalesced) == (1, 9)
+    assert await cache.getOrCompute("k", factory) == "item"
+    assert len(calls) == 1 and cache.hits == 1
+    assert not cache._inflight
+
+  asyncio.run(run())
+
+def test_cancelledFirstCaller():
+  async def run():
+    cache = MemCache()
+    calls, release = [], asyncio.Event()
+    factory = slowFactory(calls, release)
+    first = asyncio.ensure_future(cache.getOrCompute("k", factory))
+    await asyncio.sleep(0.01)
+    second = asyncio.ensure_future(cache.getOrCompute("k", factory))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    await asyncio.sleep(0.01)
+    release.set()
+    assert await second == "item"
+    assert first.cancelled()
+    assert len(calls) == 1
+
+    # with every caller cancelled, the computation still completes and is cached
+    only = asyncio.ensure_future(cache.getOrCompute("j", slowFactory(calls, release, "other")))
+    await asyncio.sleep(0)
+    only.cancel()
+    await asyncio.sleep(0.01)
+    assert cache.get("j") == "other"
+
+  asyncio.run(run())
+
+def test_failureIsNotCached():
+  async def run():
+    cache = MemCache()
+    calls, release = [], asyncio.Event()
+    failing = slowFactory(calls, release, ValueError("boom"))
+    callers = [asyncio.ensure_future(cache.getOrCompute("k", failing)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    release.set()
+    results = await asyncio.gather(*callers, return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(calls) == 1
+    assert not cache.hasEntry("k") and not cache._inflight
+    assert await cache.getOrCompute("k", slowFactory(calls, release)) == "item"
+    assert len(calls) == 2
+    assert cache.get("k") == "item"
+
+  asyncio.run(run())
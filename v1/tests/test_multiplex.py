@@ -0,0 +1,128 @@
+import asyncio
+
+from scraperski.component import Article
+from scraperski.component.connector import Connector, QuConnector
+from scraperski.component.multiplex import Multiplexer
+from scraperski.component.protocol import ProtoConnector
+
+#-----------------------------------------------------------------#
+# echoPeer - answer every request on the peer multiplexer, in reverse
+# order of arrival within each pair, to exercise reply routing
+#-----------------------------------------------------------------#
+async def echoPeer(peer: Multiplexer):
+  while True:
+    first = await peer.receive()
+    second = await peer.receive()
+    for request in (second, first):
+      await peer.reply(request, Article({"echo": request.n}))
+
+def test_replyRouting():
+  async def test():
+    conn = QuConnector.open()
+    mux, peer = Multiplexer.open(conn), Multiplexer.open(conn.cloneReversed())
+    serving = asyncio.create_task(echoPeer(peer))
+    requests = [Article({"n": n}) for n in range(10)]
+    replies = await asyncio.gather(*(mux.request(request) for request in requests))
+    assert [reply.echo for reply in replies] == list(range(10))
+    # the caller's articles are not tagged
+    assert all("corrId" not in request.body for request in requests)
+    serving.cancel()
+    await mux.close()
+    await peer.close()
+
+  asyncio.run(test())
+
+def test_requestTimeout():
+  async def test():
+    conn = QuConnector.open()
+    mux = Multiplexer.open(conn)
+    try:
+      await mux.request(Article({"n": 1}), timeout=0.05)
+      assert False, "request did not time out"
+    except asyncio.TimeoutError:
+      pass
+    assert mux.inFlight == 0
+    await mux.close()
+
+  asyncio.run(test())
+
+def test_closeFailsWaiters():
+  async def test():
+    conn = QuConnector.open()
+    mux = Multiplexer.open(conn)
+    request = asyncio.create_task(mux.request(Article({"n": 1})))
+    receiver = asyncio.create_task(mux.receive())
+    await asyncio.sleep(0.01)
+    await mux.close()
+    results = await asyncio.wait_for(asyncio.gather(request, receiver, return_exceptions=True), 1)
+    assert all(isinstance(result, ConnectionResetError) for result in results)
+    for call in (mux.receive(), mux.request(Article({"n": 2}))):
+      try:
+        await asyncio.wait_for(call, 1)
+        assert False, "closed multiplexer did not raise"
+      except ConnectionResetError:
+        pass
+
+  asyncio.run(test())
+
+def test_protoConnectorBackpressure():
+  async def handler(reader, writer):
+    source = Connector("server", reader, writer)
+    while True:
+      request = await source._read()
+      await source._write(Article({"replyTo": request.corrId, "size": len(request.data)}))
+
+  async def test():
+    server = await asyncio.start_server(handler, "127.0.0.1", 0)
+    conn = await ProtoConnector.open("127.0.0.1", server.sockets[0].getsockname()[1])
+    conn._transport.set_write_buffer_limits(high=1024)
+    mux = Multiplexer.open(conn)
+    payload = b"x" * 0x100000
+    replies = await asyncio.wait_for(
+      asyncio.gather(*(mux.request(Article({"data": payload})) for _ in range(8))), 10)
+    assert [reply.size for reply in replies] == [len(payload)] * 8
+    await mux.close()
+    server.close()
+
+  asyncio.run(test())
+
+#================================================================#
+# StalledConn - a connector whose writes block, as in drain against
+# a peer that does not read
+#===============================================================-#
+class StalledConn:
+  id = "stalled"
+
+  async def _read(self):
+    await asyncio.Event().wait()
+
+  async def _write(self, payload):
+    await asyncio.Event().wait()
+
+  async def close(self):
+    pass
+
+def test_requestTimeoutCoversWrite():
+  async def test():
+    mux = Multiplexer.open(StalledConn())
+    started = asyncio.get_running_loop().time()
+    try:
+      await mux.request(Article({"n": 1}), timeout=0.05)
+      assert False, "request did not time out"
+    except asyncio.TimeoutError:
+      pass
+    assert asyncio.get_running_loop().time() - started < 1
+    assert mux.inFlight == 0 and asyncio.current_task().cancelling() == 0
+    # -- an outside cancel of a blocked write is still a cancel
+    request = asyncio.create_task(mux.request(Article({"n": 2}), timeout=5))
+    await asyncio.sleep(0.01)
+    request.cancel()
+    try:
+      await request
+      assert False, "request was not cancelled"
+    except asyncio.CancelledError:
+      pass
+    assert mux.inFlight == 0
+    await mux.close()
+
+  asyncio.run(asyncio.wait_for(test(), 5))
@@ -0,0 +1,42 @@
+import copy
+import pickle
+
+from scraperski.component import Note, NotePath
+
+def test_lazyNested():
+  note = Note({"a": {"b": {"c": 1}}, "d": 2})
+  assert isinstance(note.a, Note)
+  assert note.a.b == {"c": 1}
+  assert note.body["a"] is note.a
+
+def test_underscoreKeys():
+  note = Note({"_meta": {"id": 7}, "__x": {"y": 1}})
+  assert isinstance(note._meta, Note)
+  assert note._meta.id == 7
+  assert Note({"_meta": {"id": 7}})["_meta"].id == 7
+  assert Note({"_meta": {"id": 7}}).get("_meta").id == 7
+  assert Note({"_meta": {"id": 7}}).hasAttr("_meta.id")
+  assert note.__x.y == 1
+
+def test_dunderProbes():
+  note = Note({"a": {"b": 1}})
+  assert pickle.loads(pickle.dumps(note)).a.b == 1
+  assert copy.deepcopy(note).a.b == 1
+  assert not hasattr(note, "__missing__")
+
+def test_assignReplacesPending():
+  note = Note({"a": {"b": 1}})
+  note["a"] = 3
+  assert note.a == 3
+  assert note.body == {"a": 3}
+  note.delete("a")
+  assert not note.hasAttr("a")
+
+def test_notePath():
+  note = Note({"a": {"b": {"c": 1}}})
+  path = NotePath.of("a.b.c")
+  assert path is NotePath.of("a.b.c")
+  assert path.get(note) == 1
+  assert note.hasAttrValue("a.b.c", 1)
+  NotePath.of("x.y").set(note, 2)
+  assert note.x.y == 2
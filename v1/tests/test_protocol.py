@@ -0,0 +1,120 @@
+import asyncio
+
+from scraperski.component import Article
+from scraperski.component.codec import getCodec
+from scraperski.component.connector import codecFlag, frames
+from scraperski.component.protocol import FrameProtocol, ProtoConnector
+
+#-----------------------------------------------------------------#
+# withServer - run test against a tcp server with the given handler
+#-----------------------------------------------------------------#
+async def withServer(handler, test):
+  server = await asyncio.start_server(handler, "127.0.0.1", 0)
+  port = server.sockets[0].getsockname()[1]
+  try:
+    return await asyncio.wait_for(test(port), 10)
+  finally:
+    server.close()
+
+#-----------------------------------------------------------------#
+# wireOf - the wire bytes of a payload
+#-----------------------------------------------------------------#
+def wireOf(payload, codec="binary") -> bytes:
+  return b"".join(frames(payload, getCodec(codec)))
+
+def test_concurrentDrain():
+  received = []
+
+  async def handler(reader, writer):
+    await asyncio.sleep(0.2)
+    received.append(len(await reader.read(-1)))
+
+  async def test(port):
+    conn = await ProtoConnector.open("127.0.0.1", port)
+    conn._transport.set_write_buffer_limits(high=1024)
+    payload = Article({"data": b"x" * 0x800000})
+    await asyncio.gather(*(conn._write(payload) for _ in range(3)))
+    await conn.close()
+    while not received:
+      await asyncio.sleep(0.05)
+
+  asyncio.run(withServer(handler, test))
+  assert received[0] > 3 * 0x800000
+
+def test_drainFailsOnConnectionLost():
+  async def handler(reader, writer):
+    writer.transport.abort()
+
+  async def test(port):
+    conn = await ProtoConnector.open("127.0.0.1", port)
+    conn._transport.set_write_buffer_limits(high=1024)
+    payload = Article({"data": b"x" * 0x800000})
+    results = await asyncio.gather(*(conn._write(payload) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, OSError) for result in results)
+
+  asyncio.run(withServer(handler, test))
+
+def test_readPause():
+  frame = wireOf(Article({"data": b"x" * 1000}))
+
+  async def handler(reader, writer):
+    for _ in range(1000):
+      writer.write(frame)
+      await writer.drain()
+    writer.close()
+
+  async def test(port):
+    loop = asyncio.get_running_loop()
+    transport, protocol = await loop.create_connection(lambda: FrameProtocol(readLimit=0x4000), "127.0.0.1", port)
+    await asyncio.sleep(0.3)
+    assert protocol._readPaused
+    assert protocol._queued <= 0x4000 + 0x10000
+    count = 0
+    while True:
+      try:
+        article = await protocol.readFrame()
+      except asyncio.IncompleteReadError:
+        break
+      assert len(article.data) == 1000
+      count += 1
+    transport.close()
+    return count
+
+  assert asyncio.run(withServer(handler, test)) == 1000
+
+def test_badFrameIsRaisedByReadFrame():
+  flag = codecFlag(getCodec("json"))
+  bad = bytes([flag, 4]) + b"{bad"
+  good = wireOf(Article({"turn": 1}))
+
+  async def handler(reader, writer):
+    writer.write(bad + good + wireOf([Article({"a": 1}), Article({"b": 2})]))
+    await writer.drain()
+
+  async def test(port):
+    conn = await ProtoConnector.open("127.0.0.1", port)
+    try:
+      await conn._read()
+      assert False, "bad frame was not raised"
+    except ValueError:
+      pass
+    assert conn.alive()
+    assert (await conn._read()).turn == 1
+    assert [part.rawPacket() for part in await conn._read()] == [{"a": 1}, {"b": 2}]
+    await conn.close()
+
+  asyncio.run(withServer(handler, test))
+
+def test_frameAboveReadLimit():
+  async def handler(reader, writer):
+    writer.write(wireOf(Article({"data": b"x" * 0x200000})))
+    writer.write(wireOf([Article({"data": b"y" * 0x100000}), Article({"data": b"z" * 0x100000})]))
+    await writer.drain()
+
+  async def test(port):
+    conn = await ProtoConnector.open("127.0.0.1", port)
+    assert len((await conn._read()).data) == 0x200000
+    assert [len(part.data) for part in await conn._read()] == [0x100000, 0x100000]
+    await conn.close()
+
+  asyncio.run(withServer(handler, test))
@@ -0,0 +1,51 @@
+import asyncio
+
+from scraperski.component import ConnProvider, Note
+
+#-----------------------------------------------------------------#
+# providerOf - a QUEUE mode provider without io timeouts
+#-----------------------------------------------------------------#
+def providerOf(**quServer) -> ConnProvider:
+  return ConnProvider("QUEUE", "localhost", 0, Note({
+    "connWATC": {"readProps": {"timeout": 0}, "writeProps": {"timeout": 0}},
+    "quServer": quServer}))
+
+def test_slotIsReleasedAfterHandshake():
+  async def test():
+    provider = providerOf(maxAccepting=2)
+    closing = asyncio.Event()
+    async def acceptor(reader, writer):
+      await closing.wait()
+    server = provider.newQuServer(acceptor)
+    serving = asyncio.create_task(server.serve_forever())
+    conns = await asyncio.wait_for(
+      asyncio.gather(*(provider.qclient.open(f"client-{index}") for index in range(5))), 5)
+    assert [conn.id for conn in conns] == [f"client-{index}" for index in range(5)]
+    await asyncio.sleep(0)
+    stats = server.stats()
+    assert stats.connections == 5 and stats.accepting == 0
+    await server.shutdown()
+    await asyncio.sleep(0)
+    assert server.stats().connections == 0
+    serving.cancel()
+
+  asyncio.run(test())
+
+def test_handshakeFailureFailsServer():
+  async def test():
+    provider = providerOf(backlog=1)
+    server = provider.newQuServer(lambda reader, writer: None)
+    async def broken(batch):
+      raise RuntimeError("handshake failed")
+    server.qchannel.sendBatch = broken
+    serving = asyncio.create_task(server.serve_forever())
+    opening = [asyncio.create_task(provider.qclient.open(f"client-{index}")) for index in range(4)]
+    try:
+      await asyncio.wait_for(serving, 5)
+      assert False, "serve_forever did not fail"
+    except RuntimeError:
+      pass
+    for task in opening:
+      task.cancel()
+
+  asyncio.run(test())
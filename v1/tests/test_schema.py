@@ -0,0 +1,69 @@
+import asyncio
+import types
+
+import pytest
+
+from scraperski.component import Note, Schema, SchemaArticle, SchemaError
+
+pollSchema = Schema({"action": str, "payload.turn": int}, {"payload.pollDelay": (int, float)}, name="poll")
+
+def test_valid():
+  packet = {"action": "poll", "payload": {"turn": 1, "pollDelay": 1.5}}
+  assert pollSchema.isValid(packet)
+  assert pollSchema.isValid(Note(packet))
+  assert pollSchema.check(packet) is packet
+  assert pollSchema.isValid({"action": "poll", "payload": {"turn": 1}})
+
+def test_errors():
+  errors = pollSchema.errors({"payload": {"turn": "1", "pollDelay": None}})
+  assert errors == [
+    {"path": "action", "error": "missing"},
+    {"path": "payload.turn", "error": "type", "expected": "int", "actual": "str"},
+    {"path": "payload.pollDelay", "error": "type", "expected": "float|int", "actual": "NoneType"}]
+  assert pollSchema.errors([]) == [{"path": "", "error": "type", "expected": "dict", "actual": "list"}]
+  with pytest.raises(SchemaError) as raised:
+    pollSchema.check({"action": "poll", "payload": 1})
+  assert isinstance(raised.value, AttributeError)
+  assert raised.value.errors == [{"path": "payload", "error": "type", "expected": "Note|dict", "actual": "int"}]
+
+def test_noteMethodsAreNotFields():
+  schema = Schema({"body": None, "get": None, "select": None, "view": None})
+  errors = schema.errors(Note({"action": "poll"}))
+  assert [error["path"] for error in errors] == ["body", "get", "select", "view"]
+  assert schema.isValid(Note({"body": 1, "get": 2, "select": 3, "view": 4}))
+
+def test_boolIsNotInt():
+  assert not pollSchema.isValid({"action": "poll", "payload": {"turn": True}})
+  assert not pollSchema.isValid({"action": "poll", "payload": {"turn": 1, "pollDelay": False}})
+  assert Schema({"flag": (bool, int)}).isValid({"flag": True})
+  assert Schema({"flag": bool}).isValid({"flag": False})
+
+def test_pendingNestedNotesStayPending():
+  note = Note({"action": "poll", "payload": {"turn": 1}})
+  assert pollSchema.isValid(note)
+  assert "payload" not in note.__dict__
+
+class Status(SchemaArticle):
+  __slots__ = ("action", "turn")
+  _schema = Schema({"action": str, "turn": int}, name="Status")
+
+def test_schemaArticle():
+  assert Status({"action": "poll", "turn": 1}).turn == 1
+  with pytest.raises(SchemaError):
+    Status({"action": "poll", "turn": True})
+  schema = Schema({"action": str, "rawPacket": None})
+  assert [error["path"] for error in schema.errors(Status.__new__(Status))] == ["action", "rawPacket"]
+
+def test_datafeedRejectsInvalidPacket():
+  pytest.importorskip("socketio")
+  datafeed = pytest.importorskip("scraperski.datafeed.datafeed")
+  session = types.SimpleNamespace(extOrigin="http://ext", remoteUrl="http://remote", switchModes={})
+  app = datafeed.Datafeed.make(session)
+  onPacket = app.engineio_server.handlers["/"]["packet"]
+  response = asyncio.run(onPacket("cid", {"action": "poll/load/status", "stateKey": "S", "payload": {"turn": "1"}}))
+  assert response["statusCode"] == 400
+  assert response["status"] == "failed"
+  assert response["errors"] == [{"path": "payload.turn", "error": "type", "expected": "int", "actual": "str"}]
+  response = asyncio.run(onPacket("cid", {"stateKey": "S"}))
+  assert response["statusCode"] == 400
+  assert response["errors"] == [{"path": "action", "error": "missing"}]
@@ -0,0 +1,23 @@
+import pytest
+
+from scraperski.component import SchemaArticle
+
+class Row(SchemaArticle):
+  __slots__ = ("enabled", "name", "price")
+
+def test_fieldsLiveInSlots():
+  row = Row({"enabled": 1, "name": "gpu", "price": 1.5})
+  assert row.rawPacket() == {"enabled": 1, "name": "gpu", "price": 1.5}
+  assert tuple(row) == (1, "gpu", 1.5)
+  assert row.__dict__ == {}
+  with pytest.raises(AttributeError):
+    Row({"colour": "red"})
+
+def test_queryProductRowLength():
+  # the datafeed package needs its optional scraping dependencies
+  QueryProduct = pytest.importorskip("scraperski.datafeed.session").QueryProduct
+  row = [1, "tag", "category", "subCategory", "target", "query"]
+  assert tuple(QueryProduct.fromRow(row)) == tuple(row)
+  for bad in (row[:-1], row + ["extra"]):
+    with pytest.raises(AttributeError):
+      QueryProduct.fromRow(bad)
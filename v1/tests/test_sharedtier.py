@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+import pytest
+
+from scraperski.component import MemCache, SharedTier
+
+@pytest.fixture
+def tier():
+  tier = SharedTier(f"scraperski-test-{uuid.uuid4().hex[:12]}", slots=64, arenaSize=0x10000)
+  try:
+    yield tier
+  finally:
+    tier.close()
+    tier.unlink()
+
+def test_roundTrip(tier):
+  assert tier.created
+  assert tier.put("a", {"n": 1})
+  assert tier.put(("b", 2), [1, 2])
+  assert tier.get("a") == ({"n": 1}, 0)
+  assert tier.get(("b", 2)) == ([1, 2], 0)
+  assert tier.get("missing") is None
+  assert tier.put("a", "replaced")
+  assert tier.get("a")[0] == "replaced"
+  assert len(tier) == 2
+  assert tier.remove("a") == "replaced"
+  assert "a" not in tier
+  assert len(tier) == 1
+
+def test_expiry(tier):
+  tier.put("old", 1, time.time() - 1)
+  tier.put("new", 2, time.time() + 60)
+  assert tier.get("old") is None
+  assert tier.get("new")[0] == 2
+  assert tier.purge() == 1
+  assert len(tier) == 1
+
+def test_arenaEviction(tier):
+  value = b"x" * 1000
+  for index in range(80):
+    assert tier.put(index, value)
+  # 3 records fit one 4 KiB segment, so the arena wrapped and evicted the oldest
+  assert tier.get(0) is None
+  assert tier.get(79)[0] == value
+  assert tier.stats()["evictions"] > 0
+  assert not tier.put("big", b"x" * 0x2000)
+
+def test_indexRebuild(tier):
+  for index in range(200):
+    tier.put(index % 60, index)
+    tier.remove((index + 30) % 60)
+  assert tier.stats()["rebuilds"] > 0
+  for key in range(60):
+    entry = tier.get(key)
+    assert entry is None or entry[0] % 60 == key
+
+def test_attachAdoptsLayout(tier):
+  tier.put("a", 1)
+  other = SharedTier(tier.name, slots=8, arenaSize=0x100)
+  try:
+    assert not other.created
+    assert (other.slots, other.arenaSize) == (64, 0x10000)
+    assert other.get("a")[0] == 1
+  finally:
+    other.close()
+
+def test_memCacheStats(tier):
+  cache = MemCache(shared=tier)
+  cache.add("a", 1)
+  cache.add("b", 2)
+  assert cache.get("a") == 1
+  assert cache.get("c") is None
+  stats = cache.stats()
+  assert stats.entries == 2
+  assert (stats.hits, stats.misses) == (1, 1)
+  assert stats.shared["entries"] == 2
+
+def test_twoProcesses(tier):
+  tier.put("parent", 1)
+  script = (
+    "import sys\n"
+    f"sys.path.insert(0, {os.path.dirname(__file__)!r})\n"
+    "import conftest\n"
+    "from scraperski.component import SharedTier\n"
+    f"tier = SharedTier({tier.name!r})\n"
+    "assert not tier.created\n"
+    "assert tier.get('parent')[0] == 1\n"
+    "for index in range(20):\n"
+    "  tier.put(('child', index), index)\n"
+    "tier.close()\n")
+  result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=60)
+  assert result.returncode == 0, result.stderr
+  assert "resource_tracker" not in result.stderr, result.stderr
+  assert [tier.get(("child", index))[0] for index in range(20)] == list(range(20))
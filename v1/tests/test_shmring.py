@@ -0,0 +1,103 @@
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+
+from scraperski.component import Article
+from scraperski.component.connector import Connector
+from scraperski.component.provider import SockServer
+from scraperski.component.shmring import READER_WAITING, ShmLink, ShmRing
+
+def test_ringWrapsAround():
+  ring = ShmRing.create(64)
+  try:
+    for index in range(20):
+      data = bytes([index]) * (index % 7 + 30)
+      ring.put(data)
+      assert ring.readable() == len(data)
+      assert ring.take(len(data)) == data
+    assert ring.writable() == 64
+    ring.setWaiting(READER_WAITING, True)
+    assert ring.waiting(READER_WAITING)
+  finally:
+    ring.unlink()
+    ring.close()
+
+#-----------------------------------------------------------------#
+# echoOf - echo the link framed by Connector until the peer closes
+#-----------------------------------------------------------------#
+async def echoOf(reader, writer):
+  conn = Connector("echo", reader, writer)
+  try:
+    while True:
+      await conn._write(await conn._read())
+  except (asyncio.IncompleteReadError, ConnectionResetError):
+    pass
+
+#-----------------------------------------------------------------#
+# roundTrips - lockstep and ring sized echoes over one shm link
+#-----------------------------------------------------------------#
+async def roundTrips(path) -> int:
+  server = SockServer(echoOf, path=path, shm=True)
+  await server.start()
+  try:
+    conn = await Connector.openShm(path, ringSize=0x10000)
+    for size in (10, 1000, 0x8000, 0x30000):
+      article = Article({"data": b"x" * size})
+      await conn._write(article)
+      assert (await asyncio.wait_for(conn._read(), 5)).data == article.data
+    missed = conn._writer.missedWakeups
+    await conn.close()
+    return missed
+  finally:
+    await server.shutdown()
+
+def test_linkRoundTrips():
+  path = os.path.join(tempfile.mkdtemp(), "shm.sock")
+  before = set(os.listdir("/dev/shm"))
+  assert asyncio.run(roundTrips(path)) == 0
+  # the rings are unlinked once both ends attached
+  assert set(os.listdir("/dev/shm")) <= before
+
+def test_noResourceTrackerWarnings():
+  script = (
+    "import asyncio, os, sys, tempfile\n"
+    f"sys.path.insert(0, {os.path.dirname(__file__)!r})\n"
+    "import conftest, test_shmring\n"
+    "asyncio.run(test_shmring.roundTrips(os.path.join(tempfile.mkdtemp(), 'shm.sock')))\n")
+  result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=60)
+  assert result.returncode == 0, result.stderr
+  assert "resource_tracker" not in result.stderr and "KeyError" not in result.stderr, result.stderr
+
+#-----------------------------------------------------------------#
+# interruptedChunkedRead - a read larger than the ring is timed out
+# after part of it was taken
+#-----------------------------------------------------------------#
+async def interruptedChunkedRead(path):
+  async def handler(reader, writer):
+    writer.write(b"x" * 0x18000)
+    await writer.drain()
+    await asyncio.sleep(1)
+
+  server = SockServer(handler, path=path, shm=True)
+  await server.start()
+  try:
+    link = await ShmLink.open(path, 0x10000)
+    try:
+      await asyncio.wait_for(link.readexactly(0x30000), 0.3)
+      assert False, "chunked read did not time out"
+    except asyncio.TimeoutError:
+      pass
+    assert link.is_closing()
+    try:
+      await link.readexactly(10)
+      assert False, "read after a broken frame succeeded"
+    except ConnectionResetError:
+      pass
+    await link.wait_closed()
+  finally:
+    await server.shutdown()
+
+def test_interruptedChunkedReadBreaksLink():
+  asyncio.run(interruptedChunkedRead(os.path.join(tempfile.mkdtemp(), "shm.sock")))
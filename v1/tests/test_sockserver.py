@@ -0,0 +1,168 @@
+import asyncio
+import os
+import socket
+
+import pytest
+
+from scraperski.component import Article, ConnProvider, Note
+from scraperski.component.connector import Connector
+from scraperski.component.protocol import ProtoConnector
+from scraperski.component.provider import SockServer
+
+#-----------------------------------------------------------------#
+# echoOf - echo the connection framed by Connector until the peer closes
+#-----------------------------------------------------------------#
+async def echoOf(reader, writer):
+  conn = Connector("echo", reader, writer)
+  try:
+    while True:
+      await conn._write(await conn._read())
+  except (asyncio.IncompleteReadError, ConnectionResetError):
+    pass
+  finally:
+    await conn.close()
+
+#-----------------------------------------------------------------#
+# spawnAcceptor - the synchronous acceptor interface, as QuServer's
+#-----------------------------------------------------------------#
+def spawnAcceptor(reader, writer):
+  asyncio.get_running_loop().create_task(echoOf(reader, writer))
+
+#-----------------------------------------------------------------#
+# isOpen - True if the server echoes on the connector
+#-----------------------------------------------------------------#
+async def isOpen(conn) -> bool:
+  try:
+    await conn._write(Article({"ping": 1}))
+    return (await asyncio.wait_for(conn._read(), 2)).ping == 1
+  except (asyncio.IncompleteReadError, ConnectionError):
+    return False
+
+def test_syncAcceptorConnectionsAreTracked():
+  async def test():
+    server = SockServer(spawnAcceptor, maxConnections=2)
+    await server.start()
+    conns = [await Connector.open("127.0.0.1", server.port) for _ in range(2)]
+    assert all([await isOpen(conn) for conn in conns])
+    assert server.stats().connections == 2
+    extra = await Connector.open("127.0.0.1", server.port)
+    assert not await isOpen(extra)
+    assert server.rejected == 1
+    await conns[0].close()
+    await asyncio.sleep(0.05)
+    assert server.stats().connections == 1
+    await server.shutdown()
+    assert not await isOpen(conns[1])
+    await asyncio.sleep(0.05)
+    assert server.stats().connections == 0
+
+  asyncio.run(asyncio.wait_for(test(), 10))
+
+def test_coroutineAcceptorConnectionIsClosedOnReturn():
+  async def acceptor(reader, writer):
+    conn = Connector("once", reader, writer)
+    await conn._write(await conn._read())
+
+  async def test():
+    server = SockServer(acceptor)
+    await server.start()
+    conn = await Connector.open("127.0.0.1", server.port)
+    assert await isOpen(conn)
+    assert not await isOpen(conn)
+    await asyncio.sleep(0.05)
+    assert server.stats().connections == 0
+    await server.shutdown()
+
+  asyncio.run(asyncio.wait_for(test(), 10))
+
+def test_syncAcceptorConnectionIsDroppedOnPeerEof():
+  async def test():
+    # -- an acceptor that holds the connection and never closes it
+    held = []
+    server = SockServer(lambda reader, writer: held.append(writer))
+    await server.start()
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    await asyncio.sleep(0.05)
+    assert server.stats().connections == 1
+    writer.close()
+    await asyncio.sleep(0.05)
+    assert server.stats().connections == 0
+    assert held[0].is_closing()
+    await server.shutdown()
+
+  asyncio.run(asyncio.wait_for(test(), 10))
+
+def test_adoptedConnectionIsDroppedOnPeerEof():
+  async def test():
+    server = SockServer(lambda reader, writer: None)
+    local, peer = socket.socketpair()
+    adopting = asyncio.get_running_loop().create_task(server.adopt(local))
+    await asyncio.sleep(0.05)
+    assert server.stats().connections == 1
+    peer.close()
+    await asyncio.wait([adopting], timeout=2)
+    assert adopting.done() and server.stats().connections == 0
+    await server.shutdown()
+
+  asyncio.run(asyncio.wait_for(test(), 10))
+
+def test_noDelay():
+  async def test():
+    for noDelay in (True, False):
+      accepted = asyncio.get_running_loop().create_future()
+      server = SockServer(lambda reader, writer: accepted.set_result(writer), noDelay=noDelay)
+      await server.start()
+      _, writer = await asyncio.open_connection("127.0.0.1", server.port)
+      sock = (await asyncio.wait_for(accepted, 2)).get_extra_info("socket")
+      assert bool(sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)) == noDelay
+      writer.close()
+      await server.shutdown()
+
+  asyncio.run(asyncio.wait_for(test(), 10))
+
+@pytest.mark.parametrize("connClass", [Connector, ProtoConnector])
+def test_unixRoundTrip(tmp_path, connClass):
+  async def test():
+    path = str(tmp_path / "server.sock")
+    # -- a stale socket file is replaced on start
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(path)
+    stale.close()
+    server = SockServer(echoOf, path=path)
+    await server.start()
+    conn = await connClass.openUnix(path, codec="binary")
+    for size in (10, 0x10000):
+      article = Article({"data": "x" * size})
+      await conn._write(article)
+      assert (await asyncio.wait_for(conn._read(), 5)).data == article.data
+    assert server.stats().connections == 1
+    await conn.close()
+    await server.shutdown()
+    assert not os.path.exists(path)
+
+  asyncio.run(asyncio.wait_for(test(), 10))
+
+def test_unixProviderRoundTrip(tmp_path):
+  async def test():
+    path = str(tmp_path / "provider.sock")
+    provider = ConnProvider("UNIX", path, 0, Note({
+      "connWATC": {"readProps": {"timeout": 0}, "writeProps": {"timeout": 0}}}))
+    server = provider.newServer(echoOf)
+    await server.start()
+    conn = await provider.newWATC(Note({"connWATC": provider.connWATC}))
+    await conn.send(Article({"ping": 1}))
+    assert (await asyncio.wait_for(conn.receive(), 5)).ping == 1
+    await conn.close()
+    await server.shutdown()
+    await provider.close()
+
+  asyncio.run(asyncio.wait_for(test(), 10))
+
+def test_unixOpenErrorIsRaised(tmp_path):
+  async def test():
+    with pytest.raises(FileNotFoundError):
+      await Connector.openUnix(str(tmp_path / "missing.sock"))
+    with pytest.raises(FileNotFoundError):
+      await ProtoConnector.openUnix(str(tmp_path / "missing.sock"))
+
+  asyncio.run(test())
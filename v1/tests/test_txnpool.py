@@ -0,0 +1,84 @@
+import asyncio
+import os
+
+from scraperski.component import Article, Connector, ConnWATC, Note, TxnHost, TxnPool
+
+watcConfig = Note({"readProps": {"timeout": 0}, "writeProps": {"timeout": 0}})
+
+#================================================================#
+# EchoHost - replies to each request with its pid and payload
+#===============================================================-#
+class EchoHost(TxnHost):
+
+  def engaged(self) -> bool:
+    return self.conn.statusCode == 200
+
+  async def perform(self):
+    article = await self.conn.receive()
+    if article is None:
+      return
+    await self.conn.send(Article({"pid": os.getpid(), "n": article.n}))
+
+#-----------------------------------------------------------------#
+# request - open a connection, retrying until a worker serves it,
+# and run one request through it
+#-----------------------------------------------------------------#
+async def request(pool, n):
+  loop = asyncio.get_running_loop()
+  deadline = loop.time() + 10
+  while True:
+    try:
+      if pool.path:
+        reader, writer = await asyncio.open_unix_connection(pool.path)
+        conn = Connector("client", reader, writer)
+      else:
+        conn = await Connector.open("127.0.0.1", pool.port)
+      conn = ConnWATC(conn, watcConfig)
+      await conn.send(Article({"n": n}))
+      article = await asyncio.wait_for(conn.receive(), 5)
+      await conn.close()
+      if article is not None:
+        return article
+    except (ConnectionError, FileNotFoundError, asyncio.IncompleteReadError):
+      pass
+    if loop.time() > deadline:
+      raise TimeoutError("no TxnPool worker served the request")
+    await asyncio.sleep(0.05)
+
+def test_tcpPoolServesAndShutsDown():
+  async def test():
+    pool = TxnPool(EchoHost, workers=2)
+    await pool.start()
+    try:
+      assert pool.status == "RUNNING" and pool.port
+      articles = [await request(pool, n) for n in range(4)]
+      assert [article.n for article in articles] == list(range(4))
+      assert os.getpid() not in {article.pid for article in articles}
+    finally:
+      await pool.shutdown()
+    assert pool.status == "CLOSED"
+    assert pool.stats().alive == 0
+    # -- a second shutdown is a no-op
+    await pool.shutdown()
+  asyncio.run(test())
+
+def test_unixPoolHandsOffAndRemovesPath(tmp_path):
+  async def test():
+    path = str(tmp_path / "pool.sock")
+    async with TxnPool(EchoHost, workers=2, path=path) as pool:
+      articles = [await request(pool, n) for n in range(4)]
+      assert [article.n for article in articles] == list(range(4))
+      assert pool.stats().handoffs == 4
+    assert pool.status == "CLOSED"
+    assert not os.path.exists(path)
+  asyncio.run(test())
+
+def test_shutdownToleratesRemovedPath(tmp_path):
+  async def test():
+    path = str(tmp_path / "pool.sock")
+    pool = TxnPool(EchoHost, workers=1, path=path)
+    await pool.start()
+    os.unlink(path)
+    await pool.shutdown()
+    assert pool.status == "CLOSED"
+  asyncio.run(test())